@@ -0,0 +1,59 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+
+class PendingAlbum:
+    __slots__ = ('messages', 'args', 'last_seen')
+
+    def __init__(self, args: tuple):
+        self.messages: List[Any] = []
+        self.args = args
+        self.last_seen = 0.0
+
+
+class AlbumCollector:
+    """
+    Buffer the parts of an album (messages sharing a grouped_id) that arrive separately.
+
+    Telegram delivers each photo or file of an album as its own NewMessage.
+    Parts are collected until none has arrived for wait_seconds, then the
+    whole album is handed to on_album(messages, *args) once, oldest part first.
+    """
+
+    def __init__(self, on_album: Callable[..., Awaitable[Any]], wait_seconds: float = 1.5):
+        self.on_album = on_album
+        self.wait_seconds = wait_seconds
+        self._pending: Dict[int, PendingAlbum] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, message, *args):
+        """Buffer an album part; args (e.g. the group name) are passed on to on_album."""
+        album = self._pending.get(message.grouped_id)
+        if album is None:
+            album = self._pending[message.grouped_id] = PendingAlbum(args)
+            task = asyncio.create_task(self._flush_later(message.grouped_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        album.messages.append(message)
+        album.last_seen = time.monotonic()
+
+    async def _flush_later(self, grouped_id: int):
+        album = self._pending[grouped_id]
+        # Wait until the album has been quiet for wait_seconds
+        while True:
+            remaining = album.last_seen + self.wait_seconds - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining)
+        del self._pending[grouped_id]
+        try:
+            await self.on_album(sorted(album.messages, key=lambda m: m.id), *album.args)
+        except Exception as e:
+            logger.error(f"Error processing album {grouped_id}: {e}", exc_info=True)
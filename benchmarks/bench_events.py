@@ -0,0 +1,132 @@
+"""Memory and encode/decode benchmark for stored events.
+
+Builds a synthetic event set and compares the in-memory footprint (list of
+dicts as loaded from events.json, list of CalendarEvent, EventColumns) and the
+time to encode and decode it as JSON (events.json) and with the binary codec
+(events.bin):
+
+    python benchmarks/bench_events.py
+    python benchmarks/bench_events.py --events 100000 --json-out events_bench.json
+"""
+import os
+import sys
+import gc
+import json
+import random
+import argparse
+import tracemalloc
+from time import perf_counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from calendar_event import CalendarEvent, EventColumns
+
+GROUPS = [f"Community group {i}" for i in range(20)]
+SOURCE_TYPES = ['text', 'text', 'text', 'pdf', 'image']
+WORDS = ('meetup talk workshop concert lecture hackathon party tasting screening tour '
+         'python rust design music film art startup community open free').split()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1_000_000, help='Number of synthetic events')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json-out', help='Write the report as JSON')
+    return parser.parse_args()
+
+
+def make_events(count: int, seed: int) -> List[CalendarEvent]:
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    events = []
+    for i in range(count):
+        start = base + timedelta(minutes=rng.randrange(0, 2 * 365 * 24 * 60))
+        group = rng.choice(GROUPS)
+        events.append(CalendarEvent(
+            title=' '.join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize(),
+            start_date=start,
+            end_date=start + timedelta(hours=rng.randint(1, 4)) if rng.random() < 0.6 else None,
+            description=' '.join(rng.choices(WORDS, k=rng.randint(5, 30))),
+            location=f"{rng.choice(WORDS).capitalize()} Hall, Tel Aviv" if rng.random() < 0.7 else "",
+            source_group=group,
+            source_message_id=rng.randint(1, 500_000),
+            confidence_score=round(rng.uniform(0.5, 1.0), 2),
+            source_type=rng.choice(SOURCE_TYPES),
+            telegram_link=f"https://t.me/group{GROUPS.index(group)}/{i}",
+            source_links=[f"https://t.me/group{rng.randrange(20)}/{i + 1}"] if rng.random() < 0.1 else [],
+        ))
+    return events
+
+
+def measure_memory(build) -> float:
+    """MB allocated by whatever build() returns and keeps alive."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    gc.collect()
+    return round(size / 1024 / 1024, 1)
+
+
+def timed(fn):
+    start = perf_counter()
+    result = fn()
+    return result, round(perf_counter() - start, 3)
+
+
+def run(args) -> Dict[str, Any]:
+    events = make_events(args.events, args.seed)
+    json_text = json.dumps([e.to_dict() for e in events], ensure_ascii=False)
+    binary = EventColumns.from_events(events).to_bytes()
+
+    report: Dict[str, Any] = {'events': len(events)}
+    report['memory_mb'] = {
+        'dicts': measure_memory(lambda: json.loads(json_text)),
+        'CalendarEvent': measure_memory(lambda: [CalendarEvent.from_dict(d) for d in json.loads(json_text)]),
+        'EventColumns': measure_memory(lambda: EventColumns.from_bytes(binary)),
+    }
+
+    _, json_encode = timed(lambda: json.dumps([e.to_dict() for e in events], ensure_ascii=False).encode('utf-8'))
+    data = json.dumps([e.to_dict() for e in events], ensure_ascii=False).encode('utf-8')
+    decoded, json_decode = timed(lambda: [CalendarEvent.from_dict(d) for d in json.loads(data)])
+    assert decoded == events
+    del decoded
+
+    _, binary_encode = timed(lambda: EventColumns.from_events(events).to_bytes())
+    columns, binary_decode = timed(lambda: EventColumns.from_bytes(binary))
+    decoded, binary_materialize = timed(lambda: list(columns))
+    assert decoded == events
+    del decoded
+
+    report['size_mb'] = {'json': round(len(data) / 1024 / 1024, 1), 'binary': round(len(binary) / 1024 / 1024, 1)}
+    report['seconds'] = {
+        'json_encode': json_encode,
+        'json_decode': json_decode,
+        'binary_encode': binary_encode,
+        'binary_decode': binary_decode,
+        'binary_decode_to_events': round(binary_decode + binary_materialize, 3),
+    }
+    return report
+
+
+def main():
+    args = parse_args()
+    report = run(args)
+    print(f"events: {report['events']}")
+    for name, value in report['memory_mb'].items():
+        print(f"  memory  {name:>24}: {value:8.1f} MB")
+    for name, value in report['size_mb'].items():
+        print(f"  size    {name:>24}: {value:8.1f} MB")
+    for name, value in report['seconds'].items():
+        print(f"  time    {name:>24}: {value:8.3f} s")
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
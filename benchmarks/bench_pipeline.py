@@ -0,0 +1,211 @@
+"""End-to-end ingestion benchmark with no network access.
+
+Drives TelegramCalendarSync.scan_all_groups and the live NewMessage handler
+against a fake Telethon client serving a synthetic corpus, with every LLM
+and Bot API call answered by a local mock server. Reports messages/sec,
+p50/p99 per-message latency and peak RSS.
+
+    python benchmarks/bench_pipeline.py --groups 3 --messages 200 --llm-latency 0.3
+    python benchmarks/bench_pipeline.py --json-out bench.json
+    python benchmarks/bench_pipeline.py --baseline bench.json --tolerance 0.15
+"""
+import os
+import sys
+import json
+import math
+import asyncio
+import argparse
+import resource
+import tempfile
+from time import perf_counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--groups', type=int, default=3, help='Number of synthetic groups')
+    parser.add_argument('--messages', type=int, default=100, help='History messages per group to scan')
+    parser.add_argument('--live', type=int, default=50, help='Live messages delivered through the handler')
+    parser.add_argument('--provider', choices=['openai', 'groq', 'anthropic'], default='openai')
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='Mean mock API latency in seconds')
+    parser.add_argument('--llm-jitter', type=float, default=0.01, help='Std deviation of mock latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of mock API calls that fail')
+    parser.add_argument('--telegram-latency', type=float, default=0.0, help='Fake Telegram round-trip latency')
+    parser.add_argument('--flood-every', type=int, default=0, help='Fail every Nth fake Telegram request with FloodWait')
+    parser.add_argument('--event-ratio', type=float, default=0.3, help='Fraction of messages announcing events')
+    parser.add_argument('--media-ratio', type=float, default=0.05, help='Fraction of PDF and of image messages')
+    parser.add_argument('--reminders', type=int, default=10, help='Reminders sent through the mock Bot API')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json-out', help='Write the report as JSON to this path')
+    parser.add_argument('--baseline', help='Compare against a previous --json-out report and fail on regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression vs baseline')
+    return parser.parse_args()
+
+
+def configure_environment(args, data_dir: str):
+    """Point every path at a scratch directory before telegram_calendar_sync is imported."""
+    os.environ.update({
+        'CALENDAR_OUTPUT_PATH': os.path.join(data_dir, 'events.json'),
+        'PROCESSED_MESSAGES_PATH': os.path.join(data_dir, 'processed_messages.json'),
+        'SESSION_PATH': os.path.join(data_dir, 'telegram_session'),
+        'LOG_FILE_PATH': os.path.join(data_dir, 'telegram_calendar.log'),
+        'LOG_LEVEL': os.getenv('LOG_LEVEL', 'WARNING'),
+        'TELEGRAM_API_ID': '1',
+        'TELEGRAM_API_HASH': 'benchmark',
+        'TELEGRAM_PHONE_NUMBER': '+10000000000',
+        'TELEGRAM_GROUPS': ','.join(f'bench_group_{i}' for i in range(args.groups)),
+        'TELEGRAM_BOT_TOKEN': 'benchmark-token',
+        'OPENAI_API_KEY': 'benchmark' if args.provider == 'openai' else '',
+        'GROQ_API_KEY': 'benchmark' if args.provider == 'groq' else '',
+        'ANTHROPIC_API_KEY': 'benchmark' if args.provider == 'anthropic' else '',
+        'GOOGLE_CALENDAR_ID': '',
+    })
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct * len(ordered)) - 1)]
+
+
+def summarize(name: str, count: int, elapsed: float, latencies: List[float]) -> Dict[str, Any]:
+    return {
+        'stage': name,
+        'messages': count,
+        'seconds': round(elapsed, 3),
+        'messages_per_sec': round(count / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def run(args, data_dir: str) -> Dict[str, Any]:
+    import telegram_calendar_sync as tcs
+    from corpus import generate_corpus
+    from fake_telegram import FakeChat, FakeTelegramClient
+    from mock_servers import MockAPIServer
+
+    mock = MockAPIServer(latency=args.llm_latency, jitter=args.llm_jitter, error_rate=args.error_rate, seed=args.seed)
+    base_url = await mock.start()
+    tcs.OPENAI_API_BASE = f'{base_url}/openai/v1'
+    tcs.GROQ_API_BASE = f'{base_url}/groq/openai/v1'
+    tcs.ANTHROPIC_API_BASE = f'{base_url}/anthropic/v1'
+    tcs.TELEGRAM_BOT_API_BASE = f'{base_url}/telegram'
+
+    sync = tcs.TelegramCalendarSync()
+    fake = FakeTelegramClient(latency=args.telegram_latency, flood_every=args.flood_every)
+    sync.client = fake
+    media_dir = os.path.join(data_dir, 'media')
+    groups = [g for g in tcs.TELEGRAM_GROUPS if g.strip()]
+    for i, identifier in enumerate(groups):
+        specs = generate_corpus(args.messages, media_dir, seed=args.seed + i, event_ratio=args.event_ratio,
+                                pdf_ratio=args.media_ratio, image_ratio=args.media_ratio)
+        fake.add_chat(identifier, FakeChat(1000000000 + i, f'Bench Group {i}', identifier), specs)
+
+    # Time each message through process_message (extraction) for the scan stage
+    scan_latencies: List[float] = []
+    process_message = sync.process_message
+
+    async def timed_process_message(message, group_name, album=None):
+        start = perf_counter()
+        try:
+            return await process_message(message, group_name, album)
+        finally:
+            scan_latencies.append(perf_counter() - start)
+
+    sync.process_message = timed_process_message
+    start = perf_counter()
+    scanned_events = await sync.scan_all_groups(limit=args.messages)
+    scan_elapsed = perf_counter() - start
+    sync.process_message = process_message
+    report = {'stages': [summarize('scan', len(scan_latencies), scan_elapsed, scan_latencies)]}
+
+    # Live handler path: deliver fresh messages through the registered NewMessage handler
+    if args.live:
+        monitor = asyncio.create_task(sync.start_monitoring())
+        while not fake.handlers:
+            await asyncio.sleep(0.01)
+        live_specs = generate_corpus(args.live, media_dir, seed=args.seed + 1000, event_ratio=args.event_ratio,
+                                     pdf_ratio=args.media_ratio, image_ratio=args.media_ratio,
+                                     start=datetime.now(timezone.utc) - timedelta(minutes=1))
+        start = perf_counter()
+        await asyncio.gather(*(
+            fake.emit(groups[i % len(groups)], dict(spec, id=args.messages + spec['id']))
+            for i, spec in enumerate(live_specs)
+        ))
+        live_elapsed = perf_counter() - start
+        await fake.disconnect()
+        await monitor
+        report['stages'].append(summarize('live', len(fake.live_latencies), live_elapsed, fake.live_latencies))
+
+    # Reminder fan-out through the mock Bot API
+    if args.reminders and scanned_events:
+        for chat_id in range(3):
+            sync.add_subscribed_chat_id(chat_id)
+        reminder_latencies = []
+        start = perf_counter()
+        for event in scanned_events[:args.reminders]:
+            sent = perf_counter()
+            await sync.send_telegram_reminder(event)
+            reminder_latencies.append(perf_counter() - sent)
+        report['stages'].append(summarize('reminders', len(reminder_latencies),
+                                          perf_counter() - start, reminder_latencies))
+
+    await mock.stop()
+    report['events_extracted'] = len(scanned_events)
+    report['mock_requests'] = dict(mock.requests)
+    report['mock_errors'] = dict(mock.errors)
+    report['fake_telegram_calls'] = dict(fake.calls)
+    report['fake_telegram_flood_waits'] = fake.flood_waits
+    report['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return report
+
+
+def check_regression(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return human-readable regressions beyond `tolerance` relative to the baseline."""
+    problems = []
+    previous = {stage['stage']: stage for stage in baseline.get('stages', [])}
+    for stage in report['stages']:
+        before = previous.get(stage['stage'])
+        if not before:
+            continue
+        if stage['messages_per_sec'] < before['messages_per_sec'] * (1 - tolerance):
+            problems.append(f"{stage['stage']}: throughput {before['messages_per_sec']} -> {stage['messages_per_sec']} msg/s")
+        if before['p99_ms'] and stage['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+            problems.append(f"{stage['stage']}: p99 {before['p99_ms']} -> {stage['p99_ms']} ms")
+    if baseline.get('peak_rss_mb') and report['peak_rss_mb'] > baseline['peak_rss_mb'] * (1 + tolerance):
+        problems.append(f"peak RSS {baseline['peak_rss_mb']} -> {report['peak_rss_mb']} MB")
+    return problems
+
+
+def main():
+    args = parse_args()
+    data_dir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    configure_environment(args, data_dir)
+    report = asyncio.run(run(args, data_dir))
+
+    for stage in report['stages']:
+        print(f"{stage['stage']:>9}: {stage['messages']:5d} msgs in {stage['seconds']:7.2f}s  "
+              f"{stage['messages_per_sec']:8.1f} msg/s  p50 {stage['p50_ms']:8.1f} ms  p99 {stage['p99_ms']:8.1f} ms")
+    print(f"   events: {report['events_extracted']}  peak RSS: {report['peak_rss_mb']} MB  "
+          f"mock requests: {report['mock_requests']}  mock errors: {report['mock_errors']}")
+
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = check_regression(report, json.load(f), args.tolerance)
+        if problems:
+            print('REGRESSION: ' + '; '.join(problems))
+            sys.exit(1)
+        print('No regression against baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Latency benchmark for the full-text event search index.
+
+Builds the SQLite search index over synthetic events whose words follow a
+Zipf distribution (a few words in a large share of events, most words rare,
+like real announcements), then times searches for common, typical and rare
+words, two-word queries and 4-character prefixes, each also with a one-month
+date range and a group filter, and overlap queries for an instant, a day
+and a week. Also times the incremental updates that save_events and
+dismissals make:
+
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --events 100000 --queries 500 --json-out search_bench.json
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import itertools
+from time import perf_counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from calendar_event import CalendarEvent
+from event_search import EventSearchIndex
+
+GROUPS = [f"Community group {i}" for i in range(20)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=100_000, help='Number of synthetic events')
+    parser.add_argument('--vocabulary', type=int, default=30_000, help='Distinct words in the corpus')
+    parser.add_argument('--queries', type=int, default=500, help='Searches per query kind')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json-out', help='Write the report as JSON')
+    return parser.parse_args()
+
+
+class Corpus:
+    def __init__(self, size: int, rng: random.Random):
+        self.rng = rng
+        letters = 'abcdefghijklmnopqrstuvwxyz'
+        self.vocabulary = list(dict.fromkeys(
+            ''.join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)))
+        self.cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(self.vocabulary))))
+
+    def words(self, count: int) -> List[str]:
+        return self.rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=count)
+
+    def events(self, count: int) -> List[CalendarEvent]:
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        events = []
+        for i in range(count):
+            start = base + timedelta(minutes=self.rng.randrange(0, 2 * 365 * 24 * 60))
+            events.append(CalendarEvent(
+                title=' '.join(self.words(self.rng.randint(2, 6))).capitalize(),
+                start_date=start,
+                end_date=start + timedelta(hours=self.rng.randint(1, 4)) if self.rng.random() < 0.6 else None,
+                description=' '.join(self.words(self.rng.randint(5, 40))),
+                location=' '.join(self.words(2)).title() if self.rng.random() < 0.7 else "",
+                source_group=self.rng.choice(GROUPS),
+                source_message_id=i,
+                confidence_score=round(self.rng.uniform(0.5, 1.0), 2),
+            ))
+        return events
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+        'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+        'max_ms': round(samples[-1] * 1000, 2),
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    corpus = Corpus(args.vocabulary, rng)
+    events = corpus.events(args.events)
+    report: Dict[str, Any] = {'events': len(events)}
+    with tempfile.TemporaryDirectory() as directory:
+        index = EventSearchIndex(os.path.join(directory, 'events_search.sqlite3'))
+        start = perf_counter()
+        index.rebuild(events, rng.sample(range(len(events)), len(events) // 50), 'bench')
+        report['rebuild_seconds'] = round(perf_counter() - start, 2)
+
+        vocabulary = corpus.vocabulary
+        queries = {
+            'common_word': lambda: rng.choice(vocabulary[:10]),
+            'typical_word': lambda: corpus.words(1)[0],
+            'rare_word': lambda: rng.choice(vocabulary[1000:]),
+            'two_words': lambda: ' '.join(corpus.words(2)),
+            'prefix': lambda: rng.choice(vocabulary[:2000])[:4],
+        }
+        june = int(datetime(2025, 6, 1, tzinfo=timezone.utc).timestamp())
+        filters = {
+            '': {},
+            '+month': {'start_ts': june, 'end_ts': june + 30 * 86400},
+            '+group': {'groups': [GROUPS[3]]},
+        }
+        report['search'] = {}
+        for name, make_query in queries.items():
+            for suffix, kwargs in filters.items():
+                samples = []
+                for _ in range(args.queries):
+                    query = make_query()
+                    start = perf_counter()
+                    index.search(query, limit=20, **kwargs)
+                    samples.append(perf_counter() - start)
+                report['search'][name + suffix] = percentiles(samples)
+
+        spans = {'instant': 0, 'day': 86400, 'week': 7 * 86400}
+        first = min(event.start_ts for event in events)
+        last = max(event.start_ts for event in events)
+        report['overlap'] = {}
+        for name, span in spans.items():
+            samples = []
+            for _ in range(args.queries):
+                start_ts = rng.randrange(first, last)
+                start = perf_counter()
+                index.overlapping(start_ts, start_ts + span, limit=50)
+                samples.append(perf_counter() - start)
+            report['overlap'][name] = percentiles(samples)
+
+        updates = {
+            'upsert_10': lambda: index.upsert(
+                (rng.randrange(len(events)), events[rng.randrange(len(events))]) for _ in range(10)),
+            'dismiss': lambda: index.set_dismissed([rng.randrange(len(events))]),
+        }
+        report['update'] = {}
+        for name, update in updates.items():
+            samples = []
+            for _ in range(100):
+                start = perf_counter()
+                update()
+                samples.append(perf_counter() - start)
+            report['update'][name] = percentiles(samples)
+    return report
+
+
+def main():
+    args = parse_args()
+    report = run(args)
+    print(f"events: {report['events']}  rebuild: {report['rebuild_seconds']:.2f} s")
+    for section in ('search', 'overlap', 'update'):
+        for name, stats in report[section].items():
+            print(f"  {section:>6} {name:>20}: p50 {stats['p50_ms']:7.2f} ms  p99 {stats['p99_ms']:7.2f} ms  "
+                  f"max {stats['max_ms']:7.2f} ms")
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Startup-time benchmark: how long until the web server answers its first request.
+
+Starts a fresh interpreter that constructs TelegramCalendarSync and runs the
+web server (as main() does, without connecting to Telegram), and polls
+/api/api-check until it answers. Reports the median over several runs of
+time-to-first-request and of the bare module import:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --json-out startup.json
+
+The server binds port 8080, so nothing else may be listening there.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+URL = 'http://127.0.0.1:8080/api/api-check'
+
+SERVER = """
+import asyncio
+import telegram_calendar_sync as tcs
+
+async def main():
+    await tcs.TelegramCalendarSync().run_web_server()
+
+asyncio.run(main())
+"""
+
+IMPORT = """
+from time import perf_counter
+start = perf_counter()
+import telegram_calendar_sync
+print(perf_counter() - start)
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=30.0, help='Give up on a run after this many seconds')
+    parser.add_argument('--json-out', help='Write the report as JSON')
+    return parser.parse_args()
+
+
+def child_env(data_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'CALENDAR_OUTPUT_PATH': os.path.join(data_dir, 'events.json'),
+        'PROCESSED_MESSAGES_PATH': os.path.join(data_dir, 'processed_messages.json'),
+        'SESSION_PATH': os.path.join(data_dir, 'telegram_session'),
+        'LOG_FILE_PATH': os.path.join(data_dir, 'telegram_calendar.log'),
+        'TELEGRAM_API_ID': env.get('TELEGRAM_API_ID', '1'),
+        'TELEGRAM_API_HASH': env.get('TELEGRAM_API_HASH', 'benchmark'),
+        'TELEGRAM_BOT_TOKEN': '',
+        'PYTHONPATH': ROOT,
+    })
+    return env
+
+
+def time_to_first_request(env: dict, timeout: float) -> float:
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', SERVER], env=env, cwd=ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {process.returncode}")
+            try:
+                with urllib.request.urlopen(URL, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"No response within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def import_time(env: dict) -> float:
+    output = subprocess.check_output([sys.executable, '-c', IMPORT], env=env, cwd=ROOT, stderr=subprocess.DEVNULL)
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    args = parse_args()
+    env = child_env(tempfile.mkdtemp(prefix='bench_startup_'))
+    first_request = [time_to_first_request(env, args.timeout) for _ in range(args.runs)]
+    imports = [import_time(env) for _ in range(args.runs)]
+    report = {
+        'runs': args.runs,
+        'time_to_first_request_ms': round(statistics.median(first_request) * 1000, 1),
+        'import_ms': round(statistics.median(imports) * 1000, 1),
+    }
+    print(f"time to first request: {report['time_to_first_request_ms']:8.1f} ms (median of {args.runs})")
+    print(f"module import:         {report['import_ms']:8.1f} ms (median of {args.runs})")
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
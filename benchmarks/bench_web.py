@@ -0,0 +1,108 @@
+"""Requests-per-second benchmark for the aiohttp API app.
+
+Runs the real TelegramCalendarSync web application in-process and hammers
+/api/api-check with concurrent clients. Use --legacy-logging to reproduce
+the previous setup (DEBUG level, three synchronous log lines per request
+including all headers) for a before/after comparison:
+
+    python benchmarks/bench_web.py
+    python benchmarks/bench_web.py --legacy-logging
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+
+DATA_DIR = tempfile.mkdtemp(prefix='bench_web_')
+os.environ.setdefault('CALENDAR_OUTPUT_PATH', os.path.join(DATA_DIR, 'events.json'))
+os.environ.setdefault('PROCESSED_MESSAGES_PATH', os.path.join(DATA_DIR, 'processed_messages.json'))
+os.environ.setdefault('SESSION_PATH', os.path.join(DATA_DIR, 'telegram_session'))
+os.environ.setdefault('LOG_FILE_PATH', os.path.join(DATA_DIR, 'telegram_calendar.log'))
+os.environ.setdefault('TELEGRAM_API_ID', '1')
+os.environ.setdefault('TELEGRAM_API_HASH', 'benchmark')
+os.environ['TELEGRAM_BOT_TOKEN'] = ''
+
+# Console output would dominate the measurement; both modes write to /dev/null instead
+sys.stderr = open(os.devnull, 'w')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import aiohttp
+from aiohttp import web
+import telegram_calendar_sync as tcs
+
+
+def install_legacy_logging(app: web.Application):
+    """Recreate the pre-queue logging setup and per-request middleware."""
+    tcs.log_listener.stop()
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    root.handlers = [logging.StreamHandler(), logging.FileHandler(tcs.LOG_FILE_PATH)]
+    for handler in root.handlers:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    @web.middleware
+    async def logging_middleware(request, handler):
+        tcs.logger.info(f"API Request: {request.method} {request.path} (Raw URL: {request.raw_path})")
+        tcs.logger.info(f"Headers: {dict(request.headers)}")
+        tcs.logger.info(f"Remote: {request.remote} - Forwarded: {request.headers.get('X-Forwarded-For', 'None')}")
+        try:
+            response = await handler(request)
+            tcs.logger.info(f"API Response: {request.path} - Status: {response.status}")
+            return response
+        except Exception as e:
+            tcs.logger.error(f"API Error: {request.path} - Error: {e}")
+            raise
+
+    app.middlewares.clear()
+    app.middlewares.extend([logging_middleware, tcs.cors_middleware])
+
+
+async def run_benchmark(duration: float, concurrency: int, legacy: bool) -> float:
+    sync = tcs.TelegramCalendarSync()
+    if legacy:
+        install_legacy_logging(sync.web_app)
+
+    runner = web.AppRunner(sync.web_app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f'http://127.0.0.1:{port}/api/api-check'
+
+    completed = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(session: aiohttp.ClientSession):
+        nonlocal completed
+        while time.perf_counter() < deadline:
+            async with session.get(url, headers={'X-Forwarded-For': '10.0.0.1'}) as resp:
+                await resp.read()
+            completed += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    await runner.cleanup()
+    return completed / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent client connections')
+    parser.add_argument('--legacy-logging', action='store_true', help='Use the old per-request logging setup')
+    args = parser.parse_args()
+
+    rps = asyncio.run(run_benchmark(args.duration, args.concurrency, args.legacy_logging))
+    mode = 'legacy logging' if args.legacy_logging else 'queued logging'
+    print(f"{mode}: {rps:.0f} requests/sec ({args.concurrency} connections, {args.duration:.0f}s)", file=sys.__stdout__)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Synthetic Telegram message corpus for benchmarks.
+
+Produces a deterministic mix of event announcements, chatter, PDFs and
+images so runs are comparable across commits.
+"""
+import os
+import random
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+TITLES = [
+    'Parent-Teacher Conference', 'Math Exam', 'Science Fair', 'Football Practice', 'Board Meeting',
+    'Community Cleanup', 'Book Club', 'Team Dinner', 'Hackathon Kickoff', 'Yoga in the Park',
+]
+PLACES = ['Room 101', 'Main Hall', 'Conference Room 4B', 'Downtown Convention Center', 'The Corner Bistro', 'Gym']
+EVENT_TEMPLATES = [
+    "Reminder: {title} on {date} at {time} in {place}.",
+    "📅 {title}\nDate: {date}\nTime: {time} - {end}\nLocation: {place}\nPlease be on time!",
+    "Dear all, the {title} will take place {date} from {time} to {end} ({place}). RSVP below 👇",
+    "Don't forget: {title} — {date} {time}, {place}. Bring your ID.\nMore info: https://example.org/{slug}",
+]
+CHATTER = [
+    "Thanks everyone for coming yesterday!",
+    "Does anyone have the homework for chapter 5?",
+    "Great photos, thank you for sharing 🙏",
+    "Who found a blue water bottle in the gym?",
+    "The wifi password changed, ask at the front desk.",
+    "Congrats to the team on the results!",
+    "Can someone add me to the carpool list?",
+]
+
+
+def _sample_pdf(media_dir: str) -> str:
+    """Generate the sample event PDF with reportlab, falling back to the committed copy."""
+    path = os.path.join(media_dir, 'sample_event.pdf')
+    if not os.path.exists(path):
+        try:
+            import sys
+            sys.path.insert(0, REPO_ROOT)
+            from generate_sample_pdf import create_sample_event_pdf
+            create_sample_event_pdf(path)
+        except ImportError:
+            shutil.copy(os.path.join(REPO_ROOT, 'data', 'sample_event.pdf'), path)
+    return path
+
+
+def _sample_image(media_dir: str) -> str:
+    path = os.path.join(media_dir, 'announcement.png')
+    if not os.path.exists(path):
+        shutil.copy(os.path.join(REPO_ROOT, 'data', 'img.png'), path)
+    return path
+
+
+def generate_corpus(count: int, media_dir: str, seed: int = 42, event_ratio: float = 0.3,
+                    pdf_ratio: float = 0.05, image_ratio: float = 0.05,
+                    start: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Return `count` message specs (newest last) with id, date, text and optional media_path."""
+    rng = random.Random(seed)
+    os.makedirs(media_dir, exist_ok=True)
+    start = start or datetime.now(timezone.utc) - timedelta(days=7)
+    messages = []
+    for i in range(count):
+        posted = start + timedelta(minutes=10 * i)
+        roll = rng.random()
+        media_path = None
+        if roll < pdf_ratio:
+            text = rng.choice(["Schedule attached", "", "See the programme in the PDF"])
+            media_path = _sample_pdf(media_dir)
+        elif roll < pdf_ratio + image_ratio:
+            text = rng.choice(["Poster for next week", ""])
+            media_path = _sample_image(media_dir)
+        elif roll < pdf_ratio + image_ratio + event_ratio:
+            event_day = posted + timedelta(days=rng.randint(1, 30))
+            hour = rng.randint(8, 19)
+            title = rng.choice(TITLES)
+            text = rng.choice(EVENT_TEMPLATES).format(
+                title=title,
+                date=event_day.strftime('%Y-%m-%d'),
+                time=f"{hour:02d}:{rng.choice(['00', '15', '30', '45'])}",
+                end=f"{hour + 1:02d}:00",
+                place=rng.choice(PLACES),
+                slug=title.lower().replace(' ', '-'),
+            )
+        else:
+            text = rng.choice(CHATTER)
+        messages.append({'id': i + 1, 'date': posted, 'text': text, 'media_path': media_path})
+    return messages
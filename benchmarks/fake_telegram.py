@@ -0,0 +1,157 @@
+"""In-memory stand-in for telethon.TelegramClient used by the benchmarks.
+
+Implements just the surface TelegramCalendarSync touches: connect/auth,
+get_entity, iter_messages, get_messages, download_media, event handler
+registration and run_until_disconnected, plus emit() to push a live message
+and emit_edit() to edit one.
+"""
+import os
+import shutil
+import asyncio
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from telethon import events, utils
+from telethon.errors import FloodWaitError
+from telethon.tl import types
+
+
+class FakeChat(types.Channel):
+    """A real Channel object, so peers and marked IDs are derived exactly as Telethon does."""
+
+    def __init__(self, chat_id: int, title: str, username: Optional[str] = None):
+        super().__init__(id=chat_id, title=title, photo=types.ChatPhotoEmpty(), date=None,
+                         access_hash=chat_id, username=username, megagroup=True)
+
+
+class FakeMessage:
+    def __init__(self, client: 'FakeTelegramClient', chat: FakeChat, spec: Dict[str, Any]):
+        self._client = client
+        self.chat = chat
+        self.chat_id = utils.get_peer_id(chat)
+        self.id = spec['id']
+        self.date = spec['date']
+        self.text = spec['text']
+        self.message = spec['text']
+        self.media_path = spec.get('media_path')
+        self.media = SimpleNamespace(path=self.media_path) if self.media_path else None
+        self.grouped_id = spec.get('grouped_id')
+
+    async def download_media(self, file=None):
+        return await self._client.download_media(self, file=file)
+
+
+class FakeTelegramClient:
+    """Serves a fixed corpus per chat with optional simulated network latency.
+
+    With flood_every=N, every Nth request fails with a FloodWaitError asking
+    for flood_seconds, like Telegram does under load.
+    """
+
+    def __init__(self, latency: float = 0.0, flood_every: int = 0, flood_seconds: int = 1):
+        self.latency = latency
+        self.flood_every = flood_every
+        self.flood_seconds = flood_seconds
+        self.requests = 0
+        self.flood_waits = 0
+        self.chats: Dict[str, FakeChat] = {}
+        self.history: Dict[int, List[FakeMessage]] = {}
+        self.handlers = []
+        self.live_latencies: List[float] = []
+        self.calls: Dict[str, int] = {'get_entity': 0, 'iter_messages': 0, 'get_messages': 0, 'download_media': 0}
+        self._disconnected = asyncio.Event()
+
+    def add_chat(self, identifier: str, chat: FakeChat, specs: List[Dict[str, Any]]):
+        self.chats[identifier] = chat
+        self.history[utils.get_peer_id(chat)] = [FakeMessage(self, chat, spec) for spec in specs]
+
+    async def _wait(self):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.flood_every and self.requests % self.flood_every == 0:
+            self.flood_waits += 1
+            raise FloodWaitError(request=None, capture=self.flood_seconds)
+
+    async def connect(self):
+        self._disconnected.clear()
+
+    async def is_user_authorized(self) -> bool:
+        return True
+
+    async def disconnect(self):
+        self._disconnected.set()
+
+    def is_connected(self) -> bool:
+        return not self._disconnected.is_set()
+
+    async def get_entity(self, identifier):
+        self.calls['get_entity'] += 1
+        await self._wait()
+        if identifier in self.chats:
+            return self.chats[identifier]
+        for chat in self.chats.values():
+            if identifier in (chat.id, utils.get_peer_id(chat), chat.username):
+                return chat
+        raise ValueError(f'Cannot find any entity corresponding to "{identifier}"')
+
+    async def iter_messages(self, entity, limit: Optional[int] = None, offset_id: int = 0, min_id: int = 0, **kwargs):
+        """Yield newest-first like Telethon, honouring limit, offset_id and min_id. entity may be an input peer."""
+        self.calls['iter_messages'] += 1
+        messages = [m for m in reversed(self.history[utils.get_peer_id(entity)])
+                    if (not offset_id or m.id < offset_id) and m.id > min_id]
+        for i, message in enumerate(messages[:limit] if limit else messages):
+            if i % 100 == 0:
+                await self._wait()  # one round-trip per GetHistory batch
+            yield message
+
+    async def get_messages(self, entity, ids: List[int]):
+        self.calls['get_messages'] += 1
+        await self._wait()
+        by_id = {m.id: m for m in self.history[utils.get_peer_id(entity)]}
+        return [by_id.get(i) for i in ids]
+
+    async def download_media(self, message, file=None):
+        self.calls['download_media'] += 1
+        await self._wait()
+        if not message.media_path:
+            return None
+        target = file if file and not os.path.isdir(file) else os.path.join(
+            file or '.', f"{message.chat.id}_{message.id}{os.path.splitext(message.media_path)[1]}")
+        shutil.copy(message.media_path, target)
+        return target
+
+    def on(self, event_builder):
+        def decorator(handler):
+            self.handlers.append((event_builder, handler))
+            return handler
+        return decorator
+
+    def add_event_handler(self, handler, event_builder):
+        self.handlers.append((event_builder, handler))
+
+    async def run_until_disconnected(self):
+        await self._disconnected.wait()
+
+    async def emit(self, identifier: str, spec: Dict[str, Any]):
+        """Deliver a new message to registered NewMessage handlers and time the handling."""
+        chat = self.chats[identifier]
+        message = FakeMessage(self, chat, spec)
+        self.history[message.chat_id].append(message)
+        update = SimpleNamespace(chat=chat, chat_id=message.chat_id, message=message)
+        for builder, handler in self.handlers:
+            if type(builder) is events.NewMessage:  # MessageEdited subclasses NewMessage
+                start = perf_counter()
+                await handler(update)
+                self.live_latencies.append(perf_counter() - start)
+
+    async def emit_edit(self, identifier: str, message_id: int, text: str):
+        """Replace a stored message's text and deliver it to MessageEdited handlers."""
+        chat = self.chats[identifier]
+        message = next(m for m in self.history[utils.get_peer_id(chat)] if m.id == message_id)
+        message.text = message.message = text
+        update = SimpleNamespace(chat=chat, chat_id=message.chat_id, message=message)
+        for builder, handler in self.handlers:
+            if isinstance(builder, events.MessageEdited):
+                await handler(update)
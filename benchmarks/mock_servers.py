@@ -0,0 +1,177 @@
+"""Local aiohttp server imitating the OpenAI, Groq, Anthropic and Telegram Bot APIs.
+
+Every endpoint sleeps for a configurable latency (with jitter) and fails
+with HTTP 500/429 at a configurable rate. LLM endpoints answer with events
+derived from the ISO dates and HH:MM times found in the analysed text, and
+reject JSON mode where the real APIs do (legacy GPT-4 models, streamed Groq
+requests) with HTTP 400.
+"""
+import re
+import json
+import random
+import asyncio
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+from aiohttp import web
+
+DATE_RE = re.compile(r'\b(\d{4}-\d{2}-\d{2})\b')
+TIME_RE = re.compile(r'\b([01]\d|2[0-3]):([0-5]\d)\b')
+TEXT_MARKERS = ('Text to analyze:', 'Text:')
+NO_JSON_MODE_MODELS = {'gpt-4', 'gpt-4-0314', 'gpt-4-0613', 'gpt-4-32k'}
+
+
+class MockAPIServer:
+    def __init__(self, latency: float = 0.2, jitter: float = 0.05, error_rate: float = 0.0, seed: int = 0,
+                 unsure_models: Iterable[str] = ()):
+        self.latency = latency
+        # Models whose events come back with a low confidence, to exercise escalation
+        self.unsure_models = set(unsure_models)
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._runner = None
+        self.base_url = ''
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        app = web.Application()
+        app.add_routes([
+            web.post('/openai/v1/chat/completions', self.handle_chat_completions),
+            web.post('/groq/openai/v1/chat/completions', self.handle_chat_completions),
+            web.post('/anthropic/v1/messages', self.handle_anthropic_messages),
+            web.route('*', '/telegram/bot{token}/{method}', self.handle_bot_api),
+        ])
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f'http://{host}:{bound_port}'
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _simulate(self, name: str):
+        """Apply latency and decide whether this request fails. Returns an error response or None."""
+        self.requests[name] += 1
+        delay = max(0.0, self.rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors[name] += 1
+            status = self.rng.choice([429, 500, 503])
+            return web.json_response({'error': {'message': 'mock failure'}}, status=status)
+        return None
+
+    @staticmethod
+    def _analysed_text(prompt: str) -> str:
+        for marker in TEXT_MARKERS:
+            if marker in prompt:
+                return prompt.rsplit(marker, 1)[1]
+        return prompt
+
+    def _events_for(self, prompt: str, model: str = '') -> List[Dict[str, Any]]:
+        """Events in the compact reply schema (short keys, unknown fields omitted)."""
+        text = self._analysed_text(prompt)
+        dates = DATE_RE.findall(text)
+        if not dates:
+            return []
+        times = TIME_RE.findall(text)
+        title = next((line.strip() for line in text.splitlines() if line.strip()), 'Event')[:60]
+        event = {'t': title, 'd': dates[0], 'desc': text.strip()[:200], 'c': 0.5 if model in self.unsure_models else 0.9}
+        if times:
+            event['s'] = f'{times[0][0]}:{times[0][1]}'
+        if len(times) > 1:
+            event['e'] = f'{times[1][0]}:{times[1][1]}'
+        return [event]
+
+    @staticmethod
+    def _pieces(content: str, size: int = 24) -> List[str]:
+        return [content[i:i + size] for i in range(0, len(content), size)] or ['']
+
+    @staticmethod
+    async def _stream(request: web.Request, payloads: List[Dict[str, Any]], done: bool) -> web.StreamResponse:
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        for payload in payloads:
+            await response.write(f'data: {json.dumps(payload)}\n\n'.encode('utf-8'))
+        if done:
+            await response.write(b'data: [DONE]\n\n')
+        await response.write_eof()
+        return response
+
+    async def handle_chat_completions(self, request: web.Request) -> web.StreamResponse:
+        provider = request.path.split('/')[1]
+        body = await request.json()
+        error = await self._simulate(provider)
+        if error:
+            return error
+        if (body.get('response_format') or {}).get('type') == 'json_object' and (
+                body.get('model') in NO_JSON_MODE_MODELS or (provider == 'groq' and body.get('stream'))):
+            self.errors[f'{provider}_json_mode'] += 1
+            return web.json_response({'error': {'message': "'response_format' of type 'json_object' is not supported",
+                                                'type': 'invalid_request_error'}}, status=400)
+        prompt = body['messages'][-1]['content']
+        content = json.dumps({'events': self._events_for(prompt, body.get('model'))}, separators=(',', ':'))
+        usage = {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4}
+        if not body.get('stream'):
+            return web.json_response({
+                'id': 'mock', 'object': 'chat.completion', 'model': body.get('model'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                'usage': usage,
+            })
+        chunks = [{'id': 'mock', 'object': 'chat.completion.chunk', 'model': body.get('model'),
+                   'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]}
+                  for piece in self._pieces(content)]
+        if provider == 'groq':
+            chunks.append({'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}], 'x_groq': {'usage': usage}})
+        elif (body.get('stream_options') or {}).get('include_usage'):
+            chunks.append({'choices': [], 'usage': usage})
+        return await self._stream(request, chunks, done=True)
+
+    async def handle_anthropic_messages(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        error = await self._simulate('anthropic')
+        if error:
+            return error
+        messages = body['messages']
+        prompt = next(m['content'] for m in reversed(messages) if m['role'] == 'user')
+        content = json.dumps({'events': self._events_for(prompt, body.get('model'))}, separators=(',', ':'))
+        # Continue after an assistant prefill rather than repeating it
+        prefill = messages[-1]['content'] if messages[-1]['role'] == 'assistant' else ''
+        if prefill and content.startswith(prefill):
+            content = content[len(prefill):]
+        usage = {'input_tokens': len(prompt) // 4, 'output_tokens': len(content) // 4}
+        if not body.get('stream'):
+            return web.json_response({
+                'id': 'mock', 'type': 'message', 'role': 'assistant', 'model': body.get('model'),
+                'content': [{'type': 'text', 'text': content}],
+                'usage': usage,
+            })
+        events = [{'type': 'message_start', 'message': {
+            'id': 'mock', 'type': 'message', 'role': 'assistant', 'model': body.get('model'),
+            'usage': {'input_tokens': usage['input_tokens'], 'output_tokens': 1}}},
+            {'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}}]
+        events.extend({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': piece}}
+                      for piece in self._pieces(content))
+        events.extend([
+            {'type': 'content_block_stop', 'index': 0},
+            {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'}, 'usage': {'output_tokens': usage['output_tokens']}},
+            {'type': 'message_stop'},
+        ])
+        return await self._stream(request, events, done=False)
+
+    async def handle_bot_api(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        error = await self._simulate(f'bot_{method}')
+        if error:
+            return error
+        if method == 'getMe':
+            return web.json_response({'ok': True, 'result': {'id': 1, 'is_bot': True, 'username': 'mock_bot'}})
+        if method == 'getChat':
+            return web.json_response({'ok': True, 'result': {'id': 1000, 'type': 'private'}})
+        return web.json_response({'ok': True, 'result': {'message_id': self.requests[f'bot_{method}']}})
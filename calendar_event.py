@@ -0,0 +1,308 @@
+import sys
+import struct
+from array import array
+from itertools import accumulate
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+NO_END = -2 ** 63  # end_ts column value for events without an end
+MAGIC = b'TCEV'
+VERSION = 1
+HEADER = struct.Struct('<4sHQQQQ')  # magic, version, events, groups, source types, source links
+SECTION = struct.Struct('<Q')  # byte length of the section that follows
+
+
+def epoch_seconds(value) -> Optional[int]:
+    """UTC epoch seconds for a datetime (naive ones are taken as UTC); ints and None pass through."""
+    if value is None or isinstance(value, int):
+        return value
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _intern(value: str) -> str:
+    return sys.intern(value) if type(value) is str else value
+
+
+class CalendarEvent:
+    """
+    One extracted event.
+
+    Slotted, with start and end held as UTC epoch seconds; start_date and
+    end_date expose them as timezone-aware datetimes and accept datetimes
+    (or epoch seconds) when set. source_group and source_type are interned,
+    since a handful of values repeat across every stored event.
+    """
+
+    __slots__ = ('title', 'start_ts', 'end_ts', 'description', 'location', '_source_group', 'source_message_id',
+                 'confidence_score', '_source_type', 'telegram_link', 'source_links')
+
+    def __init__(self, title: str, start_date, end_date=None, description: str = "", location: str = "",
+                 source_group: str = "", source_message_id: int = 0, confidence_score: float = 0.0,
+                 source_type: str = "text", telegram_link: str = "", source_links: Optional[List[str]] = None):
+        self.title = title
+        self.start_ts = epoch_seconds(start_date)
+        self.end_ts = epoch_seconds(end_date)
+        self.description = description
+        self.location = location
+        self._source_group = _intern(source_group)
+        self.source_message_id = source_message_id
+        self.confidence_score = confidence_score
+        self._source_type = _intern(source_type)  # "text", "pdf", "image"
+        self.telegram_link = telegram_link
+        self.source_links = source_links if source_links is not None else []  # Other messages announcing the same event
+
+    @property
+    def start_date(self) -> datetime:
+        return datetime.fromtimestamp(self.start_ts, timezone.utc)
+
+    @start_date.setter
+    def start_date(self, value):
+        self.start_ts = epoch_seconds(value)
+
+    @property
+    def end_date(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self.end_ts, timezone.utc) if self.end_ts is not None else None
+
+    @end_date.setter
+    def end_date(self, value):
+        self.end_ts = epoch_seconds(value)
+
+    @property
+    def source_group(self) -> str:
+        return self._source_group
+
+    @source_group.setter
+    def source_group(self, value: str):
+        self._source_group = _intern(value)
+
+    @property
+    def source_type(self) -> str:
+        return self._source_type
+
+    @source_type.setter
+    def source_type(self, value: str):
+        self._source_type = _intern(value)
+
+    def _fields(self) -> tuple:
+        return (self.title, self.start_ts, self.end_ts, self.description, self.location, self._source_group,
+                self.source_message_id, self.confidence_score, self._source_type, self.telegram_link, self.source_links)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CalendarEvent):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"CalendarEvent(title={self.title!r}, start_date={self.start_date.isoformat()}, source_group={self.source_group!r})"
+
+    def copy(self, **changes) -> 'CalendarEvent':
+        """A copy with the given attributes changed (like dataclasses.replace)."""
+        event = CalendarEvent.__new__(CalendarEvent)
+        for name in CalendarEvent.__slots__:
+            setattr(event, name, getattr(self, name))
+        for name, value in changes.items():
+            setattr(event, name, value)
+        return event
+
+    def to_dict(self) -> Dict[str, Any]:
+        start_date = self.start_date
+        end_date = self.end_date
+        return {
+            'title': self.title,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat() if end_date is not None else None,
+            'description': self.description,
+            'location': self.location,
+            'source_group': self.source_group,
+            'source_message_id': self.source_message_id,
+            'confidence_score': self.confidence_score,
+            'source_type': self.source_type,
+            'telegram_link': self.telegram_link,
+            'source_links': list(self.source_links),
+            'timestamp': self.start_ts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CalendarEvent':
+        # Unknown fields (like 'timestamp') are ignored
+        return cls(
+            title=data['title'],
+            start_date=datetime.fromisoformat(data['start_date']),
+            end_date=datetime.fromisoformat(data['end_date']) if data.get('end_date') else None,
+            description=data.get('description', ''),
+            location=data.get('location', ''),
+            source_group=data.get('source_group', ''),
+            source_message_id=data.get('source_message_id', 0),
+            confidence_score=data.get('confidence_score', 0.0),
+            source_type=data.get('source_type', 'text'),
+            telegram_link=data.get('telegram_link', ''),
+            source_links=list(data.get('source_links') or []),
+        )
+
+
+def _native(arr: array) -> array:
+    """Columns are stored little-endian."""
+    if sys.byteorder == 'big':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+def _encode_strings(values: List[str]) -> bytes:
+    """A string column: character lengths, then every string concatenated as UTF-8."""
+    lengths = array('I', map(len, values))
+    blob = ''.join(values).encode('utf-8', 'surrogatepass')
+    return _native(lengths).tobytes() + blob
+
+
+def _decode_strings(data: bytes, count: int) -> List[str]:
+    lengths = array('I')
+    lengths.frombytes(data[:count * lengths.itemsize])
+    lengths = _native(lengths)
+    text = data[count * lengths.itemsize:].decode('utf-8', 'surrogatepass')
+    values = []
+    offset = 0
+    for length in lengths:
+        values.append(text[offset:offset + length])
+        offset += length
+    return values
+
+
+class EventColumns:
+    """
+    Column-oriented container for large event sets.
+
+    Times, message IDs and confidence scores live in typed arrays, group and
+    source type names are stored once in a table and referenced by index, and
+    the remaining strings are kept in plain lists. Indexing or iterating
+    builds CalendarEvent objects on demand. to_bytes()/from_bytes() are the
+    binary codec: each column is written as one contiguous section, so
+    encoding and decoding are mostly bulk copies.
+    """
+
+    NUMERIC = (('start_ts', 'q'), ('end_ts', 'q'), ('source_message_id', 'q'), ('confidence_score', 'd'),
+               ('group_index', 'I'), ('type_index', 'I'), ('link_counts', 'I'))
+    STRINGS = ('titles', 'descriptions', 'locations', 'telegram_links')
+
+    def __init__(self):
+        for name, typecode in self.NUMERIC:
+            setattr(self, name, array(typecode))
+        for name in self.STRINGS:
+            setattr(self, name, [])
+        self.links: List[str] = []  # Every event's source_links, flattened; link_counts says how many each has
+        self.link_offsets = array('q')
+        self.groups: List[str] = []
+        self.types: List[str] = []
+        self._group_index: Dict[str, int] = {}
+        self._type_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.start_ts)
+
+    @classmethod
+    def from_events(cls, events) -> 'EventColumns':
+        columns = cls()
+        columns.extend(events)
+        return columns
+
+    def _table_index(self, table: List[str], index: Dict[str, int], value: str) -> int:
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(table)
+            table.append(value)
+        return position
+
+    def append(self, event: CalendarEvent):
+        self.start_ts.append(event.start_ts)
+        self.end_ts.append(NO_END if event.end_ts is None else event.end_ts)
+        self.source_message_id.append(int(event.source_message_id or 0))
+        self.confidence_score.append(float(event.confidence_score or 0.0))
+        self.group_index.append(self._table_index(self.groups, self._group_index, event.source_group))
+        self.type_index.append(self._table_index(self.types, self._type_index, event.source_type))
+        self.titles.append(event.title or '')
+        self.descriptions.append(event.description or '')
+        self.locations.append(event.location or '')
+        self.telegram_links.append(event.telegram_link or '')
+        self.link_offsets.append(len(self.links))
+        self.link_counts.append(len(event.source_links))
+        self.links.extend(event.source_links)
+
+    def extend(self, events):
+        for event in events:
+            self.append(event)
+
+    def __getitem__(self, i: int) -> CalendarEvent:
+        event = CalendarEvent.__new__(CalendarEvent)
+        event.title = self.titles[i]
+        event.start_ts = self.start_ts[i]
+        end_ts = self.end_ts[i]
+        event.end_ts = None if end_ts == NO_END else end_ts
+        event.description = self.descriptions[i]
+        event.location = self.locations[i]
+        event._source_group = self.groups[self.group_index[i]]
+        event.source_message_id = self.source_message_id[i]
+        event.confidence_score = self.confidence_score[i]
+        event._source_type = self.types[self.type_index[i]]
+        event.telegram_link = self.telegram_links[i]
+        offset = self.link_offsets[i]
+        event.source_links = self.links[offset:offset + self.link_counts[i]]
+        return event
+
+    def __iter__(self) -> Iterator[CalendarEvent]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_bytes(self) -> bytes:
+        sections = [_native(getattr(self, name)).tobytes() for name, _ in self.NUMERIC]
+        sections.append(_encode_strings(self.groups))
+        sections.append(_encode_strings(self.types))
+        sections.extend(_encode_strings(getattr(self, name)) for name in self.STRINGS)
+        sections.append(_encode_strings(self.links))
+        parts = [HEADER.pack(MAGIC, VERSION, len(self), len(self.groups), len(self.types), len(self.links))]
+        for section in sections:
+            parts.append(SECTION.pack(len(section)))
+            parts.append(section)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'EventColumns':
+        magic, version, count, group_count, type_count, link_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not an event file (magic {magic!r}, version {version})")
+        view = memoryview(data)
+        pos = HEADER.size
+
+        def section() -> memoryview:
+            nonlocal pos
+            (length,) = SECTION.unpack_from(data, pos)
+            pos += SECTION.size + length
+            return view[pos - length:pos]
+
+        columns = cls()
+        for name, typecode in cls.NUMERIC:
+            arr = array(typecode)
+            arr.frombytes(section())
+            setattr(columns, name, _native(arr))
+        columns.groups = [_intern(g) for g in _decode_strings(bytes(section()), group_count)]
+        columns.types = [_intern(t) for t in _decode_strings(bytes(section()), type_count)]
+        for name in cls.STRINGS:
+            setattr(columns, name, _decode_strings(bytes(section()), count))
+        columns.links = _decode_strings(bytes(section()), link_count)
+        columns._group_index = {g: i for i, g in enumerate(columns.groups)}
+        columns._type_index = {t: i for i, t in enumerate(columns.types)}
+        columns.link_offsets = array('q', accumulate(columns.link_counts, initial=0))
+        columns.link_offsets.pop()
+        return columns
+
+
+def encode_events(events) -> bytes:
+    """Binary encoding of a list of events (see EventColumns)."""
+    return EventColumns.from_events(events).to_bytes()
+
+
+def decode_events(data: bytes) -> List[CalendarEvent]:
+    return list(EventColumns.from_bytes(data))
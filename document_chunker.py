@@ -0,0 +1,75 @@
+import re
+from typing import List, Tuple
+
+PARAGRAPH_RE = re.compile(r'\n\s*\n')
+
+
+def _split_long(paragraph: str, max_chars: int) -> List[str]:
+    """Split a paragraph longer than max_chars at line breaks, then at spaces."""
+    if len(paragraph) <= max_chars:
+        return [paragraph]
+    pieces, current = [], ''
+    for line in paragraph.split('\n'):
+        while len(line) > max_chars:
+            # OCR output often has no line breaks at all: cut at the last space that fits
+            cut = line.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(line[:cut])
+            line = line[cut:].lstrip()
+        if current and len(current) + 1 + len(line) > max_chars:
+            pieces.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _units(text: str, max_chars: int) -> List[Tuple[str, bool]]:
+    """Paragraph-sized pieces of at most max_chars, each flagged if it starts a new page."""
+    units = []
+    for page in text.split('\f'):
+        starts_page = True
+        for paragraph in PARAGRAPH_RE.split(page):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            for piece in _split_long(paragraph, max_chars):
+                units.append((piece, starts_page))
+                starts_page = False
+    return units
+
+
+def split_document(text: str, max_chars: int = 6000, overlap_chars: int = 500) -> List[str]:
+    """
+    Split long PDF/OCR text into overlapping windows for separate extraction.
+
+    Windows break at page boundaries (form feeds) once they are at least half
+    full, otherwise at paragraph boundaries, falling back to lines and spaces
+    for oversized paragraphs. The trailing paragraphs of each window (up to
+    overlap_chars) are repeated at the start of the next one, so an event
+    described across a break is seen whole at least once. Text that already
+    fits in one window is returned unchanged.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    windows, current, size = [], [], 0
+    for piece, starts_page in _units(text, max(max_chars - overlap_chars, 1)):
+        if current and (size + len(piece) > max_chars or (starts_page and size >= max_chars // 2)):
+            windows.append(current)
+            carried, carried_size = [], 0
+            for previous in reversed(current):
+                if carried_size + len(previous) > overlap_chars:
+                    break
+                carried.insert(0, previous)
+                carried_size += len(previous) + 2
+            current, size = carried, carried_size
+        current.append(piece)
+        size += len(piece) + 2
+    if current:
+        windows.append(current)
+    return ['\n\n'.join(window) for window in windows]
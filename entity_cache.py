@@ -0,0 +1,98 @@
+import json
+import time
+import logging
+from typing import Any, Dict, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ENTITY_LOOKUPS = REGISTRY.counter(
+    'telegram_entity_cache_lookups_total', 'Group entity lookups served from the cache or resolved', ['outcome'])
+
+
+class EntityCache:
+    """
+    Persisted map from configured group identifiers to resolved Telegram peers.
+
+    Each entry keeps what is needed to address the group without another
+    round-trip (peer type, ID and access hash) plus its title and username.
+    Entries older than ttl_seconds are still served, and marked stale so the
+    caller can refresh them in the background.
+
+    Telethon is imported on first use, so loading the cache does not pull it in.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+            logger.info(f"Loaded {len(self.entries)} cached group entities.")
+        except FileNotFoundError:
+            self.entries = {}
+        except Exception as e:
+            logger.error(f"Error loading entity cache: {e}")
+            self.entries = {}
+
+    def save(self):
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(self.entries, f)
+        except Exception as e:
+            logger.error(f"Error saving entity cache: {e}")
+
+    def get(self, identifier: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(identifier)
+
+    def is_stale(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry['resolved_at'] > self.ttl_seconds
+
+    def store(self, identifier: str, entity) -> Dict[str, Any]:
+        """Cache a resolved Channel, Chat or User under the identifier it was configured as."""
+        from telethon import utils
+        from telethon.tl import types
+        peer = utils.get_input_peer(entity)
+        if isinstance(peer, types.InputPeerChannel):
+            kind, peer_id, access_hash = 'channel', peer.channel_id, peer.access_hash
+        elif isinstance(peer, types.InputPeerChat):
+            kind, peer_id, access_hash = 'chat', peer.chat_id, None
+        elif isinstance(peer, types.InputPeerUser):
+            kind, peer_id, access_hash = 'user', peer.user_id, peer.access_hash
+        else:
+            raise TypeError(f"Cannot cache peer {peer!r} for {identifier}")
+        entry = {
+            'type': kind,
+            'id': peer_id,
+            'access_hash': access_hash,
+            'title': utils.get_display_name(entity) or str(identifier),
+            'username': getattr(entity, 'username', None),
+            'resolved_at': time.time(),
+        }
+        self.entries[identifier] = entry
+        return entry
+
+    def drop(self, identifier: str):
+        self.entries.pop(identifier, None)
+
+    @staticmethod
+    def input_peer(entry: Dict[str, Any]):
+        from telethon.tl import types
+        if entry['type'] == 'channel':
+            return types.InputPeerChannel(entry['id'], entry['access_hash'])
+        if entry['type'] == 'chat':
+            return types.InputPeerChat(entry['id'])
+        return types.InputPeerUser(entry['id'], entry['access_hash'])
+
+    @classmethod
+    def peer_id(cls, entry: Dict[str, Any]) -> int:
+        """Marked peer ID, as found in event.chat_id."""
+        from telethon import utils
+        return utils.get_peer_id(cls.input_peer(entry))
@@ -0,0 +1,68 @@
+import os
+import gzip
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List
+
+from calendar_event import CalendarEvent, EventColumns
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+EVENTS_ARCHIVED = REGISTRY.counter('events_archived_total', 'Past events moved out of events.json into the archive')
+
+
+class EventArchive:
+    """
+    Past events moved out of events.json, one gzip-compressed file per month.
+
+    Each YYYY-MM.bin.gz holds the events starting in that month in the
+    events.bin format (see EventColumns). Adding events to a month rewrites
+    only that month's file; an event already archived (same group, message,
+    title and start) is not stored twice.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, month: str) -> str:
+        return os.path.join(self.directory, f"{month}.bin.gz")
+
+    def months(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len('.bin.gz')] for name in os.listdir(self.directory) if name.endswith('.bin.gz'))
+
+    def load(self, month: str) -> List[CalendarEvent]:
+        path = self._path(month)
+        if not os.path.exists(path):
+            return []
+        with gzip.open(path, 'rb') as f:
+            return list(EventColumns.from_bytes(f.read()))
+
+    def add(self, events: Iterable[CalendarEvent]) -> int:
+        """Archive events; returns how many were not archived already."""
+        by_month: Dict[str, List[CalendarEvent]] = {}
+        for event in events:
+            month = datetime.fromtimestamp(event.start_ts, timezone.utc).strftime('%Y-%m')
+            by_month.setdefault(month, []).append(event)
+        os.makedirs(self.directory, exist_ok=True)
+        added = 0
+        for month, new_events in sorted(by_month.items()):
+            archived = self.load(month)
+            seen = {(e.source_group, e.source_message_id, e.title, e.start_ts) for e in archived}
+            for event in new_events:
+                key = (event.source_group, event.source_message_id, event.title, event.start_ts)
+                if key not in seen:
+                    seen.add(key)
+                    archived.append(event)
+                    added += 1
+            path = self._path(month)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(EventColumns.from_events(archived).to_bytes(), mtime=0))
+            os.replace(tmp_path, path)
+        EVENTS_ARCHIVED.inc(added)
+        if added:
+            logger.debug(f"Archived {added} events into {sorted(by_month)}")
+        return added
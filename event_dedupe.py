@@ -0,0 +1,76 @@
+import re
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Tuple
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+STOPWORDS = frozenset({
+    'a', 'an', 'the', 'of', 'for', 'and', 'at', 'on', 'in', 'to', 'with', 'our', 'your', 'this', 'next',
+    'reminder', 'upcoming', 'dont', 'don', 't', 'forget', 'invitation', 'join', 'us', 'please', 'event',
+})
+
+
+def normalize_tokens(text: str) -> FrozenSet[str]:
+    """Lowercased content words without punctuation, emoji or filler words."""
+    return frozenset(token for token in WORD_RE.findall((text or '').lower()) if token not in STOPWORDS)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Overlap of two token sets; two empty sets share nothing, so titles of only filler words never match."""
+    if not a and not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _has_time(moment: datetime) -> bool:
+    return (moment.hour, moment.minute) != (0, 0)
+
+
+class EventDedupeIndex:
+    """
+    Finds stored events that describe the same real-world event as a new one.
+
+    Events are bucketed by start date, so a lookup only compares against the
+    events within +/- date_tolerance_days instead of the whole history. Within
+    those buckets, candidates must have similar normalized titles, compatible
+    locations and, when both have a time of day, start within
+    time_tolerance_hours of each other. Events extracted from the same message
+    are never merged with each other.
+    """
+
+    def __init__(self, date_tolerance_days: int = 1, time_tolerance_hours: float = 2.0,
+                 title_threshold: float = 0.6, location_threshold: float = 0.5):
+        self.date_tolerance_days = date_tolerance_days
+        self.time_tolerance_seconds = time_tolerance_hours * 3600
+        self.title_threshold = title_threshold
+        self.location_threshold = location_threshold
+        self._buckets: Dict[int, List[Tuple[object, FrozenSet[str], FrozenSet[str]]]] = {}
+
+    def add(self, event):
+        day = event.start_date.date().toordinal()
+        self._buckets.setdefault(day, []).append(
+            (event, normalize_tokens(event.title), normalize_tokens(event.location)))
+
+    def find_match(self, event):
+        """Return the best matching indexed event, or None."""
+        title_tokens = normalize_tokens(event.title)
+        location_tokens = normalize_tokens(event.location)
+        day = event.start_date.date().toordinal()
+        best, best_score = None, 0.0
+        for offset in range(-self.date_tolerance_days, self.date_tolerance_days + 1):
+            for candidate, candidate_title, candidate_location in self._buckets.get(day + offset, ()):
+                if (candidate.source_group, candidate.source_message_id) == (event.source_group, event.source_message_id):
+                    continue
+                if _has_time(candidate.start_date) and _has_time(event.start_date):
+                    if abs((candidate.start_date - event.start_date).total_seconds()) > self.time_tolerance_seconds:
+                        continue
+                score = jaccard(title_tokens, candidate_title)
+                if score < self.title_threshold:
+                    continue
+                if location_tokens and candidate_location:
+                    location_score = jaccard(location_tokens, candidate_location)
+                    if location_score < self.location_threshold:
+                        continue
+                    score = (score + location_score) / 2
+                if score > best_score:
+                    best, best_score = candidate, score
+        return best
@@ -0,0 +1,387 @@
+import re
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from file_lock import FileLock
+from calendar_event import CalendarEvent
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever SCHEMA changes; an index file of another version is dropped and rebuilt
+SCHEMA_VERSION = 1
+
+# prefix=: prefixes of up to 8 characters get their own doclists, so a prefix of a common word is read
+# from one list instead of merging the lists of every word that starts with it
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    event_id INTEGER NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    location TEXT NOT NULL,
+    source_group TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER,
+    until_ts INTEGER NOT NULL,
+    dismissed INTEGER NOT NULL DEFAULT 0,
+    conflicts INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+    title, description, location, source_group, tags,
+    content='events', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5 6 7 8'
+);
+CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+    INSERT INTO events_fts (rowid, title, description, location, source_group, tags)
+    VALUES (new.id, new.title, new.description, new.location, new.source_group, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+    INSERT INTO events_fts (events_fts, rowid, title, description, location, source_group, tags)
+    VALUES ('delete', old.id, old.title, old.description, old.location, old.source_group, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS events_fts_update
+AFTER UPDATE OF title, description, location, source_group, tags ON events BEGIN
+    INSERT INTO events_fts (events_fts, rowid, title, description, location, source_group, tags)
+    VALUES ('delete', old.id, old.title, old.description, old.location, old.source_group, old.tags);
+    INSERT INTO events_fts (rowid, title, description, location, source_group, tags)
+    VALUES (new.id, new.title, new.description, new.location, new.source_group, new.tags);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS events_intervals USING rtree_i32(id, start_minute, until_minute);
+CREATE TRIGGER IF NOT EXISTS events_intervals_insert AFTER INSERT ON events BEGIN
+    INSERT INTO events_intervals (id, start_minute, until_minute)
+    VALUES (new.id, new.start_ts / 60, (new.until_ts + 59) / 60);
+END;
+CREATE TRIGGER IF NOT EXISTS events_intervals_delete AFTER DELETE ON events BEGIN
+    DELETE FROM events_intervals WHERE id = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS events_intervals_update AFTER UPDATE OF start_ts, until_ts ON events BEGIN
+    UPDATE events_intervals SET start_minute = new.start_ts / 60, until_minute = (new.until_ts + 59) / 60
+    WHERE id = new.id;
+END;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+DROP_SCHEMA = """
+DROP TABLE IF EXISTS events_fts;
+DROP TABLE IF EXISTS events_intervals;
+DROP TABLE IF EXISTS events;
+DROP TABLE IF EXISTS meta;
+"""
+
+UPSERT = """
+INSERT INTO events (event_id, title, description, location, source_group, tags, start_ts, end_ts, until_ts, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (event_id) DO UPDATE SET
+    title = excluded.title, description = excluded.description, location = excluded.location,
+    source_group = excluded.source_group, tags = excluded.tags, start_ts = excluded.start_ts,
+    end_ts = excluded.end_ts, until_ts = excluded.until_ts, data = excluded.data
+"""
+
+# Active events whose [start_ts, until_ts) overlaps [?, ?), other than row ?: the R*Tree narrows the minutes,
+# the events row checks the seconds
+OVERLAPPING = """
+SELECT e.id FROM events_intervals AS i JOIN events AS e ON e.id = i.id
+WHERE i.start_minute <= ?2 / 60 AND i.until_minute >= ?1 / 60
+    AND e.start_ts < ?2 AND e.until_ts > ?1 AND e.dismissed = 0 AND e.id != ?3
+"""
+
+COUNT_CONFLICTS = """
+UPDATE events SET conflicts = (
+    SELECT COUNT(*) FROM events_intervals AS i JOIN events AS o ON o.id = i.id
+    WHERE i.start_minute <= events.until_ts / 60 AND i.until_minute >= events.start_ts / 60
+        AND o.start_ts < events.until_ts AND o.until_ts > events.start_ts AND o.dismissed = 0 AND o.id != events.id
+) WHERE dismissed = 0
+"""
+
+# bm25 weights of title, description, location and source_group; tags only filter
+COLUMN_WEIGHTS = (10.0, 1.0, 4.0, 2.0, 0.0)
+# The weights as the table's rank, so ORDER BY rank is sorted inside FTS5
+RANK_CONFIG = f"INSERT INTO events_fts (events_fts, rank) VALUES ('rank', 'bm25({', '.join(map(str, COLUMN_WEIGHTS))})')"
+MAX_QUERY_TERMS = 16
+# Events spanning more months are tagged LONG_EVENT_TAG instead of every month
+MAX_TAGGED_MONTHS = 12
+LONG_EVENT_TAG = 'mlong'
+
+
+def month_tags(start_ts: int, end_ts: int) -> Optional[List[str]]:
+    """Tokens for the months from start_ts to end_ts (e.g. m202506), or None if there are too many."""
+    start = datetime.fromtimestamp(start_ts, timezone.utc)
+    end = datetime.fromtimestamp(max(end_ts, start_ts), timezone.utc)
+    count = (end.year - start.year) * 12 + end.month - start.month + 1
+    if count > MAX_TAGGED_MONTHS:
+        return None
+    months = []
+    year, month = start.year, start.month
+    for _ in range(count):
+        months.append(f"m{year}{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def group_tag(group: str) -> str:
+    return 'g' + hashlib.md5(group.encode('utf-8')).hexdigest()[:16]
+
+
+def event_tags(event: CalendarEvent) -> str:
+    """The filter tokens of an event: the months it spans and its group."""
+    months = month_tags(event.start_ts, event.end_ts if event.end_ts is not None else event.start_ts)
+    return ' '.join([*(months or [LONG_EVENT_TAG]), group_tag(event.source_group or '')])
+
+
+def match_expression(query: str, start_ts: Optional[int] = None, end_ts: Optional[int] = None,
+                     groups: Optional[List[str]] = None) -> Optional[str]:
+    """
+    FTS5 query for documents containing every word of `query`, the last one
+    as a prefix, narrowed to the month and group tags of the filters, if any.
+    """
+    terms = re.findall(r'\w+', query.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    # Only the last word is a prefix (it may still be being typed); exact words are much cheaper to look up
+    words = ' '.join([*(f'"{term}"' for term in terms[:-1]), f'"{terms[-1]}"*'])
+    expression = f"{{title description location source_group}} : ({words})"
+    months = month_tags(start_ts, end_ts) if start_ts is not None and end_ts is not None else None
+    if months:
+        expression += f" AND tags : ({' OR '.join([*months, LONG_EVENT_TAG])})"
+    if groups:
+        expression += f" AND tags : ({' OR '.join(group_tag(group) for group in groups)})"
+    return expression
+
+
+class EventSearchIndex:
+    """
+    Full-text index over stored events in a SQLite FTS5 file, shared by every process.
+
+    Rows are keyed by the event's index in events.json (its id in the UI and
+    in dismissals) and updated as events are saved, replaced, renumbered and
+    dismissed, so a search never reads events.json. Each row also keeps the
+    event as JSON for the response, and month and group tokens in an unranked
+    column so date and group filters are answered by the index as well.
+
+    An R*Tree over each event's time span answers overlap queries in time
+    logarithmic in the number of events. Each active (not dismissed) event
+    also keeps how many other active events it overlaps, its conflicts,
+    adjusted whenever an event is saved, moved, dropped or (un)dismissed.
+
+    The index records a stamp of the files it mirrors. A writer moves it on
+    with advance() only if the index was current before the write, so an
+    index that missed a change (a crash, a hand-edited events.json) stays
+    stale until rebuild().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Searches run on the event loop, refresh_search_index may check the stamp from a thread
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        # The index is derived data: an older layout is dropped and the next refresh rebuilds it
+        with FileLock(f"{path}.lock"):
+            if self.db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                self.db.executescript(DROP_SCHEMA)
+            self.db.executescript(SCHEMA)
+            self.db.execute(RANK_CONFIG)
+            self.db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.db.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def _transaction(self, statements):
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            statements()
+            self.db.execute('COMMIT')
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+
+    @staticmethod
+    def _row(event_id: int, event: CalendarEvent) -> tuple:
+        # until_ts: exclusive end; an event without an end (or ending at its start) occupies its start second
+        until_ts = max(event.end_ts if event.end_ts is not None else event.start_ts, event.start_ts + 1)
+        return (event_id, event.title or '', event.description or '', event.location or '', event.source_group or '',
+                event_tags(event), event.start_ts, event.end_ts, until_ts,
+                json.dumps(event.to_dict(), ensure_ascii=False, default=str))
+
+    def _shift_conflicts(self, row_id: int, start_ts: int, until_ts: int, delta: int) -> int:
+        """Add `delta` to the conflicts of the active events overlapping [start_ts, until_ts); returns how many."""
+        ids = [row[0] for row in self.db.execute(OVERLAPPING, (start_ts, until_ts, row_id))]
+        self.db.executemany('UPDATE events SET conflicts = conflicts + ? WHERE id = ?', ((delta, i) for i in ids))
+        return len(ids)
+
+    def _activate(self, row_id: int, start_ts: int, until_ts: int):
+        """Count an active event's conflicts and add it to those of the events it overlaps."""
+        conflicts = self._shift_conflicts(row_id, start_ts, until_ts, 1)
+        self.db.execute('UPDATE events SET conflicts = ? WHERE id = ?', (conflicts, row_id))
+
+    def _deactivate(self, row_id: int, start_ts: int, until_ts: int):
+        self._shift_conflicts(row_id, start_ts, until_ts, -1)
+        self.db.execute('UPDATE events SET conflicts = 0 WHERE id = ?', (row_id,))
+
+    def stamp(self) -> Optional[str]:
+        with self._lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = 'stamp'").fetchone()
+        return row[0] if row else None
+
+    def advance(self, previous: str, stamp: str) -> bool:
+        """Record that the index matches `stamp`, if it matched `previous` before this write."""
+        with self._lock:
+            cursor = self.db.execute("UPDATE meta SET value = ? WHERE key = 'stamp' AND value = ?", (stamp, previous))
+        return bool(cursor.rowcount)
+
+    def rebuild(self, events: List[CalendarEvent], dismissed: Iterable[int], stamp: str):
+        """Replace the whole index with `events` (in events.json order) and their dismissals."""
+        # On a connection of its own, so searches keep reading the previous index until this commits
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                db.execute('DELETE FROM events')
+                db.execute("INSERT INTO events_fts (events_fts) VALUES ('delete-all')")
+                db.executemany(UPSERT, (self._row(index, event) for index, event in enumerate(events)))
+                db.executemany('UPDATE events SET dismissed = 1 WHERE event_id = ?', ((i,) for i in dismissed))
+                db.execute(COUNT_CONFLICTS)
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('stamp', ?)", (stamp,))
+                db.execute("INSERT INTO events_fts (events_fts) VALUES ('optimize')")
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        finally:
+            db.close()
+        logger.info(f"Rebuilt the event search index with {len(events)} events")
+
+    def upsert(self, events: Iterable[Tuple[int, CalendarEvent]]):
+        """Index (event id, event) pairs, replacing what was stored under those ids."""
+        rows = [self._row(event_id, event) for event_id, event in events]
+
+        def statements():
+            for row in rows:
+                event_id, start_ts, until_ts = row[0], row[6], row[8]
+                old = self.db.execute('SELECT id, start_ts, until_ts, dismissed FROM events WHERE event_id = ?',
+                                      (event_id,)).fetchone()
+                cursor = self.db.execute(UPSERT, row)
+                if old is None:
+                    self._activate(cursor.lastrowid, start_ts, until_ts)
+                elif not old[3] and (old[1], old[2]) != (start_ts, until_ts):
+                    self._shift_conflicts(old[0], old[1], old[2], -1)
+                    self._activate(old[0], start_ts, until_ts)
+        if rows:
+            with self._lock:
+                self._transaction(statements)
+
+    def renumber(self, index_map: Dict[int, int]):
+        """Apply an event renumbering: ids missing from index_map are dropped, the others moved."""
+        def statements():
+            stored = []
+            for event_id, row_id, start_ts, until_ts, dismissed in self.db.execute(
+                    'SELECT event_id, id, start_ts, until_ts, dismissed FROM events ORDER BY event_id').fetchall():
+                if event_id in index_map:
+                    stored.append(event_id)
+                    continue
+                if not dismissed:
+                    self._shift_conflicts(row_id, start_ts, until_ts, -1)
+                self.db.execute('DELETE FROM events WHERE id = ?', (row_id,))
+            # Renumbering keeps the order and only closes gaps, so moving ids in ascending order never collides
+            self.db.executemany('UPDATE events SET event_id = ? WHERE event_id = ?',
+                                ((index_map[i], i) for i in stored if index_map[i] != i))
+        with self._lock:
+            self._transaction(statements)
+
+    def _set_dismissed(self, event_ids: Iterable[int], dismissed: bool):
+        for event_id in event_ids:
+            row = self.db.execute('SELECT id, start_ts, until_ts, dismissed FROM events WHERE event_id = ?',
+                                  (event_id,)).fetchone()
+            if row is None or bool(row[3]) == dismissed:
+                continue
+            self.db.execute('UPDATE events SET dismissed = ? WHERE id = ?', (int(dismissed), row[0]))
+            if dismissed:
+                self._deactivate(*row[:3])
+            else:
+                self._activate(*row[:3])
+
+    def set_dismissed(self, event_ids: Iterable[int], dismissed: bool = True):
+        event_ids = list(event_ids)
+        with self._lock:
+            self._transaction(lambda: self._set_dismissed(event_ids, dismissed))
+
+    def clear_dismissed(self):
+        def statements():
+            rows = self.db.execute('SELECT event_id FROM events WHERE dismissed = 1').fetchall()
+            self._set_dismissed([row[0] for row in rows], False)
+        with self._lock:
+            self._transaction(statements)
+
+    def search(self, query: str, start_ts: Optional[int] = None, end_ts: Optional[int] = None,
+               groups: Optional[List[str]] = None, include_dismissed: bool = False,
+               limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Events matching every word of `query` (the last one as a prefix), best match first.
+
+        Matches in the title count most, then location, source group and
+        description; every match is ranked. start_ts/end_ts keep events
+        overlapping that range and groups restricts source_group.
+        Returns the page of events (each with "id", "score" and "conflicts")
+        and whether more follow.
+        """
+        # The tags narrow the matches inside the index; the exact range and group are checked here
+        expression = match_expression(query, start_ts, end_ts, groups)
+        if expression is None:
+            return [], False
+        conditions = ['events_fts MATCH ?']
+        params: List[Any] = [expression]
+        if not include_dismissed:
+            conditions.append('e.dismissed = 0')
+        if end_ts is not None:
+            conditions.append('e.start_ts <= ?')
+            params.append(end_ts)
+        if start_ts is not None:
+            conditions.append('e.until_ts > ?')
+            params.append(start_ts)
+        if groups:
+            conditions.append(f"e.source_group IN ({', '.join('?' * len(groups))})")
+            params.extend(groups)
+        # FTS5 sorts the matches by rank; events rows are then read in that order only until the page is full
+        sql = (f"SELECT e.event_id, e.data, e.conflicts, f.rank FROM events_fts AS f JOIN events AS e ON e.id = f.rowid "
+               f"WHERE {' AND '.join(conditions)} ORDER BY f.rank LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self.db.execute(sql, (*params, limit + 1, offset)).fetchall()
+        results = [dict(json.loads(data), id=event_id, score=round(-score, 3), conflicts=conflicts)
+                   for event_id, data, conflicts, score in rows[:limit]]
+        return results, len(rows) > limit
+
+    def overlapping(self, start_ts: int, end_ts: int, groups: Optional[List[str]] = None,
+                    include_dismissed: bool = False, limit: int = 50,
+                    offset: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Events overlapping [start_ts, end_ts] (both in seconds, inclusive), in
+        start order. An event without an end overlaps the range if it starts
+        inside it. Returns the page of events (each with "id" and "conflicts")
+        and whether more follow.
+        """
+        conditions = ['i.start_minute <= ?', 'i.until_minute >= ?', 'e.start_ts <= ?', 'e.until_ts > ?']
+        params: List[Any] = [end_ts // 60, start_ts // 60, end_ts, start_ts]
+        if not include_dismissed:
+            conditions.append('e.dismissed = 0')
+        if groups:
+            conditions.append(f"e.source_group IN ({', '.join('?' * len(groups))})")
+            params.extend(groups)
+        sql = (f"SELECT e.event_id, e.data, e.conflicts FROM events_intervals AS i JOIN events AS e ON e.id = i.id "
+               f"WHERE {' AND '.join(conditions)} ORDER BY e.start_ts, e.event_id LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self.db.execute(sql, (*params, limit + 1, offset)).fetchall()
+        results = [dict(json.loads(data), id=event_id, conflicts=conflicts)
+                   for event_id, data, conflicts in rows[:limit]]
+        return results, len(rows) > limit
@@ -0,0 +1,121 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, List, Tuple
+
+from metrics import REGISTRY
+
+try:
+    import brotli
+except ImportError:  # .br siblings are skipped without the brotli package
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS_WRITTEN = REGISTRY.counter('event_partitions_written_total', 'Monthly event partition files rewritten')
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def _atomic_write(path: str, data: bytes):
+    """Write via a temporary file so nginx never serves a half-written file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class PartitionedSnapshot:
+    """
+    Per-month copies of events.json for static serving.
+
+    Events are grouped by the month of start_date into compact JSON files
+    (e.g. 2025-06.json), each with pre-compressed .gz (and, with the brotli
+    package installed, .br) siblings for nginx gzip_static. The events' indices
+    in events.json, the ids the UI dismisses events by, go into a separate
+    2025-06.ids.json in the same order: deleting an event renumbers every
+    later one, and that should only rewrite the small id files, not the
+    events of every later month.
+
+    manifest.json lists each partition with its event count and the content
+    hashes of both files; only files whose hash changed are rewritten, and
+    partitions for months that no longer have events are removed. The manifest
+    is written last, so it only ever points at complete files.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hashes: Dict[str, Tuple[str, str]] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load_manifest()
+
+    def _load_manifest(self):
+        self.hashes = {}
+        try:
+            with open(os.path.join(self.directory, MANIFEST_NAME), 'r') as f:
+                self.hashes = {p['month']: (p['hash'], p.get('ids_hash')) for p in json.load(f)['partitions']}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading event partition manifest: {e}")
+
+    def _paths(self, name: str) -> List[str]:
+        path = os.path.join(self.directory, f"{name}.json")
+        return [path, f"{path}.gz", f"{path}.br"]
+
+    def _write_partition(self, name: str, body: bytes):
+        path, gz_path, br_path = self._paths(name)
+        _atomic_write(gz_path, gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _atomic_write(br_path, brotli.compress(body, quality=11))
+        elif os.path.exists(br_path):
+            os.remove(br_path)  # Never leave a stale .br next to newer content
+        _atomic_write(path, body)
+        PARTITIONS_WRITTEN.inc()
+
+    def write(self, events: List[Dict[str, Any]]) -> List[str]:
+        """Bring the partitions in line with events (as stored in events.json). Returns the files rewritten."""
+        # Another process may have rewritten partitions since
+        self._load_manifest()
+        partitions: Dict[str, List[Dict[str, Any]]] = {}
+        ids: Dict[str, List[int]] = {}
+        for index, event in enumerate(events):
+            month = (event.get('start_date') or '')[:7] or 'undated'
+            partitions.setdefault(month, []).append(event)
+            ids.setdefault(month, []).append(index)
+
+        written = []
+        manifest = []
+        hashes = {}
+        for month in sorted(partitions):
+            entry = {'month': month, 'file': f"{month}.json", 'count': len(partitions[month]),
+                     'ids_file': f"{month}.ids.json"}
+            previous = self.hashes.get(month, (None, None))
+            for name, content, key, old in ((month, partitions[month], 'hash', previous[0]),
+                                            (f"{month}.ids", ids[month], 'ids_hash', previous[1])):
+                body = json.dumps(content, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+                entry[key] = hashlib.sha256(body).hexdigest()[:16]
+                if old != entry[key] or not os.path.exists(self._paths(name)[0]):
+                    self._write_partition(name, body)
+                    written.append(name)
+            hashes[month] = (entry['hash'], entry['ids_hash'])
+            manifest.append(entry)
+
+        removed = set(self.hashes) - set(hashes)
+        if written or removed or not os.path.exists(os.path.join(self.directory, MANIFEST_NAME)):
+            _atomic_write(os.path.join(self.directory, MANIFEST_NAME), json.dumps({
+                'generated_at': int(time.time()),
+                'total': len(events),
+                'partitions': manifest,
+            }).encode('utf-8'))
+        for month in removed:
+            for path in self._paths(month) + self._paths(f"{month}.ids"):
+                if os.path.exists(path):
+                    os.remove(path)
+        self.hashes = hashes
+        if written or removed:
+            logger.debug(f"Rewrote event partitions {written}, removed {sorted(removed)}")
+        return written
@@ -0,0 +1,42 @@
+import os
+import fcntl
+import threading
+
+
+class FileLock:
+    """
+    Exclusive lock shared between processes through flock() on a lock file.
+
+    Re-entrant within a process, so a locked method can call another one that
+    takes the same lock. Used around every read-modify-write of the files that
+    several processes update (events, dismissals).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: int = -1
+
+    def __enter__(self) -> 'FileLock':
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd >= 0:
+                    os.close(self._fd)
+                    self._fd = -1
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = -1
+        self._thread_lock.release()
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+from metrics import REGISTRY
+from rule_extractor import EVENT_WORDS_RE
+
+logger = logging.getLogger(__name__)
+
+PREFILTER_SKIPS = REGISTRY.counter(
+    'group_prefilter_skips_total', 'Texts kept from the LLM by the per-group pre-filter', ['strictness'])
+
+FIELDS = ('messages', 'llm_calls', 'events', 'confidence')
+
+# Pre-filter strictness: 'loose' skips texts with neither a date nor an event word, 'strict' any text without a date
+PREFILTER_OFF, PREFILTER_LOOSE, PREFILTER_STRICT = 'off', 'loose', 'strict'
+
+
+class GroupStats:
+    """
+    Extraction statistics per group, shared by every process through a JSON file.
+
+    Counts per group: messages extracted, LLM calls, events found and the sum
+    of their confidence scores. Updates are kept in memory and merged into the
+    file under `lock` by flush(), so several worker processes can add to it.
+    Once a group has more than `window` messages its counts are halved, so
+    old behaviour fades out.
+    """
+
+    def __init__(self, path: str, lock, window: int = 2000, flush_interval: float = 30.0):
+        self.path = path
+        self.lock = lock
+        self.window = window
+        self.flush_interval = flush_interval
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self._pending: Dict[str, Dict[str, float]] = {}
+        self._flushed_at = time.monotonic()
+
+    def _read(self) -> Dict[str, Dict[str, float]]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Error loading group stats: {e}")
+            return {}
+
+    def load(self):
+        self.totals = self._read()
+        for group, pending in self._pending.items():
+            self._add(self.totals, group, pending)
+
+    @staticmethod
+    def _add(target: Dict[str, Dict[str, float]], group: str, amounts: Dict[str, float]):
+        entry = target.setdefault(group, dict.fromkeys(FIELDS, 0))
+        for field, amount in amounts.items():
+            entry[field] = entry.get(field, 0) + amount
+
+    def record(self, group: str, **amounts: float):
+        """Add to a group's counts, e.g. record(group, events=2, confidence=1.7)."""
+        self._add(self.totals, group, amounts)
+        self._add(self._pending, group, amounts)
+
+    def flush(self):
+        """Merge this process's updates into the file and pick up the other processes' ones."""
+        with self.lock:
+            totals = self._read()
+            for group, pending in self._pending.items():
+                self._add(totals, group, pending)
+                entry = totals[group]
+                if entry['messages'] > self.window:
+                    for field in FIELDS:
+                        entry[field] /= 2
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(totals, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.error(f"Error saving group stats: {e}")
+                return
+        self.totals = totals
+        self._pending.clear()
+        self._flushed_at = time.monotonic()
+
+    def flush_if_due(self):
+        if self._pending and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def get(self, group: str) -> Dict[str, float]:
+        return self.totals.get(group) or dict.fromkeys(FIELDS, 0)
+
+
+class AdaptiveScheduler:
+    """
+    Per-group scan depth, extraction priority and pre-filter strictness from GroupStats.
+
+    A group's yield is the confidence-weighted number of events per message,
+    smoothed towards the yield of all groups together with `prior_messages`
+    pseudo-messages, so a group with little history is treated as average.
+    Its ratio to the overall yield scales scan and backfill depth (clamped to
+    [min_depth, max_depth]) and is its priority for LLM slots and scan order.
+    Groups with at least `min_messages` of history and a yield below
+    `loose_below` get the loose pre-filter, below `strict_below` the strict one.
+    With enabled=False every group is treated the same.
+    """
+
+    def __init__(self, stats: GroupStats, enabled: bool = True, prior_messages: float = 50, min_messages: float = 200,
+                 min_depth: float = 0.25, max_depth: float = 4.0, loose_below: float = 0.02, strict_below: float = 0.005):
+        self.stats = stats
+        self.enabled = enabled
+        self.prior_messages = prior_messages
+        self.min_messages = min_messages
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.loose_below = loose_below
+        self.strict_below = strict_below
+
+    def overall_yield(self) -> float:
+        messages = sum(entry['messages'] for entry in self.stats.totals.values())
+        confidence = sum(entry['confidence'] for entry in self.stats.totals.values())
+        return confidence / messages if messages else 0.0
+
+    def group_yield(self, group: str) -> float:
+        entry = self.stats.get(group)
+        prior = self.overall_yield()
+        return (entry['confidence'] + prior * self.prior_messages) / (entry['messages'] + self.prior_messages)
+
+    def ratio(self, group: str) -> float:
+        """The group's yield relative to all groups (1.0 = average, or no data yet)."""
+        overall = self.overall_yield()
+        if not self.enabled or not overall:
+            return 1.0
+        return self.group_yield(group) / overall
+
+    def depth(self, group: str) -> float:
+        return min(max(self.ratio(group), self.min_depth), self.max_depth)
+
+    def scan_limit(self, group: str, base: int) -> int:
+        return max(1, round(base * self.depth(group)))
+
+    def priority(self, group: Optional[str]) -> float:
+        return self.ratio(group) if group else 1.0
+
+    def prefilter(self, group: Optional[str]) -> str:
+        if not self.enabled or not group or self.stats.get(group)['messages'] < self.min_messages:
+            return PREFILTER_OFF
+        group_yield = self.group_yield(group)
+        if group_yield < self.strict_below:
+            return PREFILTER_STRICT
+        if group_yield < self.loose_below:
+            return PREFILTER_LOOSE
+        return PREFILTER_OFF
+
+    def skip_llm(self, group: Optional[str], text: str, rule_events: List[Dict[str, Any]]) -> bool:
+        """Whether the group's pre-filter keeps this text from the LLM (rule_events: what the rules found in it)."""
+        strictness = self.prefilter(group)
+        if strictness == PREFILTER_OFF or rule_events:
+            return False
+        if strictness == PREFILTER_LOOSE and EVENT_WORDS_RE.search(text):
+            return False
+        PREFILTER_SKIPS.inc(strictness=strictness)
+        return True
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Stats and the resulting scheduling decisions per group, for /api/group-stats."""
+        result = {}
+        for group, entry in sorted(self.stats.totals.items()):
+            result[group] = {
+                'messages': round(entry['messages'], 1),
+                'llm_calls': round(entry['llm_calls'], 1),
+                'events': round(entry['events'], 1),
+                'average_confidence': round(entry['confidence'] / entry['events'], 3) if entry['events'] else None,
+                'yield': round(self.group_yield(group), 4),
+                'depth': round(self.depth(group), 2),
+                'priority': round(self.priority(group), 2),
+                'prefilter': self.prefilter(group),
+            }
+        return result
@@ -0,0 +1,55 @@
+import json
+from typing import Any, List
+
+
+class JSONArrayStream:
+    """
+    Incrementally decode the elements of the first JSON array in streamed text.
+
+    Text is fed chunk by chunk as it arrives from the model; each call to feed()
+    returns the elements that closed within that chunk. Anything before the
+    opening bracket (a markdown fence, or the '{"events":' wrapper of JSON mode)
+    is skipped. If the stream stops early, `items` still holds every element
+    that was complete. Elements are expected to be objects: a bare number
+    split across chunks could otherwise be decoded too early.
+    """
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.started = False  # Opening bracket seen
+        self.closed = False  # Closing bracket seen
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+
+    def feed(self, chunk: str) -> List[Any]:
+        if self.closed or not chunk:
+            return []
+        self._buffer += chunk
+        new_items = []
+        while True:
+            if not self.started:
+                start = self._buffer.find('[', self._pos)
+                if start < 0:
+                    self._pos = len(self._buffer)
+                    break
+                self.started = True
+                self._pos = start + 1
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n,':
+                self._pos += 1
+            if self._pos >= len(self._buffer):
+                break
+            if self._buffer[self._pos] == ']':
+                self.closed = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                break  # Element still incomplete; wait for more text
+            new_items.append(item)
+            self._pos = end
+        # Drop consumed text so the buffer only holds the element in progress
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        self.items.extend(new_items)
+        return new_items
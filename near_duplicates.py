@@ -0,0 +1,167 @@
+import re
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+URL_RE = re.compile(r'https?://\S+|t\.me/\S+')
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+SIMHASH_BITS = 64
+# Words whose date depends on when the message was posted ("tomorrow", "next Friday", "in 3 days")
+RELATIVE_DATE_RE = re.compile(
+    r'\b(?:today|tonight|tomorrow|yesterday|this (?:morning|afternoon|evening|week|weekend)|'
+    r'next (?:week|weekend|month)|in \d+ (?:days?|weeks?)|(?:mon|tues|wednes|thurs|fri|satur|sun)day)\b', re.I)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens with links, emoji and punctuation removed."""
+    return WORD_RE.findall(URL_RE.sub(' ', text.lower()))
+
+
+def simhash(tokens: List[str]) -> int:
+    """64-bit SimHash over word unigrams and bigrams."""
+    weights = [0] * SIMHASH_BITS
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def date_scope(text: str, reference_date: str) -> Optional[str]:
+    """
+    The scope a text's extraction is valid in: its reference date if the text
+    has relative date words, so a repost on another day is extracted again,
+    otherwise None (valid on any day).
+    """
+    return reference_date if RELATIVE_DATE_RE.search(text) else None
+
+
+def numeric_tokens(tokens: List[str]) -> frozenset:
+    """Tokens containing digits (dates, times, room numbers), which must match exactly."""
+    return frozenset(token for token in tokens if any(c.isdigit() for c in token))
+
+
+class NearDuplicateEntry:
+    __slots__ = ('key', 'fingerprint', 'numbers', 'added_at', 'payload', 'scope')
+
+    def __init__(self, key: str, fingerprint: int, numbers: frozenset, added_at: float, payload: Any,
+                 scope: Optional[str] = None):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.numbers = numbers
+        self.added_at = added_at
+        self.payload = payload
+        self.scope = scope
+
+
+class NearDuplicateIndex:
+    """
+    Locality-sensitive index of recent message fingerprints.
+
+    Fingerprints are split into max_distance + 1 bands; by the pigeonhole
+    principle any two fingerprints within max_distance bits share at least
+    one identical band, so only entries in matching band buckets are compared.
+    Candidates must also contain exactly the same numeric tokens, so a repost
+    that changes a date or time is never treated as a duplicate, and the
+    same `scope` (see date_scope), so "tomorrow" posted on another day is not.
+    Entries expire after ttl_seconds and the index never exceeds max_entries.
+    """
+
+    def __init__(self, max_distance: int = 4, ttl_seconds: float = 72 * 3600,
+                 max_entries: int = 10000, min_tokens: int = 6):
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.min_tokens = min_tokens
+        band_count = max_distance + 1
+        width = SIMHASH_BITS // band_count
+        self._bands = [(i * width, SIMHASH_BITS if i == band_count - 1 else (i + 1) * width)
+                       for i in range(band_count)]
+        self._entries: 'OrderedDict[str, NearDuplicateEntry]' = OrderedDict()
+        self._buckets: List[Dict[int, Set[str]]] = [{} for _ in self._bands]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_values(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> start) & ((1 << (end - start)) - 1) for start, end in self._bands]
+
+    def fingerprint(self, text: str) -> Optional[Tuple[int, frozenset]]:
+        """Return (simhash, numeric tokens), or None for texts too short to compare reliably."""
+        tokens = tokenize(text)
+        if len(tokens) < self.min_tokens:
+            return None
+        return simhash(tokens), numeric_tokens(tokens)
+
+    def find(self, text: str, now: Optional[float] = None,
+             scope: Optional[str] = None) -> Optional[NearDuplicateEntry]:
+        """Return the closest live entry within max_distance bits of `text` added with the same scope, if any."""
+        self.evict(now)
+        fingerprinted = self.fingerprint(text)
+        if fingerprinted is None:
+            return None
+        fingerprint, numbers = fingerprinted
+        best, best_distance = None, self.max_distance + 1
+        seen = set()
+        for band, value in enumerate(self._band_values(fingerprint)):
+            for key in self._buckets[band].get(value, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                entry = self._entries[key]
+                if entry.numbers != numbers or entry.scope != scope:
+                    continue
+                distance = bin(entry.fingerprint ^ fingerprint).count('1')
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+        return best
+
+    def add(self, key: str, text: str, payload: Any, now: Optional[float] = None, scope: Optional[str] = None):
+        fingerprinted = self.fingerprint(text)
+        if fingerprinted is None:
+            return
+        fingerprint, numbers = fingerprinted
+        if key in self._entries:
+            self._remove(key)
+        entry = NearDuplicateEntry(key, fingerprint, numbers, now if now is not None else time.time(), payload, scope)
+        self._entries[key] = entry
+        for band, value in enumerate(self._band_values(fingerprint)):
+            self._buckets[band].setdefault(value, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def discard(self, key: str):
+        """Forget an entry, e.g. because its message was edited."""
+        if key in self._entries:
+            self._remove(key)
+
+    def discard_variants(self, key: str) -> int:
+        """Forget the entries added as `<key>_<n>`, e.g. all text variants of an edited message."""
+        keys = [entry_key for entry_key in self._entries if entry_key.rpartition('_')[0] == key]
+        for entry_key in keys:
+            self._remove(entry_key)
+        return len(keys)
+
+    def evict(self, now: Optional[float] = None):
+        """Drop entries older than ttl_seconds (oldest first)."""
+        cutoff = (now if now is not None else time.time()) - self.ttl_seconds
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest.added_at >= cutoff:
+                break
+            self._remove(oldest.key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        for band, value in enumerate(self._band_values(entry.fingerprint)):
+            bucket = self._buckets[band].get(value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][value]
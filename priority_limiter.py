@@ -0,0 +1,55 @@
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import List, Tuple
+
+
+class PriorityLimiter:
+    """
+    Semaphore that hands free slots to the highest-priority waiter first.
+
+    Waiters with the same priority are served in arrival order. A released
+    slot passes straight to the next waiter, so a burst of low-priority work
+    cannot take a slot that a higher-priority caller is already waiting for.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(limit, 1)
+        self.active = 0
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        """Callers waiting for a slot."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: float = 0):
+        if self.active < self.limit and not len(self):
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (-priority, next(self._order), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the caller was cancelled
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: float = 0):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,260 @@
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+MONTHS = r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)'
+ORDINAL = r'(?:st|nd|rd|th)?'
+# (pattern, kind): 'explicit_year' dates carry a year, 'explicit' ones name the month,
+# 'numeric' ones like 05/07 are the most likely to be something else (versions, scores)
+DATE_PATTERNS = [
+    (re.compile(r'\b\d{4}-\d{1,2}-\d{1,2}\b'), 'explicit_year'),
+    (re.compile(rf'\b\d{{1,2}}{ORDINAL}\s+(?:of\s+)?{MONTHS}\.?,?\s+\d{{4}}\b', re.I), 'explicit_year'),
+    (re.compile(rf'\b{MONTHS}\.?\s+\d{{1,2}}{ORDINAL},?\s+\d{{4}}\b', re.I), 'explicit_year'),
+    (re.compile(r'\b\d{1,2}[./]\d{1,2}[./](?:\d{4}|\d{2})\b'), 'explicit_year'),
+    (re.compile(rf'\b\d{{1,2}}{ORDINAL}\s+(?:of\s+)?{MONTHS}\b\.?', re.I), 'explicit'),
+    (re.compile(rf'\b{MONTHS}\.?\s+\d{{1,2}}{ORDINAL}\b', re.I), 'explicit'),
+    (re.compile(r'\b\d{1,2}[./]\d{1,2}\b(?![./]\d)'), 'numeric'),
+]
+# Day and month (and year) of the 05.07 / 05/07 / 5.7.26 forms; dateutil keeps the reference month for dotted ones
+NUMERIC_DATE_RE = re.compile(r'(\d{1,2})[./](\d{1,2})(?:[./](\d{4}|\d{2}))?$')
+KIND_SCORES = {'explicit_year': 0.3, 'explicit': 0.25, 'relative': 0.2, 'numeric': 0.1}
+RELATIVE_RE = re.compile(r'\b(day after tomorrow|tomorrow|today|tonight|this evening)\b', re.I)
+RELATIVE_OFFSETS = {'day after tomorrow': 2, 'tomorrow': 1, 'today': 0, 'tonight': 0, 'this evening': 0}
+WEEKDAY_RE = re.compile(r'\b(?:(next|this)\s+)?(mon|tues?|wed(?:nes)?|thu(?:rs?)?|fri|sat(?:ur)?|sun)(?:day)?\b', re.I)
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+MERIDIEM = r'(?:[ap]\.?m\.?)'
+TIME_TOKEN = rf'(?:(?:[01]?\d|2[0-3]):[0-5]\d\s*{MERIDIEM}?|(?:1[0-2]|0?[1-9])\s*{MERIDIEM})'
+TIME_RE = re.compile(rf'(?<![\d:])({TIME_TOKEN})(?![\d:])', re.I)
+TIME_RANGE_RE = re.compile(rf'(?<![\d:])({TIME_TOKEN}|(?:1[0-2]|0?[1-9]))\s*(?:-|–|—|to|until|till)\s*({TIME_TOKEN})(?![\d:])', re.I)
+AT_HOUR_RE = re.compile(r'\bat\s+([01]?\d|2[0-3])\b(?![:.\d])', re.I)
+# A bare "at 5" below this hour means the afternoon; nobody announces a 5 am event without saying so
+AT_HOUR_PM_BELOW = 7
+# Reports of something that already happened ("meeting was great", "we scored 3-2 today")
+PAST_RE = re.compile(r'\b(was|were|went|had|scored|won|lost|happened|yesterday|last (?:night|week))\b', re.I)
+# Notices that an event is off or moved; the dates in them are not events to add
+CANCELLED_RE = re.compile(
+    r"\b(cancel(?:l?ed|lation|s)?|postpone[ds]?|called off|rescheduled?|(?:will not|won't) take place)\b", re.I)
+# Words joining a date or time to the title ("Meeting on 12 May at 9am"), dropped with it
+CONNECTOR_RE = re.compile(r'(?:\b(?:on|at|from|starting|until|till)\s+)?\x00', re.I)
+LOCATION_RE = re.compile(r'(?:📍|\b(?:location|venue|where|place|address)\s*[:\-])\s*(.+)', re.I)
+URL_RE = re.compile(r'https?://\S+|t\.me/\S+')
+EVENT_WORDS_RE = re.compile(
+    r'\b(meeting|meetup|event|lecture|talk|workshop|webinar|seminar|conference|session|class|course|'
+    r'deadline|party|concert|show|festival|ceremony|gathering|hackathon|training|exam|registration|'
+    r'invite|invited|join us|rsvp|starts?|opening|screening|tour|game|match)\b', re.I)
+
+
+def _parse_time(token: str, meridiem_hint: str = '') -> Optional[Tuple[int, int]]:
+    token = token.strip().lower().replace('.', '')
+    match = re.match(r'(\d{1,2})(?::(\d{2}))?\s*([ap]m)?$', token)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = match.group(3) or meridiem_hint
+    if meridiem == 'pm' and hour < 12:
+        hour += 12
+    elif meridiem == 'am' and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute
+
+
+def _meridiem(token: str) -> str:
+    match = re.search(r'([ap])\.?m\.?\s*$', token.lower())
+    return f"{match.group(1)}m" if match else ''
+
+
+class RuleBasedExtractor:
+    """
+    Deterministic event extraction from pattern tables and python-dateutil.
+
+    Recognises explicit dates ("2025-06-27", "27/06", "June 27, 2025"),
+    relative days ("tomorrow", "tonight"), weekdays ("next Friday"), times
+    ("18:00", "6:30 pm", "at 18") and time ranges ("18:00-20:00", "6-8pm").
+    Returns event dicts in the same shape as the LLM replies.
+
+    Messages that cancel or postpone something yield no events. The title is
+    the first line with words besides the dates and times found in it.
+
+    confidence_score rises with how much of the event is stated explicitly:
+    a concrete date with a year, a time of day, and an event word ("meeting",
+    "workshop", ...) each add to it, and messages listing several dates score
+    lower because pairing dates with titles and times is guesswork. A
+    relative or bare numeric date without a time, and wording that reports
+    something past ("was", "scored", "yesterday"), lower it too.
+    """
+
+    def __init__(self, dayfirst: bool = True):
+        self.dayfirst = dayfirst
+
+    def _dates(self, line: str, reference: datetime) -> List[Tuple[datetime, str, Tuple[int, int]]]:
+        """(date, kind, span) for each date mention in a line; see DATE_PATTERNS and KIND_SCORES for kinds."""
+        found = []
+        taken: List[Tuple[int, int]] = []
+
+        def free(span):
+            return all(span[1] <= start or span[0] >= end for start, end in taken)
+
+        for pattern, kind in DATE_PATTERNS:
+            for match in pattern.finditer(line):
+                if not free(match.span()):
+                    continue
+                numbers = re.findall(r'\d+', match.group(0))
+                if (len(numbers) > 1 and len(numbers[0]) <= 2 and int(numbers[1 if self.dayfirst else 0]) > 12
+                        and not re.search(r'[a-z]', match.group(0), re.I)):
+                    continue  # Not a month, e.g. the time "18.30"
+                text = re.sub(r'(\d)(st|nd|rd|th)\b', r'\1', match.group(0).rstrip('.,'), flags=re.I)
+                try:
+                    numeric = NUMERIC_DATE_RE.match(text)
+                    if numeric:
+                        moment = self._numeric_date(numeric, reference)
+                    else:
+                        # ISO dates are always year-month-day
+                        dayfirst = self.dayfirst and not re.match(r'\d{4}-', text)
+                        moment = date_parser.parse(text, default=reference, dayfirst=dayfirst)
+                    if kind != 'explicit_year' and moment < reference - timedelta(days=180):
+                        moment = moment.replace(year=moment.year + 1)
+                except (ValueError, OverflowError):
+                    continue
+                taken.append(match.span())
+                found.append((moment, kind, match.span()))
+        for match in RELATIVE_RE.finditer(line):
+            if free(match.span()):
+                taken.append(match.span())
+                offset = RELATIVE_OFFSETS[match.group(1).lower()]
+                found.append((reference + timedelta(days=offset), 'relative', match.span()))
+        for match in WEEKDAY_RE.finditer(line):
+            if not free(match.span()):
+                continue
+            # Bare three-letter abbreviations like "sat" or "wed" are only trusted with a "this"/"next" prefix
+            if not match.group(1) and len(match.group(0)) <= 4 and not match.group(0).endswith('.'):
+                continue
+            taken.append(match.span())
+            weekday = WEEKDAYS.index(match.group(2).lower()[:3])
+            days_ahead = (weekday - reference.weekday()) % 7
+            if match.group(1) and match.group(1).lower() == 'next' and days_ahead == 0:
+                days_ahead = 7
+            found.append((reference + timedelta(days=days_ahead), 'relative', match.span()))
+        return sorted(found, key=lambda item: item[2][0])
+
+    def _numeric_date(self, match: re.Match, reference: datetime) -> datetime:
+        """The date of a NUMERIC_DATE_RE match, in the reference year if it has none; ValueError if invalid."""
+        first, second, year = match.groups()
+        day, month = (int(first), int(second)) if self.dayfirst else (int(second), int(first))
+        if year is None:
+            year = reference.year
+        elif len(year) == 2:
+            year = 2000 + int(year)
+        return reference.replace(year=int(year), month=month, day=day)
+
+    @staticmethod
+    def _times(line: str) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """First (start, end) time of day in a line; end is None unless a range is given."""
+        match = TIME_RANGE_RE.search(line)
+        if match:
+            end_hint = _meridiem(match.group(2))
+            start = _parse_time(match.group(1), _meridiem(match.group(1)) or end_hint)
+            end = _parse_time(match.group(2))
+            if start and end:
+                return start, end
+        match = TIME_RE.search(line)
+        if match:
+            return _parse_time(match.group(1)), None
+        match = AT_HOUR_RE.search(line)
+        if match:
+            hour = int(match.group(1))
+            return (hour + 12 if 0 < hour < AT_HOUR_PM_BELOW else hour, 0), None
+        return None, None
+
+    @staticmethod
+    def _title(lines: List[str], date_spans: Dict[int, List[Tuple[int, int]]]) -> str:
+        """The first line with at least three letters left once its dates, times and URLs are cut out."""
+        for index, line in enumerate(lines):
+            spans = list(date_spans.get(index, []))
+            for pattern in (TIME_RANGE_RE, TIME_RE, AT_HOUR_RE):
+                spans.extend(match.span() for match in pattern.finditer(line)
+                             if all(match.end() <= start or match.start() >= end for start, end in spans))
+            # Right to left, so the earlier spans keep their offsets
+            for start, end in sorted(spans, reverse=True):
+                line = f"{line[:start]}\x00{line[end:]}"
+            # "June 12, 2025, 6-8pm" goes as one piece, and so do the brackets around it
+            line = re.sub(r'\x00(?:[\s,;\-–—]*\x00)+', '\x00', line)
+            cleaned = CONNECTOR_RE.sub(' ', URL_RE.sub('', line))
+            cleaned = re.sub(r'\(\s*\)|\[\s*\]', '', cleaned)
+            cleaned = re.sub(r'\s+([!?.,;:])', r'\1', re.sub(r'\s+', ' ', cleaned))
+            cleaned = re.sub(r'[\s,;:\-–—|@(]+$', '', re.sub(r'^[\W_]+', '', cleaned))
+            # Skip lines that are only a date/time stamp
+            if len(re.sub(r'[\d\s:./\-]', '', cleaned)) >= 3:
+                return cleaned[:100]
+        return 'Event'
+
+    def extract(self, text: str, current_date: str) -> List[Dict[str, Any]]:
+        if CANCELLED_RE.search(text):
+            return []
+        reference = datetime.strptime(current_date, '%Y-%m-%d')
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        mentions = []  # (date, kind, line index)
+        date_spans: Dict[int, List[Tuple[int, int]]] = {}
+        for index, line in enumerate(lines):
+            for moment, kind, span in self._dates(line, reference):
+                mentions.append((moment, kind, index))
+                date_spans.setdefault(index, []).append(span)
+        if not mentions:
+            return []
+
+        distinct_days = {moment.date() for moment, _, _ in mentions}
+        has_event_word = bool(EVENT_WORDS_RE.search(text))
+        reports_past = bool(PAST_RE.search(text))
+        location = next((m.group(1).strip() for m in map(LOCATION_RE.search, lines) if m), '')
+        title = self._title(lines, date_spans)
+
+        if len(distinct_days) == 1:
+            # One event: take the most explicit mention and the first time anywhere in the message
+            rank = {'explicit_year': 0, 'explicit': 1, 'relative': 2, 'numeric': 3}
+            moment, kind, index = min(mentions, key=lambda m: rank[m[1]])
+            start, end = self._times(lines[index])
+            if start is None:
+                for line in lines:
+                    start, end = self._times(line)
+                    if start:
+                        break
+            targets = [(moment, kind, start, end)]
+        else:
+            targets, seen = [], set()
+            for moment, kind, index in mentions:
+                if moment.date() in seen:
+                    continue
+                seen.add(moment.date())
+                start, end = self._times(lines[index])
+                targets.append((moment, kind, start, end))
+
+        events = []
+        for moment, kind, start, end in targets[:10]:
+            score = 0.35 + KIND_SCORES[kind]
+            if start:
+                score += 0.2
+            elif kind in ('relative', 'numeric'):
+                # "today" or "05/07" with no time of day is as often chatter as an announcement
+                score -= 0.15
+            if reports_past:
+                score -= 0.2
+            if has_event_word:
+                score += 0.15
+            if len(targets) > 1:
+                score -= 0.2
+            event = {
+                'title': title,
+                'start_date': moment.strftime('%Y-%m-%d'),
+                'description': text[:500],
+                'location': location,
+                'confidence_score': round(min(max(score, 0.1), 0.95), 2),
+            }
+            if start:
+                event['start_time'] = f"{start[0]:02d}:{start[1]:02d}"
+            if end:
+                event['end_time'] = f"{end[0]:02d}:{end[1]:02d}"
+            events.append(event)
+        return events
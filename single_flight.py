@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from metrics import REGISTRY
+
+COALESCED_CALLS = REGISTRY.counter(
+    'single_flight_coalesced_total', 'Calls that awaited an identical in-flight call instead of running', ['operation'])
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution.
+
+    The first caller starts the work as its own task; callers arriving while it
+    runs await the same task. Cancelling one caller never cancels the shared
+    work for the others. Nothing is cached after the task finishes.
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            COALESCED_CALLS.inc(operation=self.operation)
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
@@ -0,0 +1,170 @@
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from entity_cache import EntityCache
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillCheckpoints:
+    """How far each group's backfill got on one account, persisted after each committed batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading backfill checkpoints {path}: {e}")
+
+    def get(self, group: str, floor: str) -> Dict[str, Any]:
+        """Progress of a backfill down to `floor`; a backfill to another floor starts over."""
+        entry = self.entries.get(group)
+        if entry and entry['floor'] == floor:
+            return entry
+        return {'floor': floor, 'offset_id': 0, 'done': False}
+
+    def save(self, group: str, floor: str, offset_id: int, done: bool):
+        self.entries[group] = {'floor': floor, 'offset_id': offset_id, 'done': done,
+                               'updated_at': datetime.now(timezone.utc).isoformat()}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+async def backfill_group(sync, takeout, account, group: str, floor: datetime, checkpoints: BackfillCheckpoints,
+                         batch_size: int = 500, concurrency: int = 8, adaptive: bool = False) -> int:
+    """
+    Extract a group's history from `floor` forward, oldest message first.
+
+    Messages are fetched through the account's takeout session and extracted
+    `batch_size` at a time (`concurrency` at once). Events, processed message
+    IDs and the checkpoint are written after each batch. The backfill is done
+    when it reaches a message that was already processed (the part of the
+    history the normal scan covers) or the newest message. With `adaptive`
+    the distance back to `floor` is scaled by the group's scheduler depth.
+
+    Returns:
+        Number of events extracted
+    """
+    entry = await sync.resolve_group(group, account)
+    chat = EntityCache.input_peer(entry)
+    group_name = entry['title']
+    if adaptive:
+        now = datetime.now(timezone.utc)
+        floor = (now - (now - floor) * sync.scheduler.depth(group_name)).replace(
+            hour=0, minute=0, second=0, microsecond=0)
+    floor_key = floor.date().isoformat()
+    state = checkpoints.get(group, floor_key)
+    if state['done']:
+        logger.info(f"{group_name} is already backfilled to {floor_key}")
+        return 0
+    offset_id = state['offset_id']
+    if offset_id:
+        logger.info(f"Resuming backfill of {group_name} after message {offset_id}")
+    else:
+        # Newest message before the floor; the backfill starts right after it
+        older = await account.throttle.call('get_messages', takeout.get_messages, chat, limit=1, offset_date=floor)
+        offset_id = older[0].id if older else 0
+        logger.info(f"Backfilling {group_name} from {floor_key}")
+
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    batch: List[List[Any]] = []
+    album: List[Any] = []
+    total_events = 0
+    scanned = 0
+
+    async def handle(parts: List[Any]):
+        async with semaphore:
+            return await sync.process_message(parts[0], group_name, album=parts if len(parts) > 1 else None)
+
+    async def commit(done: bool = False):
+        nonlocal offset_id, total_events, scanned
+        results = await asyncio.gather(*(handle(parts) for parts in batch))
+        events = [event for result in results for event in result]
+        if events:
+            sync.save_events(events)
+        sync.save_processed_messages()
+        if batch:
+            offset_id = max(parts[-1].id for parts in batch)
+        checkpoints.save(group, floor_key, offset_id, done)
+        total_events += len(events)
+        scanned += len(batch)
+        batch.clear()
+        logger.info(f"Backfilled {scanned} messages from {group_name} up to message {offset_id}, "
+                    f"found {total_events} events so far")
+
+    # wait_time is the throttle's spacing (0 unless flood-limited), not Telethon's 1s for long histories
+    async for message in account.throttle.iter_messages(takeout, chat, offset_id=offset_id, reverse=True):
+        continues_album = album and message.grouped_id == album[0].grouped_id
+        if not continues_album and sync.is_processed(group_name, message.id):
+            logger.info(f"Backfill of {group_name} reached already processed message {message.id}")
+            break
+        if album and not continues_album:
+            batch.append(album)
+            album = []
+        if message.grouped_id:
+            album.append(message)
+        else:
+            batch.append([message])
+        if len(batch) >= batch_size:
+            await commit()
+    if album:
+        batch.append(album)
+    await commit(done=True)
+    logger.info(f"Finished backfilling {scanned} messages from {group_name}: {total_events} events")
+    return total_events
+
+
+async def backfill_account(sync, account, groups: List[str], floor: datetime, checkpoint_dir: str,
+                           batch_size: int = 500, concurrency: int = 8, adaptive: bool = False) -> int:
+    """Backfill an account's groups one after another inside a single takeout session."""
+    from telethon.errors import TakeoutInitDelayError
+    checkpoints = BackfillCheckpoints(os.path.join(checkpoint_dir, f"backfill_checkpoints_{account.name}.json"))
+    total_events = 0
+    try:
+        # Requests wrapped in a takeout session get far more lenient flood limits than normal history reads
+        async with account.client.takeout(finalize=True, chats=True, megagroups=True, channels=True,
+                                          files=True) as takeout:
+            for group in groups:
+                try:
+                    total_events += await backfill_group(sync, takeout, account, group, floor, checkpoints,
+                                                         batch_size, concurrency, adaptive)
+                except Exception as e:
+                    logger.error(f"Error backfilling group {group}: {e}")
+    except TakeoutInitDelayError as e:
+        logger.error(f"Telegram wants the data export for account {account.name} confirmed first: allow it in "
+                     f"the Telegram service chat of another session, or run --backfill again in {e.seconds}s")
+    return total_events
+
+
+async def backfill_history(sync, groups: List[str], floor: datetime, checkpoint_dir: str,
+                           batch_size: int = 500, concurrency: int = 8, adaptive: bool = False) -> int:
+    """
+    Backfill every configured group from `floor`, each on the account that owns it.
+
+    Accounts run concurrently, each in its own takeout session, and go
+    through their groups in scheduler priority order. The accounts must
+    already be logged in.
+
+    Returns:
+        Number of events extracted
+    """
+    sync.accounts.rebalance(groups)
+    sync.group_stats.load()
+    groups = sorted(groups, key=lambda g: -sync.scheduler.priority(sync.group_title(g)))
+    by_account: Dict[str, List[str]] = {}
+    for group in groups:
+        by_account.setdefault(sync.accounts.owner(group).name, []).append(group)
+    results = await asyncio.gather(*(
+        backfill_account(sync, sync.accounts.by_name[name], account_groups, floor, checkpoint_dir,
+                         batch_size, concurrency, adaptive)
+        for name, account_groups in by_account.items()))
+    return sum(results)
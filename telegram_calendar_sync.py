@@ -6,16 +6,42 @@ import aiohttp
 import tempfile
 import logging
 import re
+import queue
+import random
+import atexit
+import argparse
+import hashlib
+import shutil
+import socket
 import asyncio
+import contextvars
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass, asdict
-from telethon import TelegramClient, events
-from telethon.errors import SessionPasswordNeededError
+from typing import List, Dict, Optional, Any, Tuple
+from functools import lru_cache
+# Telethon and the Google API client are imported where first used, so the web server starts without them
 from telegram_login import TelegramLoginVerifier, extract_user_data
-# Google Calendar imports
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from metrics import REGISTRY
+from tracing import Tracer, SamplingProfiler
+from telegram_export_import import import_telegram_export
+from telegram_backfill import backfill_history
+from near_duplicates import NearDuplicateIndex, date_scope
+from event_dedupe import EventDedupeIndex
+from single_flight import SingleFlight
+from priority_limiter import PriorityLimiter
+from group_scheduler import GroupStats, AdaptiveScheduler, PREFILTER_OFF
+from entity_cache import EntityCache, ENTITY_LOOKUPS
+from telegram_shards import AccountPool, TelegramAccount
+from album_collector import AlbumCollector
+from event_snapshots import PartitionedSnapshot
+from calendar_event import CalendarEvent, EventColumns
+from event_archive import EventArchive
+from event_search import EventSearchIndex
+from work_queue import WorkQueue, Job
+from file_lock import FileLock
+from document_chunker import split_document
+from json_stream import JSONArrayStream
+from rule_extractor import RuleBasedExtractor
 from aiohttp import web
 
 # Reminder configuration from environment variables
@@ -32,11 +58,107 @@ TELEGRAM_GROUPS = os.getenv('TELEGRAM_GROUPS', '').split(',')  # Comma-separated
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')  # For GPT-based extraction
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY', '')  # Alternative to OpenAI
 GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')  # Alternative to OpenAI/Anthropic
-GROQ_MODEL = os.getenv('GROQ_MODEL', 'gemma2-9b-it')  # Allow model selection for Groq
+GROQ_MODEL = os.getenv('GROQ_MODEL', 'gemma2-9b-it')  # Allow model selection for Groq (fast tier)
+# Cascading model routing: messages go to the fast model first and are retried on the strong model
+# only when the answer is unusable or unsure. Set a *_STRONG_MODEL to empty to use one tier.
+OPENAI_FAST_MODEL = os.getenv('OPENAI_FAST_MODEL', 'gpt-4o-mini')
+OPENAI_STRONG_MODEL = os.getenv('OPENAI_STRONG_MODEL', 'gpt-4o')
+ANTHROPIC_FAST_MODEL = os.getenv('ANTHROPIC_FAST_MODEL', 'claude-3-haiku-20240307')
+ANTHROPIC_STRONG_MODEL = os.getenv('ANTHROPIC_STRONG_MODEL', 'claude-3-5-sonnet-20241022')
+GROQ_STRONG_MODEL = os.getenv('GROQ_STRONG_MODEL', 'llama-3.3-70b-versatile')
+LLM_ESCALATION_CONFIDENCE = float(os.getenv('LLM_ESCALATION_CONFIDENCE', '0.7'))  # Escalate if any event scores below this
+LLM_STRONG_MIN_OCR_CHARS = int(os.getenv('LLM_STRONG_MIN_OCR_CHARS', '4000'))  # PDF/OCR text this long starts on the strong tier
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))  # Provider calls allowed in flight at once
+LLM_CHUNK_CHARS = int(os.getenv('LLM_CHUNK_CHARS', '6000'))  # Longer texts are extracted in parallel windows
+LLM_CHUNK_OVERLAP_CHARS = int(os.getenv('LLM_CHUNK_OVERLAP_CHARS', '500'))  # Text repeated between adjacent windows
+ANTHROPIC_MAX_TOKENS = int(os.getenv('ANTHROPIC_MAX_TOKENS', '4096'))  # Output cap per Anthropic call
+LLM_STREAM_RESPONSES = os.getenv('LLM_STREAM_RESPONSES', 'true').lower() == 'true'  # Parse events as the reply streams in
+# Models that reject JSON mode (response_format json_object); they are only prompted for JSON
+LLM_NO_JSON_MODE_MODELS = set(filter(None, os.getenv('LLM_NO_JSON_MODE_MODELS', 'gpt-4,gpt-4-0314,gpt-4-0613,gpt-4-32k').split(',')))
+RULE_FAST_PATH_CONFIDENCE = float(os.getenv('RULE_FAST_PATH_CONFIDENCE', '0.85'))  # Rule matches this sure skip the LLM (>1 disables)
+RULE_FAST_PATH_MAX_CHARS = int(os.getenv('RULE_FAST_PATH_MAX_CHARS', '400'))  # Only short plain-text messages take the fast path
+RULE_DATE_DAYFIRST = os.getenv('RULE_DATE_DAYFIRST', 'true').lower() == 'true'  # Read 05/07 as 5 July
+LLM_RETRY_INTERVAL = int(os.getenv('LLM_RETRY_INTERVAL', '300'))  # Seconds before re-extracting a message that hit an LLM outage
+LLM_RETRY_MAX_AGE_HOURS = float(os.getenv('LLM_RETRY_MAX_AGE_HOURS', '24'))  # Then settle for the rule-based events
+# USD per 1M input/output tokens, used for the llm_cost_usd_total metric
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.0),
+    'gpt-4': (30.0, 60.0),
+    'claude-3-haiku-20240307': (0.25, 1.25),
+    'claude-3-5-sonnet-20241022': (3.0, 15.0),
+    'gemma2-9b-it': (0.20, 0.20),
+    'llama-3.3-70b-versatile': (0.59, 0.79),
+}
+MODEL_PRICES.update(json.loads(os.getenv('LLM_MODEL_PRICES', '{}')))  # e.g. {"my-model": [0.5, 1.5]}
+# API base URLs (override to point at a proxy or the local benchmark mock server)
+OPENAI_API_BASE = os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
+ANTHROPIC_API_BASE = os.getenv('ANTHROPIC_API_BASE', 'https://api.anthropic.com/v1')
+GROQ_API_BASE = os.getenv('GROQ_API_BASE', 'https://api.groq.com/openai/v1')
+TELEGRAM_BOT_API_BASE = os.getenv('TELEGRAM_BOT_API_BASE', 'https://api.telegram.org')
 CALENDAR_OUTPUT_PATH = os.getenv('CALENDAR_OUTPUT_PATH', '/app/data/events.json')
 PROCESSED_MESSAGES_PATH = os.getenv('PROCESSED_MESSAGES_PATH', '/app/data/processed_messages.json')
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')  # Default to DEBUG for more detailed logging
+# Binary copy of events.json that the service itself reads back (events.json is for the UI and other consumers)
+EVENTS_BINARY_PATH = os.getenv('EVENTS_BINARY_PATH', os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'events.bin'))
+# Per-month, pre-compressed copies of events.json served to the web UI
+EVENT_PARTITIONS_PATH = os.getenv('EVENT_PARTITIONS_PATH', os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'events'))
+# Message jobs passed from --role ingest to --role worker processes
+WORK_QUEUE_PATH = os.getenv('WORK_QUEUE_PATH', os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'work_queue.sqlite3'))
+# Attachments downloaded by the ingest role for the workers
+WORK_MEDIA_PATH = os.getenv('WORK_MEDIA_PATH', os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'media'))
+# Past events moved out of events.json by compaction, gzip-compressed per month
+EVENT_ARCHIVE_PATH = os.getenv('EVENT_ARCHIVE_PATH', os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'archive'))
+# Index behind /api/search and /api/events/overlapping, kept up to date by every process that writes events
+EVENT_SEARCH_INDEX_PATH = os.getenv('EVENT_SEARCH_INDEX_PATH', os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'events_search.sqlite3'))
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '200'))  # Largest page /api/search and /api/events/overlapping return
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')  # Set to DEBUG for detailed extraction logging
+LOG_FILE_PATH = os.getenv('LOG_FILE_PATH', '/app/data/telegram_calendar.log')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))  # Rotate log file after 10 MB
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))  # Rotated log files to keep
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv('ACCESS_LOG_SAMPLE_RATE', '0.1'))  # Fraction of successful requests to log
+ACCESS_LOG_SLOW_MS = float(os.getenv('ACCESS_LOG_SLOW_MS', '1000'))  # Requests slower than this are always logged
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))  # Fraction of messages traced (0 disables tracing)
+TRACE_OUTPUT_PATH = os.getenv('TRACE_OUTPUT_PATH', os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'traces.jsonl'))
+PROFILE_OUTPUT_PATH = os.getenv('PROFILE_OUTPUT_PATH', os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'profile.folded'))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))  # Seconds between profiler samples
 SCAN_LIMIT = int(os.getenv('SCAN_LIMIT', '100'))
+SCAN_CONCURRENCY = int(os.getenv('SCAN_CONCURRENCY', '2'))  # Groups scanned at once per account (they share its FloodWait budget)
+TELEGRAM_THROTTLE_MAX_DELAY = float(os.getenv('TELEGRAM_THROTTLE_MAX_DELAY', '10'))  # Max spacing between requests once flood-limited
+# FloodWaits of throttled requests shorter than this are slept through inside Telethon, invisible to the shared
+# throttle (0 = report all); connecting, logging in and reconnects keep Telethon's own threshold
+TELEGRAM_FLOOD_SLEEP_THRESHOLD = int(os.getenv('TELEGRAM_FLOOD_SLEEP_THRESHOLD', '0'))
+ALBUM_WAIT_SECONDS = float(os.getenv('ALBUM_WAIT_SECONDS', '1.5'))  # Quiet time before a live album is extracted as one message
+ENTITY_CACHE_TTL_HOURS = float(os.getenv('ENTITY_CACHE_TTL_HOURS', '24'))  # Re-resolve cached groups in the background after this
+# More Telegram accounts to spread the groups over, as a JSON list, e.g.
+# [{"name": "second", "phone": "+15550001", "code": "12345", "password": ""}]
+# (optional per account: session_path, api_id, api_hash; the TELEGRAM_* account is "default")
+TELEGRAM_ACCOUNTS = json.loads(os.getenv('TELEGRAM_ACCOUNTS', '[]'))
+SHARD_MAX_FLOOD_WAIT = float(os.getenv('SHARD_MAX_FLOOD_WAIT', '60'))  # A longer FloodWait moves the account's groups to another one
+SHARD_CHECK_INTERVAL = float(os.getenv('SHARD_CHECK_INTERVAL', '30'))  # Seconds between account health checks
+EVENT_RETENTION_DAYS = int(os.getenv('EVENT_RETENTION_DAYS', '30'))  # Events that ended longer ago are archived (0 = keep all)
+PROCESSED_RETENTION_PER_GROUP = int(os.getenv('PROCESSED_RETENTION_PER_GROUP', '5000'))  # Newest processed message IDs kept per group (0 = keep all)
+COMPACTION_INTERVAL_HOURS = float(os.getenv('COMPACTION_INTERVAL_HOURS', '24'))
+# Per-group scan depth, LLM priority and pre-filter from each group's event yield (see "Adaptive scheduling" in the README)
+ADAPTIVE_SCHEDULING = os.getenv('ADAPTIVE_SCHEDULING', 'true').lower() == 'true'
+ADAPTIVE_MIN_MESSAGES = int(os.getenv('ADAPTIVE_MIN_MESSAGES', '200'))  # History a group needs before it is pre-filtered
+ADAPTIVE_MAX_DEPTH = float(os.getenv('ADAPTIVE_MAX_DEPTH', '4'))  # Scan/backfill depth range, as a multiple of the default
+ADAPTIVE_MIN_DEPTH = float(os.getenv('ADAPTIVE_MIN_DEPTH', '0.25'))
+PREFILTER_LOOSE_BELOW = float(os.getenv('PREFILTER_LOOSE_BELOW', '0.02'))  # Yields (events per message) that get the loose pre-filter
+PREFILTER_STRICT_BELOW = float(os.getenv('PREFILTER_STRICT_BELOW', '0.005'))  # ... and the strict one
+WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', '4'))  # Jobs one --role worker process runs at once
+WORKER_POLL_INTERVAL = float(os.getenv('WORKER_POLL_INTERVAL', '1'))  # Seconds an idle worker waits before looking again
+WORK_LEASE_SECONDS = float(os.getenv('WORK_LEASE_SECONDS', '120'))  # A job whose worker stops renewing its lease this long runs again
+WORK_MAX_ATTEMPTS = int(os.getenv('WORK_MAX_ATTEMPTS', '5'))  # Failures (LLM outages aside) before a job is parked as failed
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '200'))  # Messages per committed batch in --import-export
+BACKFILL_DAYS = int(os.getenv('BACKFILL_DAYS', '365'))  # How far back --backfill goes unless --backfill-since is given
+BACKFILL_BATCH_SIZE = int(os.getenv('BACKFILL_BATCH_SIZE', '500'))  # Messages per committed batch in --backfill
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', '8'))  # Messages extracted at once in --backfill
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv('NEAR_DUPLICATE_MAX_DISTANCE', '4'))  # SimHash bits that may differ (0 = exact reposts only)
+NEAR_DUPLICATE_TTL_HOURS = float(os.getenv('NEAR_DUPLICATE_TTL_HOURS', '72'))  # How long a message can be matched
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv('NEAR_DUPLICATE_MAX_ENTRIES', '10000'))
+EVENT_DEDUPE_DATE_TOLERANCE_DAYS = int(os.getenv('EVENT_DEDUPE_DATE_TOLERANCE_DAYS', '1'))
+EVENT_DEDUPE_TIME_TOLERANCE_HOURS = float(os.getenv('EVENT_DEDUPE_TIME_TOLERANCE_HOURS', '2'))
+EVENT_DEDUPE_TITLE_THRESHOLD = float(os.getenv('EVENT_DEDUPE_TITLE_THRESHOLD', '0.6'))  # Title token Jaccard similarity
 SESSION_PATH = os.getenv('SESSION_PATH', '/app/data/telegram_session')
 TELEGRAM_CODE = os.getenv('TELEGRAM_CODE', '')  # For verification code
 TELEGRAM_2FA_PASSWORD = os.getenv('TELEGRAM_2FA_PASSWORD', '')  # For 2FA
@@ -53,335 +175,541 @@ TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
 # Subscribed chat IDs file
 SUBSCRIBED_CHAT_IDS_FILE = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'subscribed_chat_ids.json')
 
+# Messages waiting for LLM re-extraction after an outage
+LLM_RETRY_QUEUE_FILE = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'llm_retry_queue.json')
+
+# Held while events.json and dismissed_events.json are read and rewritten, by every process
+EVENTS_LOCK_FILE = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'events.lock')
+
+# Reminders already sent, as "<title>_<start date>"
+SENT_REMINDERS_FILE = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'sent_reminders.json')
+
+# Content hash of each processed message, so edits that do not change the text are ignored
+MESSAGE_HASHES_FILE = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'message_hashes.json')
+
+# Lowest and highest message ID pruned from the processed IDs per group; the range still counts as processed
+PROCESSED_PRUNED_FILE = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'processed_pruned.json')
+
+# Resolved group peers, so startup does not re-resolve every group
+ENTITY_CACHE_FILE = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'entity_cache.json')
+
+# Messages, LLM calls, events and confidence per group, for the adaptive scheduler
+GROUP_STATS_FILE = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'group_stats.json')
+
+# Newest message ID scanned per group, so a restart only fetches what is new
+SCAN_CHECKPOINTS_FILE = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'scan_checkpoints.json')
+
 # Setup logging
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL.upper()),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('/app/data/telegram_calendar.log') if os.path.exists('/app/data') else logging.StreamHandler()
-    ]
-)
+def setup_logging() -> QueueListener:
+    """Send log records through a queue so console and file I/O happen off the event loop."""
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [logging.StreamHandler()]
+    if os.path.isdir(os.path.dirname(LOG_FILE_PATH)):
+        handlers.append(RotatingFileHandler(
+            LOG_FILE_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, LOG_LEVEL.upper()))
+    root.handlers = [QueueHandler(log_queue)]
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+log_listener = setup_logging()
 logger = logging.getLogger(__name__)
-
-@dataclass
-class CalendarEvent:
-    title: str
-    start_date: datetime
-    end_date: Optional[datetime] = None
-    description: str = ""
-    location: str = ""
-    source_group: str = ""
-    source_message_id: int = 0
-    confidence_score: float = 0.0
-    
-    source_type: str = "text"  # "text", "pdf", "image"
-    telegram_link: str = ""
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            **asdict(self),
-            'start_date': self.start_date.isoformat() if isinstance(self.start_date, datetime) else None,
-            'end_date': self.end_date.isoformat() if isinstance(self.end_date, datetime) else None,
-            'timestamp': int(self.start_date.timestamp()) if isinstance(self.start_date, datetime) else None
+access_logger = logging.getLogger('access')
+tracer = Tracer(TRACE_OUTPUT_PATH, TRACE_SAMPLE_RATE)
+# Group whose message is being extracted, so provider calls are prioritised and counted for it
+extraction_group: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('extraction_group', default=None)
+
+# Ingestion metrics, served in Prometheus text format at /api/metrics
+TELEGRAM_FETCH_SECONDS = REGISTRY.histogram(
+    'telegram_fetch_seconds', 'Time waiting on Telegram for entities and messages', ['operation'])
+MESSAGES_FETCHED = REGISTRY.counter('telegram_messages_fetched_total', 'Messages received from Telegram', ['source'])
+MEDIA_DOWNLOAD_SECONDS = REGISTRY.histogram('media_download_seconds', 'Time downloading message media')
+MEDIA_EXTRACT_SECONDS = REGISTRY.histogram(
+    'media_extract_seconds', 'Time extracting text from PDFs (PyMuPDF) and images (OCR)', ['type'])
+LLM_REQUEST_SECONDS = REGISTRY.histogram('llm_request_seconds', 'LLM provider call latency', ['provider', 'tier'])
+LLM_REQUESTS = REGISTRY.counter('llm_requests_total', 'LLM provider calls by outcome', ['provider', 'tier', 'status'])
+LLM_TOKENS = REGISTRY.counter(
+    'llm_tokens_total', 'LLM tokens reported by the provider', ['provider', 'tier', 'direction'])
+LLM_TOKENS_PER_CALL = REGISTRY.histogram(
+    'llm_tokens_per_call', 'Tokens reported for each LLM provider call', ['provider', 'tier', 'direction'],
+    buckets=(50, 100, 200, 400, 800, 1600, 3200, 6400, 12800))
+LLM_COST = REGISTRY.counter('llm_cost_usd_total', 'Estimated LLM spend from reported tokens', ['provider', 'tier'])
+LLM_ESCALATIONS = REGISTRY.counter(
+    'llm_escalations_total', 'Extractions routed to the strong model tier', ['provider', 'reason'])
+LLM_IN_FLIGHT = REGISTRY.gauge('llm_requests_in_flight', 'LLM provider calls currently waiting for a response')
+RULE_EXTRACTIONS = REGISTRY.counter(
+    'rule_extractions_total', 'Extractions answered by the rule-based extractor', ['outcome'])
+LLM_RETRIES = REGISTRY.counter('llm_retries_total', 'Messages queued for or resolved by LLM re-extraction', ['outcome'])
+EVENTS_EXTRACTED = REGISTRY.counter('events_extracted_total', 'Events accepted from extraction', ['source_type'])
+EVENT_DEDUPE_HITS = REGISTRY.counter('event_dedupe_hits_total', 'Extracted events dropped as already stored')
+EVENT_FUZZY_MERGES = REGISTRY.counter(
+    'event_fuzzy_merges_total', 'New events merged into an existing event from another message or group')
+NEAR_DUPLICATE_HITS = REGISTRY.counter(
+    'near_duplicate_hits_total', 'Messages whose extraction was reused from a near-duplicate message')
+SAVE_EVENTS_SECONDS = REGISTRY.histogram('save_events_seconds', 'Time spent in save_events including the file rewrite')
+EVENT_SEARCH_SECONDS = REGISTRY.histogram('event_search_seconds', 'Full-text event search latency')
+EVENT_OVERLAP_SECONDS = REGISTRY.histogram('event_overlap_query_seconds', 'Overlapping events query latency')
+GCAL_PUSH_SECONDS = REGISTRY.histogram('gcal_push_seconds', 'Google Calendar insert latency')
+GCAL_PUSHES = REGISTRY.counter('gcal_pushes_total', 'Google Calendar inserts by outcome', ['status'])
+REMINDERS_SENT = REGISTRY.counter('reminders_sent_total', 'Telegram reminder messages by outcome', ['status'])
+MESSAGE_EDITS = REGISTRY.counter('telegram_message_edits_total', 'Edited messages by outcome', ['outcome'])
+ALBUM_PARTS = REGISTRY.histogram(
+    'album_parts', 'Messages combined into one extraction per album', buckets=(2, 3, 4, 6, 8, 10))
+COMPACTION_PRUNED = REGISTRY.counter('compaction_pruned_total', 'Entries removed by compaction', ['kind'])
+MESSAGES_IN_FLIGHT = REGISTRY.gauge('messages_in_flight', 'Messages currently inside process_message')
+MESSAGE_TO_EVENT_LAG_SECONDS = REGISTRY.histogram(
+    'message_to_event_lag_seconds', 'Delay from message.date to its events being persisted',
+    buckets=(1, 5, 15, 30, 60, 300, 900, 3600, 6 * 3600, 86400, 7 * 86400))
+REGISTRY.gauge('log_queue_depth', 'Log records waiting for the log writer thread',
+               func=lambda: log_listener.queue.qsize())
+# Read from the running TelegramCalendarSync / WorkQueue, which set their callbacks
+TELEGRAM_ACCOUNTS_AVAILABLE = REGISTRY.gauge(
+    'telegram_accounts_available', 'Telegram accounts connected and not flood-limited')
+LLM_RETRY_QUEUE_SIZE = REGISTRY.gauge('llm_retry_queue_size', 'Messages waiting for LLM re-extraction')
+NEAR_DUPLICATE_INDEX_SIZE = REGISTRY.gauge('near_duplicate_index_size', 'Messages in the near-duplicate index')
+WORK_QUEUE_SIZE = REGISTRY.gauge('work_queue_size', 'Jobs waiting for or held by an extraction worker')
+
+
+def observe_event_lag(message):
+    """Record end-to-end lag for a message whose events were just persisted."""
+    message_date = getattr(message, 'date', None)
+    if message_date:
+        lag = datetime.now(timezone.utc) - message_date.replace(tzinfo=timezone.utc)
+        MESSAGE_TO_EVENT_LAG_SECONDS.observe(max(lag.total_seconds(), 0))
+
+
+class LazyJSON:
+    """Defer json.dumps of a debug payload until a handler actually formats the record."""
+
+    def __init__(self, data: Any):
+        self.data = data
+
+    def __str__(self) -> str:
+        return json.dumps(self.data, indent=2, default=str)
+
+
+@web.middleware
+async def access_log_middleware(request, handler):
+    """Emit one structured line per request, sampling successful fast requests."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    except Exception:
+        # Logged here with its traceback; aiohttp only sees the 500
+        logger.error(f"Error handling {request.method} {request.path}", exc_info=True)
+        raise web.HTTPInternalServerError()
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        if status >= 400 or duration_ms >= ACCESS_LOG_SLOW_MS or random.random() < ACCESS_LOG_SAMPLE_RATE:
+            access_logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': status,
+                'duration_ms': round(duration_ms, 2),
+                'remote': request.remote,
+                'forwarded_for': request.headers.get('X-Forwarded-For'),
+            }))
+
+
+@web.middleware
+async def cors_middleware(request, handler):
+    # Handle CORS preflight OPTIONS request
+    if request.method == "OPTIONS":
+        headers = {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Requested-With',
+            'Access-Control-Max-Age': '86400'
         }
-    
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'CalendarEvent':
-        # Remove unknown fields (like 'timestamp')
-        data = dict(data)  # Make a copy so we don't mutate the original
-        data.pop('timestamp', None)
-        data['start_date'] = datetime.fromisoformat(data['start_date'])
-        if data.get('end_date'):
-            data['end_date'] = datetime.fromisoformat(data['end_date'])
-        return cls(**data)
+        return web.Response(headers=headers)
+
+    # Process regular request
+    response = await handler(request)
+    # Add CORS headers to every response
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With'
+    return response
+
+PROVIDER_NAMES = {'openai': 'OpenAI', 'groq': 'Groq', 'anthropic': 'Anthropic'}
+SYSTEM_PROMPT = 'You extract calendar events from text. Reply with JSON only.'
+# Built once; only the dates and the text change per call. Short keys and omitted
+# fields keep the prompt and, above all, the generated output small.
+EXTRACTION_PROMPT = """Today is {today}; tomorrow is {tomorrow}. Extract every event, meeting or deadline from the text.
+Reply {{"events":[...]}} with one object per event:
+{{"t":title,"d":"YYYY-MM-DD","s":"HH:MM","ed":"YYYY-MM-DD","e":"HH:MM","loc":location,"desc":details,"c":confidence 0-1}}
+Omit unknown fields, never null. Resolve relative dates from today; without a year use today's year.
+24-hour times. Same-day ranges use "s" and "e" only. One object per occurrence of recurring events.
+No events: {{"events":[]}}
+
+Text:
+{text}"""
+ANTHROPIC_PREFILL = '{"events":['
+COMPACT_KEYS = {
+    't': 'title', 'd': 'start_date', 's': 'start_time', 'ed': 'end_date', 'e': 'end_time',
+    'loc': 'location', 'desc': 'description', 'c': 'confidence_score',
+}
+
+
+@lru_cache(maxsize=32)
+def _tomorrow(current_date: str) -> str:
+    return (datetime.fromisoformat(current_date) + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def build_extraction_prompt(text: str, current_date: str) -> str:
+    return EXTRACTION_PROMPT.format(today=current_date, tomorrow=_tomorrow(current_date), text=text)
+
+
+def parse_query_time(value: Optional[str], end_of_day: bool = False) -> Optional[int]:
+    """Epoch seconds for a YYYY-MM-DD or ISO 8601 query parameter (UTC unless it says otherwise)."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if end_of_day and len(value) == 10:
+        # A bare date as the end of a range includes that whole day
+        parsed += timedelta(days=1, seconds=-1)
+    return int(parsed.timestamp())
+
+
+def expand_event(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Map the compact keys of a model reply back to CalendarEvent field names"""
+    return {COMPACT_KEYS.get(key, key): value for key, value in item.items()}
+
+
+class ExtractionUnavailable(Exception):
+    """Every LLM provider call for a text failed; carries the rule-based events as a fallback"""
+
+    def __init__(self, fallback_events: Optional[List['CalendarEvent']] = None):
+        super().__init__('LLM extraction unavailable')
+        self.fallback_events = fallback_events or []
+
 
 class LLMEventExtractor:
     """Extract calendar events using LLM (OpenAI GPT, Anthropic Claude, or Groq)"""
     
-    def __init__(self):
+    def __init__(self, scheduler: Optional[AdaptiveScheduler] = None):
         self.openai_key = OPENAI_API_KEY
         self.anthropic_key = ANTHROPIC_API_KEY
         self.groq_key = GROQ_API_KEY
         self.groq_model = GROQ_MODEL
-        
-    async def extract_events_openai(self, text: str, current_date: str) -> List[Dict[str, Any]]:
-        """Extract events using OpenAI GPT"""
-        if not self.openai_key:
-            return []
-            
-        prompt = f"""
-Today's date: {current_date}
-
-Analyze the following text and extract any calendar events, meetings, deadlines, or important dates.
-Return a JSON array of events with this exact structure:
-
-[
-  {{
-    "title": "Event name or description",
-    "start_date": "YYYY-MM-DD",
-    "start_time": "HH:MM" (if mentioned, otherwise null),
-    "end_date": "YYYY-MM-DD" (if different from start_date, otherwise null),
-    "end_time": "HH:MM" (if mentioned, otherwise null),
-    "description": "Additional details about the event",
-    "location": "Location if mentioned",
-    "confidence_score": 0.95 (float between 0 and 1)
-  }}
-]
-
-IMPORTANT DATE HANDLING:
-1. For explicit dates like "June 27, 2025":
-   - Use the exact date as specified
-   - Convert to YYYY-MM-DD format (e.g., "2025-06-27")
-   - Include all time information if provided
-
-2. For relative dates (e.g., "tomorrow", "next week"):
-   - Convert to absolute dates based on today ({current_date})
-   - For "tomorrow" => use {(datetime.fromisoformat(current_date) + timedelta(days=1)).strftime('%Y-%m-%d')}
-
-3. For same-day time ranges (e.g., "8:30 AM to 4:00 PM"):
-   - Use the same date for start and end
-   - Convert times to 24-hour format (e.g., "08:30" to "16:00")
-
-4. For recurring patterns:
-   - Extract each occurrence as a separate event
-   - Use specific dates, not patterns
-
-- If year is not mentioned, assume current year (2025)
-- Always use YYYY-MM-DD format for dates
-- Always use HH:MM format for times (24-hour)
-
-Text to analyze:
-{text}
-
-Important:
-- If year is not mentioned, assume current year (2025)
-- Extract ALL dates and events mentioned
-- Include recurring events if mentioned
-- Be precise with date formats (YYYY-MM-DD)
-- Use 24-hour time format (HH:MM)
-- Return empty array [] if no events found
-"""
-
+        self.models = {
+            'openai': {'fast': OPENAI_FAST_MODEL, 'strong': OPENAI_STRONG_MODEL},
+            'groq': {'fast': self.groq_model or 'mixtral-8x7b-32768', 'strong': GROQ_STRONG_MODEL},
+            'anthropic': {'fast': ANTHROPIC_FAST_MODEL, 'strong': ANTHROPIC_STRONG_MODEL},
+        }
+        # Cross-posted messages arrive almost together; identical texts share one provider call
+        self.in_flight = SingleFlight('llm_extract')
+        # Shared by every caller, including the windows of one chunked document; high-yield groups go first
+        self.limiter = PriorityLimiter(LLM_MAX_CONCURRENCY)
+        self.rules = RuleBasedExtractor(dayfirst=RULE_DATE_DAYFIRST)
+        self.scheduler = scheduler
+
+    @staticmethod
+    def _record_usage(provider: str, tier: str, model: str, usage: Optional[Dict[str, Any]],
+                      input_key: str, output_key: str):
+        """Count the tokens a provider reported for one call and their estimated cost."""
+        if not usage:
+            return
+        tokens_in, tokens_out = usage.get(input_key, 0), usage.get(output_key, 0)
+        LLM_TOKENS.inc(tokens_in, provider=provider, tier=tier, direction='in')
+        LLM_TOKENS.inc(tokens_out, provider=provider, tier=tier, direction='out')
+        LLM_TOKENS_PER_CALL.observe(tokens_in, provider=provider, tier=tier, direction='in')
+        LLM_TOKENS_PER_CALL.observe(tokens_out, provider=provider, tier=tier, direction='out')
+        price_in, price_out = MODEL_PRICES.get(model, (0, 0))
+        LLM_COST.inc((tokens_in * price_in + tokens_out * price_out) / 1_000_000, provider=provider, tier=tier)
+        span = tracer.current_span()
+        if span is not None:
+            span.set_attribute('model', model)
+            span.set_attribute('tokens_in', tokens_in)
+            span.set_attribute('tokens_out', tokens_out)
+        logger.debug(f"{provider} {model}: {tokens_in} tokens in, {tokens_out} tokens out")
+
+    @staticmethod
+    def _parse_response(provider: str, tier: str, parser: JSONArrayStream) -> Optional[List[Dict[str, Any]]]:
+        """Expand the events collected from a reply. Returns None if it held no usable JSON array."""
+        if not parser.started or (not parser.closed and not parser.items):
+            LLM_REQUESTS.inc(provider=provider, tier=tier, status='unparseable')
+            logger.error(f"Failed to parse {provider} response as a JSON array")
+            return None
+        if parser.closed:
+            LLM_REQUESTS.inc(provider=provider, tier=tier, status='ok')
+        else:
+            # Output limit hit mid-array: keep the events that were complete
+            LLM_REQUESTS.inc(provider=provider, tier=tier, status='truncated')
+            logger.warning(f"{provider} response was cut off, keeping {len(parser.items)} complete events")
+        return [expand_event(item) for item in parser.items if isinstance(item, dict)]
+
+    @staticmethod
+    async def _sse_data(response: aiohttp.ClientResponse):
+        """Yield the JSON payloads of a server-sent event stream"""
+        async for line in response.content:
+            line = line.decode('utf-8').strip()
+            if not line.startswith('data:'):
+                continue
+            data = line[5:].strip()
+            if data == '[DONE]':
+                break
+            yield json.loads(data)
+
+    async def _chat_completions(self, provider: str, api_base: str, api_key: str, text: str,
+                                current_date: str, tier: str) -> Optional[List[Dict[str, Any]]]:
+        """Call an OpenAI-compatible chat completions API (OpenAI, Groq), in JSON mode where the request allows it"""
+        name = PROVIDER_NAMES[provider]
+        model = self.models[provider][tier]
+        body = {
+            'model': model,
+            'messages': [
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': build_extraction_prompt(text, current_date)}
+            ],
+            'temperature': 0.1,
+        }
+        # Groq's JSON mode cannot stream; a streamed reply is parsed as it arrives without it
+        if model not in LLM_NO_JSON_MODE_MODELS and not (provider == 'groq' and LLM_STREAM_RESPONSES):
+            body['response_format'] = {'type': 'json_object'}
+        if LLM_STREAM_RESPONSES:
+            body['stream'] = True
+            if provider == 'openai':
+                body['stream_options'] = {'include_usage': True}
+        parser = JSONArrayStream()
+        usage = None
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.post(
-                    'https://api.openai.com/v1/chat/completions',
+                    f'{api_base}/chat/completions',
                     headers={
-                        'Authorization': f'Bearer {self.openai_key}',
+                        'Authorization': f'Bearer {api_key}',
                         'Content-Type': 'application/json'
                     },
-                    json={
-                        'model': 'gpt-4',  # Using correct model name
-                        'messages': [
-                            {'role': 'system', 'content': 'You are an expert at extracting calendar events from text. Always return valid JSON.'},
-                            {'role': 'user', 'content': prompt}
-                        ],
-                        'temperature': 0.1
-                    }
+                    json=body
                 ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result['choices'][0]['message']['content'].strip()
-                        
-                        try:
-                            # First try to parse the content directly as JSON
-                            return json.loads(content)
-                        except json.JSONDecodeError:
-                            # If direct parsing fails, try to extract JSON from markdown
-                            if '```json' in content:
-                                content = content.split('```json')[1].split('```')[0].strip()
-                            elif '```' in content:
-                                content = content.split('```')[1].split('```')[0].strip()
-                            return json.loads(content)
+                    if response.status != 200:
+                        LLM_REQUESTS.inc(provider=provider, tier=tier, status='http_error')
+                        logger.error(f"{name} API error: {response.status}")
+                        return None
+                    if LLM_STREAM_RESPONSES:
+                        async for chunk in self._sse_data(response):
+                            for choice in chunk.get('choices') or []:
+                                parser.feed((choice.get('delta') or {}).get('content') or '')
+                            # OpenAI sends usage in a final chunk, Groq under x_groq
+                            usage = chunk.get('usage') or (chunk.get('x_groq') or {}).get('usage') or usage
                     else:
-                        logger.error(f"OpenAI API error: {response.status}")
-                        return []
+                        result = await response.json()
+                        usage = result.get('usage')
+                        parser.feed(result['choices'][0]['message']['content'] or '')
         except Exception as e:
-            logger.error(f"Error calling OpenAI API: {e}")
+            LLM_REQUESTS.inc(provider=provider, tier=tier, status='exception')
+            logger.error(f"Error calling {name} API: {e}")
+            return None
+        self._record_usage(provider, tier, model, usage, 'prompt_tokens', 'completion_tokens')
+        return self._parse_response(provider, tier, parser)
+
+    async def extract_events_openai(self, text: str, current_date: str, tier: str = 'fast') -> Optional[List[Dict[str, Any]]]:
+        """Extract events using OpenAI GPT. Returns None if the call failed or the reply was unparseable."""
+        if not self.openai_key:
             return []
+        return await self._chat_completions('openai', OPENAI_API_BASE, self.openai_key, text, current_date, tier)
 
-    async def extract_events_anthropic(self, text: str, current_date: str) -> List[Dict[str, Any]]:
-        """Extract events using Anthropic Claude"""
-        if not self.anthropic_key:
+    async def extract_events_groq(self, text: str, current_date: str, tier: str = 'fast') -> Optional[List[Dict[str, Any]]]:
+        """Extract events using Groq LLM with model selection. Returns None if the call failed or the reply was unparseable."""
+        if not self.groq_key:
             return []
-            
-        prompt = f"""Today's date: {current_date}
-
-Analyze this text and extract calendar events. Return only a JSON array with this structure:
-
-[
-  {{
-    "title": "Event name",
-    "start_date": "YYYY-MM-DD",
-    "start_time": "HH:MM",
-    "end_date": "YYYY-MM-DD",
-    "end_time": "HH:MM",
-    "description": "Details",
-    "location": "Location",
-    "confidence_score": 0.95
-  }}
-]
-
-IMPORTANT DATE HANDLING:
-- For relative dates like "tomorrow", "next week", etc., convert them to absolute dates based on today's date ({current_date})
-- For "tomorrow" => use {(datetime.fromisoformat(current_date) + timedelta(days=1)).strftime('%Y-%m-%d')}
-- Always convert relative dates to absolute dates before returning
-- Use YYYY-MM-DD format for all dates
-
-Text: {text}"""
+        return await self._chat_completions('groq', GROQ_API_BASE, self.groq_key, text, current_date, tier)
 
+    async def extract_events_anthropic(self, text: str, current_date: str, tier: str = 'fast') -> Optional[List[Dict[str, Any]]]:
+        """Extract events using Anthropic Claude. Returns None if the call failed or the reply was unparseable."""
+        if not self.anthropic_key:
+            return []
+        model = self.models['anthropic'][tier]
+        body = {
+            'model': model,
+            'max_tokens': ANTHROPIC_MAX_TOKENS,
+            'system': SYSTEM_PROMPT,
+            'messages': [
+                {'role': 'user', 'content': build_extraction_prompt(text, current_date)},
+                # Anthropic has no JSON mode; starting the reply pins the output format instead
+                {'role': 'assistant', 'content': ANTHROPIC_PREFILL}
+            ],
+        }
+        if LLM_STREAM_RESPONSES:
+            body['stream'] = True
+        parser = JSONArrayStream()
+        parser.feed(ANTHROPIC_PREFILL)
+        usage = {}
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.post(
-                    'https://api.anthropic.com/v1/messages',
+                    f'{ANTHROPIC_API_BASE}/messages',
                     headers={
                         'x-api-key': self.anthropic_key,
                         'Content-Type': 'application/json',
                         'anthropic-version': '2023-06-01'
                     },
-                    json={
-                        'model': 'claude-3-haiku-20240307',
-                        'max_tokens': 1000,
-                        'messages': [{'role': 'user', 'content': prompt}]
-                    }
+                    json=body
                 ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result.get('content', [{}])[0].get('text', '').strip()
-                        
-                        try:
-                            # First try to parse the content directly as JSON
-                            return json.loads(content)
-                        except json.JSONDecodeError:
-                            # If direct parsing fails, try to extract JSON from markdown
-                            if '```json' in content:
-                                content = content.split('```json')[1].split('```')[0].strip()
-                            elif '```' in content:
-                                content = content.split('```')[1].split('```')[0].strip()
-                            
-                            try:
-                                return json.loads(content)
-                            except json.JSONDecodeError:
-                                logger.error(f"Failed to parse Anthropic response as JSON: {content}")
-                                return []
-                    else:
+                    if response.status != 200:
+                        LLM_REQUESTS.inc(provider='anthropic', tier=tier, status='http_error')
                         logger.error(f"Anthropic API error: {response.status}")
-                        return []
-        except Exception as e:
-            logger.error(f"Error calling Anthropic API: {e}")
-            return []
-
-    async def extract_events_groq(self, text: str, current_date: str) -> List[Dict[str, Any]]:
-        """Extract events using Groq LLM with model selection"""
-        if not self.groq_key:
-            return []
-        model = self.groq_model or 'mixtral-8x7b-32768'
-        logger.debug(f"Using Groq model: {model}")
-        prompt = f"""
-Today's date: {current_date}
-
-Analyze the following text and extract any calendar events, meetings, deadlines, or important dates.
-Return a JSON array of events with this exact structure:
-
-[
-  {{
-    "title": "Event name or description",
-    "start_date": "YYYY-MM-DD",
-    "start_time": "HH:MM" (if mentioned, otherwise null),
-    "end_date": "YYYY-MM-DD" (if different from start_date, otherwise null),
-    "end_time": "HH:MM" (if mentioned, otherwise null),
-    "description": "Additional details about the event",
-    "location": "Location if mentioned",
-    "confidence_score": 0.95 (float between 0 and 1)
-  }}
-]
-
-IMPORTANT DATE HANDLING:
-1. For explicit dates like "June 27, 2025":
-   - Use the exact date as specified
-   - Convert to YYYY-MM-DD format (e.g., "2025-06-27")
-   - Include all time information if provided
-
-2. For relative dates (e.g., "tomorrow", "next week"):
-   - Convert to absolute dates based on today ({current_date})
-   - For "tomorrow" => use {(datetime.fromisoformat(current_date) + timedelta(days=1)).strftime('%Y-%m-%d')}
-
-3. For same-day time ranges (e.g., "8:30 AM to 4:00 PM"):
-   - Use the same date for start and end
-   - Convert times to 24-hour format (e.g., "08:30" to "16:00")
-
-Text to analyze:
-{text}"""
-
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    'https://api.groq.com/openai/v1/chat/completions',
-                    headers={
-                        'Authorization': f'Bearer {self.groq_key}',
-                        'Content-Type': 'application/json'
-                    },
-                    json={
-                        'model': model,
-                        'messages': [
-                            {'role': 'system', 'content': 'You are an expert at extracting calendar events from text. Always return valid JSON.'},
-                            {'role': 'user', 'content': prompt}
-                        ],
-                        'temperature': 0.1
-                    }
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result['choices'][0]['message']['content'].strip()
-                        try:
-                            # First try to parse the content directly as JSON
-                            return json.loads(content)
-                        except json.JSONDecodeError:
-                            # If direct parsing fails, try to extract JSON from markdown
-                            if '```json' in content:
-                                content = content.split('```json')[1].split('```')[0].strip()
-                            elif '```' in content:
-                                content = content.split('```')[1].split('```')[0].strip()
-                            return json.loads(content)
+                        return None
+                    if LLM_STREAM_RESPONSES:
+                        async for event in self._sse_data(response):
+                            if event.get('type') == 'content_block_delta':
+                                parser.feed(event['delta'].get('text', ''))
+                            elif event.get('type') == 'message_start':
+                                usage.update(event['message'].get('usage') or {})
+                            elif event.get('type') == 'message_delta':
+                                usage.update(event.get('usage') or {})
                     else:
-                        logger.error(f"Groq API error: {response.status}")
-                        return []
+                        result = await response.json()
+                        usage = result.get('usage') or {}
+                        parser.feed(result.get('content', [{}])[0].get('text', ''))
         except Exception as e:
-            logger.error(f"Error calling Groq API: {e}")
-            return []
+            LLM_REQUESTS.inc(provider='anthropic', tier=tier, status='exception')
+            logger.error(f"Error calling Anthropic API: {e}")
+            return None
+        self._record_usage('anthropic', tier, model, usage, 'input_tokens', 'output_tokens')
+        return self._parse_response('anthropic', tier, parser)
 
-    async def extract_events(self, text: str, reference_date: str = None) -> List[CalendarEvent]:
-        """Extract events using available LLM provider"""
+    async def extract_events(self, text: str, reference_date: str = None, source_type: str = 'text') -> List[CalendarEvent]:
+        """Extract events, sharing one provider call between concurrent requests for the same text and date"""
         # Use provided reference date or UTC timezone for consistency
         current_date = reference_date or datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        windows = split_document(text, LLM_CHUNK_CHARS, LLM_CHUNK_OVERLAP_CHARS)
+        try:
+            if len(windows) == 1:
+                events = await self._extract_shared(text, current_date, source_type)
+            else:
+                logger.info(f"Extracting {len(text)} chars of {source_type} in {len(windows)} windows")
+                results = await asyncio.gather(
+                    *(self._extract_shared(window, current_date, source_type) for window in windows))
+                events = self.merge_window_events(results)
+        except ExtractionUnavailable:
+            raise ExtractionUnavailable(self.events_from_data(self.rules.extract(text, current_date))) from None
+        # Callers fill in source fields, so each one gets its own copies
+        return [event.copy(source_links=list(event.source_links)) for event in events]
+
+    async def _extract_shared(self, text: str, current_date: str, source_type: str) -> List[CalendarEvent]:
+        # Groups with different pre-filters may get different answers for the same text
+        prefilter = self.scheduler.prefilter(extraction_group.get()) if self.scheduler else None
+        key = (' '.join(text.split()), current_date, source_type, prefilter)
+        return await self.in_flight.do(key, lambda: self._extract_events(text, current_date, source_type))
+
+    @staticmethod
+    def merge_window_events(results: List[List[CalendarEvent]]) -> List[CalendarEvent]:
+        """Combine events from overlapping windows, keeping the most confident copy of each"""
+        merged: Dict[tuple, CalendarEvent] = {}
+        for events in results:
+            for event in events:
+                key = (' '.join(re.findall(r'\w+', event.title.lower())), event.start_date, event.end_date)
+                if key not in merged or event.confidence_score > merged[key].confidence_score:
+                    merged[key] = event
+        return list(merged.values())
+
+    def provider(self) -> Optional[str]:
+        """The provider used for extraction, in order of preference: OpenAI, Groq, Anthropic"""
+        if self.openai_key:
+            return 'openai'
+        if self.groq_key:
+            return 'groq'
+        if self.anthropic_key:
+            return 'anthropic'
+        return None
+
+    @staticmethod
+    def escalation_reason(events_data: Optional[List[Dict[str, Any]]]) -> Optional[str]:
+        """Why a fast-tier answer should be retried on the strong tier, or None to accept it"""
+        if events_data is None:
+            return 'failed'
+        for event_data in events_data:
+            try:
+                confidence = float(event_data.get('confidence_score', 0.8))
+            except (AttributeError, TypeError, ValueError):
+                return 'malformed'
+            if confidence < LLM_ESCALATION_CONFIDENCE:
+                return 'low_confidence'
+        return None
+
+    async def _call_tier(self, provider: str, tier: str, text: str, current_date: str) -> Optional[List[Dict[str, Any]]]:
+        logger.debug(f"Using {provider} {tier} model {self.models[provider][tier]} for extraction")
+        call = getattr(self, f'extract_events_{provider}')
+        group = extraction_group.get()
+        if self.scheduler and group:
+            self.scheduler.stats.record(group, llm_calls=1)
+        async with self.limiter.slot(self.scheduler.priority(group) if self.scheduler else 0):
+            with tracer.span('llm_call', provider=provider, tier=tier, chars=len(text)), \
+                    LLM_IN_FLIGHT.track_inprogress(), LLM_REQUEST_SECONDS.time(provider=provider, tier=tier):
+                events_data = await call(text, current_date, tier)
+        logger.debug("%s %s response: %s", provider, tier, LazyJSON(events_data))
+        return events_data
+
+    async def _extract_events(self, text: str, current_date: str, source_type: str = 'text') -> List[CalendarEvent]:
+        """
+        Extract events using available LLM provider, escalating to the strong model tier when needed.
+
+        Short messages the rule-based extractor is sure about skip the LLM, and
+        without any LLM key the rule-based events are used as they are. Texts
+        the group's pre-filter rejects (see AdaptiveScheduler) yield no events.
+        Raises ExtractionUnavailable if every provider call failed.
+        """
         logger.debug(f"Extracting events with reference date: {current_date}")
-        
-        # Try providers in order: OpenAI, Groq, Anthropic
-        events_data = []
+        rule_data = self.rules.extract(text, current_date)
+        if (source_type == 'text' and len(text) <= RULE_FAST_PATH_MAX_CHARS and len(rule_data) == 1
+                and rule_data[0]['confidence_score'] >= RULE_FAST_PATH_CONFIDENCE):
+            RULE_EXTRACTIONS.inc(outcome='fast_path')
+            logger.debug("Rule-based fast path: %s", LazyJSON(rule_data))
+            return self.events_from_data(rule_data)
+        provider = self.provider()
+        if not provider:
+            RULE_EXTRACTIONS.inc(outcome='no_provider')
+            return self.events_from_data(rule_data)
+        if self.scheduler and self.scheduler.skip_llm(extraction_group.get(), text, rule_data):
+            logger.debug("Pre-filtered, not sent to the LLM: %.200s...", text)
+            return []
+        models = self.models[provider]
+        cascade = bool(models['strong']) and models['strong'] != models['fast']
         try:
-            if self.openai_key:
-                logger.debug("Using OpenAI for extraction")
-                events_data = await self.extract_events_openai(text, current_date)
-                logger.debug(f"OpenAI response: {json.dumps(events_data, indent=2)}")
-            elif self.groq_key:
-                logger.debug("Using Groq for extraction")
-                events_data = await self.extract_events_groq(text, current_date)
-                logger.debug(f"Groq response: {json.dumps(events_data, indent=2)}")
-            elif self.anthropic_key:
-                logger.debug("Using Anthropic for extraction")
-                events_data = await self.extract_events_anthropic(text, current_date)
-                logger.debug(f"Anthropic response: {json.dumps(events_data, indent=2)}")
-            
-            if not events_data:
-                logger.debug(f"No events extracted from message text: {text[:200]}...")
-                return []
-                
+            if cascade and source_type in ('pdf', 'image') and len(text) >= LLM_STRONG_MIN_OCR_CHARS:
+                # Long OCR/PDF text is where the fast model struggles most; skip straight to the strong one
+                LLM_ESCALATIONS.inc(provider=provider, reason='long_document')
+                events_data = await self._call_tier(provider, 'strong', text, current_date)
+            else:
+                events_data = await self._call_tier(provider, 'fast', text, current_date)
+                reason = self.escalation_reason(events_data) if cascade else None
+                if reason:
+                    LLM_ESCALATIONS.inc(provider=provider, reason=reason)
+                    logger.info(f"Escalating extraction to {models['strong']} ({reason})")
+                    strong_data = await self._call_tier(provider, 'strong', text, current_date)
+                    if strong_data is not None:
+                        events_data = strong_data
         except Exception as e:
             logger.error(f"Error in LLM extraction: {e}", exc_info=True)
             return []
-        
-        # Convert to CalendarEvent objects
+
+        if events_data is None:
+            raise ExtractionUnavailable()
+        if not events_data:
+            logger.debug("No events extracted from message text: %.200s...", text)
+            return []
+        return self.events_from_data(events_data)
+
+    @staticmethod
+    def events_from_data(events_data: List[Dict[str, Any]]) -> List[CalendarEvent]:
+        """Convert event dicts (LLM replies or rule-based matches) to CalendarEvent objects"""
         events = []
         for event_data in events_data:
             try:
@@ -438,6 +766,16 @@ Text to analyze:
         
         return events
 
+def google_event_id(event: 'CalendarEvent') -> str:
+    """
+    Google Calendar id for an event, derived from its message, title and start
+    (hex digits are valid base32hex), so the event can be updated or deleted
+    later without storing the id Google would otherwise assign.
+    """
+    key = f"{event.source_group}\0{event.source_message_id}\0{event.title}\0{event.start_ts}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
 class GoogleCalendarClient:
     def __init__(self, credentials_path: str, calendar_id: str):
         self.calendar_id = calendar_id
@@ -447,21 +785,27 @@ class GoogleCalendarClient:
 
     def _authenticate(self):
         try:
+            from google.oauth2 import service_account
+            from googleapiclient.discovery import build
             scopes = ['https://www.googleapis.com/auth/calendar']
             credentials = service_account.Credentials.from_service_account_file(
                 self.credentials_path, scopes=scopes)
-            self.service = build('calendar', 'v3', credentials=credentials)
+            # The Calendar discovery document ships with google-api-python-client; nothing is fetched
+            self.service = build('calendar', 'v3', credentials=credentials, static_discovery=True, cache_discovery=False)
             logger.info('Authenticated with Google Calendar API')
         except Exception as e:
             logger.error(f'Google Calendar authentication failed: {e}')
             self.service = None
 
     def create_event(self, event: 'CalendarEvent'):
+        """Insert the event, or update it if it was pushed before (e.g. merged details or an edit back)."""
         if not self.service or not self.calendar_id:
             logger.warning('Google Calendar service or calendar ID not configured.')
             return None
         try:
+            from googleapiclient.errors import HttpError
             event_body = {
+                'id': google_event_id(event),
                 'summary': event.title,
                 'description': event.description,
                 'start': {
@@ -493,13 +837,68 @@ class GoogleCalendarClient:
                     'title': event.source_group or 'Telegram',
                     'url': url_match.group(0)
                 }
-            created_event = self.service.events().insert(calendarId=self.calendar_id, body=event_body).execute()
+            status = 'ok'
+            with GCAL_PUSH_SECONDS.time():
+                try:
+                    created_event = self.service.events().insert(calendarId=self.calendar_id, body=event_body).execute()
+                except HttpError as e:
+                    if e.resp.status != 409:
+                        raise
+                    # The id exists (possibly deleted, which the update restores)
+                    event_body['status'] = 'confirmed'
+                    created_event = self.service.events().update(
+                        calendarId=self.calendar_id, eventId=event_body['id'], body=event_body).execute()
+                    status = 'updated'
+            GCAL_PUSHES.inc(status=status)
             logger.info(f'Event pushed to Google Calendar: {event.title} ({created_event.get("id")})')
             return created_event
         except Exception as e:
+            GCAL_PUSHES.inc(status='error')
             logger.error(f'Failed to create Google Calendar event: {e}')
             return None
 
+    def delete_event(self, event: 'CalendarEvent'):
+        if not self.service or not self.calendar_id:
+            return
+        try:
+            from googleapiclient.errors import HttpError
+            try:
+                self.service.events().delete(calendarId=self.calendar_id, eventId=google_event_id(event)).execute()
+            except HttpError as e:
+                # Already gone, or pushed before events had derived ids
+                if e.resp.status not in (404, 410):
+                    raise
+            GCAL_PUSHES.inc(status='deleted')
+            logger.info(f'Event deleted from Google Calendar: {event.title}')
+        except Exception as e:
+            GCAL_PUSHES.inc(status='error')
+            logger.error(f'Failed to delete Google Calendar event: {e}')
+
+def build_telegram_accounts() -> List[TelegramAccount]:
+    """The TELEGRAM_* account (unless only TELEGRAM_ACCOUNTS are configured) followed by TELEGRAM_ACCOUNTS."""
+    data_dir = os.path.dirname(CALENDAR_OUTPUT_PATH)
+    # With a single account there is nobody to hand groups to, so every FloodWait is waited out
+    max_flood_wait = SHARD_MAX_FLOOD_WAIT if TELEGRAM_ACCOUNTS else float('inf')
+    accounts = []
+    if PHONE_NUMBER or not TELEGRAM_ACCOUNTS:
+        accounts.append(TelegramAccount(
+            'default', SESSION_PATH, API_ID, API_HASH, PHONE_NUMBER,
+            entity_cache_path=ENTITY_CACHE_FILE, checkpoints_path=SCAN_CHECKPOINTS_FILE,
+            code=TELEGRAM_CODE, password=TELEGRAM_2FA_PASSWORD,
+            throttle_max_delay=TELEGRAM_THROTTLE_MAX_DELAY, max_flood_wait=max_flood_wait,
+            flood_sleep_threshold=TELEGRAM_FLOOD_SLEEP_THRESHOLD, entity_ttl_seconds=ENTITY_CACHE_TTL_HOURS * 3600))
+    for settings in TELEGRAM_ACCOUNTS:
+        name = settings['name']
+        accounts.append(TelegramAccount(
+            name, settings.get('session_path', f"{SESSION_PATH}_{name}"),
+            int(settings.get('api_id', API_ID)), settings.get('api_hash', API_HASH), settings.get('phone', ''),
+            entity_cache_path=os.path.join(data_dir, f'entity_cache_{name}.json'),
+            checkpoints_path=os.path.join(data_dir, f'scan_checkpoints_{name}.json'),
+            code=settings.get('code', ''), password=settings.get('password', ''),
+            throttle_max_delay=TELEGRAM_THROTTLE_MAX_DELAY, max_flood_wait=max_flood_wait,
+            flood_sleep_threshold=TELEGRAM_FLOOD_SLEEP_THRESHOLD, entity_ttl_seconds=ENTITY_CACHE_TTL_HOURS * 3600))
+    return accounts
+
 class TelegramCalendarSync:
     def is_allowed_user(self, username: str = None, user_id: str = None) -> bool:
         """
@@ -647,7 +1046,7 @@ class TelegramCalendarSync:
                     logger.info(f"Using provided user_id: {user_id}")
                 else:
                     # Find user chat ID via username
-                    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/getChat"
+                    url = f"{TELEGRAM_BOT_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/getChat"
                     payload = {"chat_id": f"@{username}"}
                     try:
                         async with session.post(url, json=payload) as resp:
@@ -665,7 +1064,7 @@ class TelegramCalendarSync:
                 if chat_id:
                     try:
                         # Send message with code
-                        msg_url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+                        msg_url = f"{TELEGRAM_BOT_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
                         msg_payload = {"chat_id": chat_id, "text": f"Your login code: {code}"}
                         logger.debug(f"Sending message to chat_id {chat_id}")
                         
@@ -794,7 +1193,7 @@ class TelegramCalendarSync:
             link=(f"Link: {event.telegram_link}\n" if event.telegram_link else '')
         )
         async with aiohttp.ClientSession() as session:
-            url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+            url = f"{TELEGRAM_BOT_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
             for chat_id in chat_ids:
                 payload = {
                     "chat_id": chat_id,
@@ -803,10 +1202,13 @@ class TelegramCalendarSync:
                 try:
                     async with session.post(url, json=payload) as resp:
                         if resp.status == 200:
+                            REMINDERS_SENT.inc(status='ok')
                             logger.info(f"Sent reminder for event '{event.title}' to Telegram chat {chat_id}")
                         else:
+                            REMINDERS_SENT.inc(status='error')
                             logger.error(f"Failed to send Telegram reminder to {chat_id}: {await resp.text()}")
                 except Exception as e:
+                    REMINDERS_SENT.inc(status='error')
                     logger.error(f"Error sending Telegram reminder to {chat_id}: {e}")
 
     async def reminder_task(self):
@@ -814,31 +1216,13 @@ class TelegramCalendarSync:
         logger.info("Starting Telegram reminder background task...")
         while True:
             try:
-                # Load events
-                if os.path.exists(CALENDAR_OUTPUT_PATH):
-                    with open(CALENDAR_OUTPUT_PATH, 'r') as f:
-                        events_data = json.load(f)
-                else:
-                    events_data = []
                 now = datetime.now(timezone.utc)
-                target_date = now + timedelta(days=REMINDER_DAYS_BEFORE)
-                reminders = []
-                for e in events_data:
-                    try:
-                        event_dt = None
-                        if 'timestamp' in e:
-                            event_dt = datetime.fromtimestamp(e['timestamp'], tz=timezone.utc)
-                        elif 'start_date' in e:
-                            event_dt = datetime.fromisoformat(e['start_date'])
-                        if event_dt:
-                            delta = (event_dt - target_date).total_seconds()
-                            # ±12 hours window, configurable if needed
-                            if abs(delta) < 12*3600 and event_dt > now:
-                                reminders.append(CalendarEvent.from_dict(e))
-                    except Exception as ex:
-                        logger.error(f"Error parsing event for reminder: {ex}")
+                target_ts = (now + timedelta(days=REMINDER_DAYS_BEFORE)).timestamp()
+                # ±12 hours window, configurable if needed
+                reminders = [event for event in self.load_existing_events()
+                             if abs(event.start_ts - target_ts) < 12*3600 and event.start_ts > now.timestamp()]
                 # Avoid duplicate reminders: keep track in a file
-                sent_file = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'sent_reminders.json')
+                sent_file = SENT_REMINDERS_FILE
                 sent_ids = set()
                 if os.path.exists(sent_file):
                     try:
@@ -890,6 +1274,78 @@ class TelegramCalendarSync:
         
         return web.json_response(response_data)
     
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Expose ingestion counters, latency histograms and gauges in Prometheus text format"""
+        return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8',
+                            headers={'Cache-Control': 'no-store'})
+
+    async def handle_group_stats(self, request: web.Request) -> web.Response:
+        """Per-group extraction statistics and the scan depth, priority and pre-filter derived from them"""
+        self.group_stats.load()
+        return web.json_response(self.scheduler.summary(), headers={'Cache-Control': 'no-store'})
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        """
+        Full-text search over event title, description, location and source group.
+
+        Query parameters: q (every word must match, the last one as a
+        prefix), from and to (YYYY-MM-DD or ISO 8601; events overlapping the
+        range), group (repeatable), include_dismissed=true, limit and offset.
+        """
+        query = request.query.get('q', '').strip()
+        if not query:
+            return web.json_response({'error': 'q is required'}, status=400)
+        try:
+            start_ts = parse_query_time(request.query.get('from'))
+            end_ts = parse_query_time(request.query.get('to'), end_of_day=True)
+            limit = min(max(int(request.query.get('limit', '50')), 1), SEARCH_MAX_RESULTS)
+            offset = max(int(request.query.get('offset', '0')), 0)
+        except ValueError as e:
+            return web.json_response({'error': f'Invalid parameter: {e}'}, status=400)
+        groups = [group for group in request.query.getall('group', []) if group]
+        include_dismissed = request.query.get('include_dismissed', '').lower() == 'true'
+        try:
+            with EVENT_SEARCH_SECONDS.time():
+                results, has_more = self.search_index.search(
+                    query, start_ts=start_ts, end_ts=end_ts, groups=groups,
+                    include_dismissed=include_dismissed, limit=limit, offset=offset)
+        except Exception as e:
+            logger.error(f"Error searching events: {e}", exc_info=True)
+            return web.json_response({'error': str(e)}, status=500)
+        return web.json_response({'query': query, 'results': results, 'has_more': has_more},
+                                 headers={'Cache-Control': 'no-store'})
+
+    async def handle_events_overlapping(self, request: web.Request) -> web.Response:
+        """
+        Events overlapping a time range, in start order, each with its number of conflicts.
+
+        Query parameters: from (required) and to (YYYY-MM-DD or ISO 8601; a
+        bare date as to includes that whole day, and to defaults to from, so
+        from=2025-06-01 alone is what's on that day), group (repeatable),
+        include_dismissed=true, limit and offset.
+        """
+        try:
+            start_ts = parse_query_time(request.query.get('from'))
+            end_ts = parse_query_time(request.query.get('to') or request.query.get('from'), end_of_day=True)
+            limit = min(max(int(request.query.get('limit', '50')), 1), SEARCH_MAX_RESULTS)
+            offset = max(int(request.query.get('offset', '0')), 0)
+        except ValueError as e:
+            return web.json_response({'error': f'Invalid parameter: {e}'}, status=400)
+        if start_ts is None:
+            return web.json_response({'error': 'from is required'}, status=400)
+        if end_ts < start_ts:
+            return web.json_response({'error': 'to is before from'}, status=400)
+        groups = [group for group in request.query.getall('group', []) if group]
+        include_dismissed = request.query.get('include_dismissed', '').lower() == 'true'
+        try:
+            with EVENT_OVERLAP_SECONDS.time():
+                results, has_more = self.search_index.overlapping(
+                    start_ts, end_ts, groups=groups, include_dismissed=include_dismissed, limit=limit, offset=offset)
+        except Exception as e:
+            logger.error(f"Error querying overlapping events: {e}", exc_info=True)
+            return web.json_response({'error': str(e)}, status=500)
+        return web.json_response({'results': results, 'has_more': has_more}, headers={'Cache-Control': 'no-store'})
+
     async def handle_api_check(self, request: web.Request) -> web.Response:
         """Debug endpoint to verify API connectivity"""
         response_data = {
@@ -907,7 +1363,7 @@ class TelegramCalendarSync:
         if TELEGRAM_BOT_TOKEN:
             try:
                 async with aiohttp.ClientSession() as session:
-                    async with session.get(f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/getMe") as resp:
+                    async with session.get(f"{TELEGRAM_BOT_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/getMe") as resp:
                         if resp.status == 200:
                             bot_info = await resp.json()
                             if bot_info.get('ok') and bot_info.get('result', {}).get('username'):
@@ -918,21 +1374,59 @@ class TelegramCalendarSync:
         return web.json_response(response_data)
 
     def __init__(self):
-        self.client = TelegramClient(SESSION_PATH, API_ID, API_HASH)
-        self.llm_extractor = LLMEventExtractor()
+        # Telegram accounts the groups are spread over; each has its own client, throttle and caches
+        self.accounts = AccountPool(build_telegram_accounts(), max_flood_wait=SHARD_MAX_FLOOD_WAIT)
+        TELEGRAM_ACCOUNTS_AVAILABLE.set_function(lambda: len(self.accounts.available()))
+        # Marked peer ID -> group title used as source_group, filled in as groups are resolved
+        self.group_titles: Dict[int, str] = {}
+        # Per-group yields steer scan depth, LLM priority and pre-filtering
+        self.group_stats = GroupStats(GROUP_STATS_FILE, FileLock(f"{GROUP_STATS_FILE}.lock"))
+        self.group_stats.load()
+        self.scheduler = AdaptiveScheduler(
+            self.group_stats, enabled=ADAPTIVE_SCHEDULING, min_messages=ADAPTIVE_MIN_MESSAGES,
+            min_depth=ADAPTIVE_MIN_DEPTH, max_depth=ADAPTIVE_MAX_DEPTH,
+            loose_below=PREFILTER_LOOSE_BELOW, strict_below=PREFILTER_STRICT_BELOW)
+        self.llm_extractor = LLMEventExtractor(self.scheduler)
         self.processed_messages = set()
+        self.processed_pruned_file = PROCESSED_PRUNED_FILE
+        self.processed_pruned: Dict[str, List[int]] = {}
         self.events_file = CALENDAR_OUTPUT_PATH
+        self.events_binary_file = EVENTS_BINARY_PATH
         self.processed_messages_file = PROCESSED_MESSAGES_PATH
         # Ensure data directory exists
         os.makedirs(os.path.dirname(self.events_file), exist_ok=True)
+        self.snapshots = PartitionedSnapshot(EVENT_PARTITIONS_PATH)
+        self.archive = EventArchive(EVENT_ARCHIVE_PATH)
+        self.store_lock = FileLock(EVENTS_LOCK_FILE)
+        # Stored events, their signatures and dedupe index as of a store stamp, so saves
+        # need not reload and re-index every event while nothing else wrote the store
+        self.store_cache: Optional[Tuple[str, List[CalendarEvent], Dict[tuple, CalendarEvent], EventDedupeIndex]] = None
+        self.search_index = EventSearchIndex(EVENT_SEARCH_INDEX_PATH)
+        # Set in the ingest role: messages are queued for worker processes instead of extracted here
+        self.work_queue: Optional[WorkQueue] = None
         self.load_processed_messages()
-
-        # Google Calendar client
+        self.message_hashes_file = MESSAGE_HASHES_FILE
+        self.message_hashes: Dict[str, str] = {}
+        self.load_message_hashes()
+        self.load_processed_pruned()
+        # Live album parts are buffered and extracted together
+        self.albums = AlbumCollector(self.process_live_message, wait_seconds=ALBUM_WAIT_SECONDS)
+        self.llm_retry_file = LLM_RETRY_QUEUE_FILE
+        self.llm_retry_queue: Dict[str, Dict[str, Any]] = {}
+        self.load_llm_retry_queue()
+        LLM_RETRY_QUEUE_SIZE.set_function(lambda: len(self.llm_retry_queue))
+        # The same attachment forwarded to several groups is parsed / OCR'd once
+        self.media_in_flight = SingleFlight('media_extract')
+        # Recent message fingerprints, so reposts reuse the earlier extraction
+        self.near_duplicates = NearDuplicateIndex(
+            max_distance=NEAR_DUPLICATE_MAX_DISTANCE,
+            ttl_seconds=NEAR_DUPLICATE_TTL_HOURS * 3600,
+            max_entries=NEAR_DUPLICATE_MAX_ENTRIES)
+        NEAR_DUPLICATE_INDEX_SIZE.set_function(lambda: len(self.near_duplicates))
+
+        # Google Calendar client, built in the background by start_google_calendar
         self.gcal = None
-        if GOOGLE_CALENDAR_ID and os.path.exists(GOOGLE_CALENDAR_CREDENTIALS):
-            self.gcal = GoogleCalendarClient(GOOGLE_CALENDAR_CREDENTIALS, GOOGLE_CALENDAR_ID)
-        else:
-            logger.info('Google Calendar integration not enabled (missing credentials or calendar ID)')
+        self.gcal_task: Optional[asyncio.Task] = None
 
         # Create the Telegram Login verifier
         if TELEGRAM_BOT_TOKEN:
@@ -942,13 +1436,21 @@ class TelegramCalendarSync:
             logger.warning("Telegram Bot Token not set, Telegram Login functionality will be disabled")
 
         # Web server for uploads
-        self.web_app = web.Application()
+        self.web_app = web.Application(middlewares=[access_log_middleware, cors_middleware])
         self.web_app.add_routes([
             # Debug/test endpoints
             web.get('/api-check', self.handle_api_check),
             web.get('/api/api-check', self.handle_api_check),
             web.get('/auth-check', self.handle_auth_check),
             web.get('/api/auth-check', self.handle_auth_check),
+            web.get('/metrics', self.handle_metrics),
+            web.get('/api/metrics', self.handle_metrics),
+            web.get('/group-stats', self.handle_group_stats),
+            web.get('/api/group-stats', self.handle_group_stats),
+            web.get('/search', self.handle_search),
+            web.get('/api/search', self.handle_search),
+            web.get('/events/overlapping', self.handle_events_overlapping),
+            web.get('/api/events/overlapping', self.handle_events_overlapping),
             
             # Standard API endpoints
             web.post('/upload', self.handle_upload),
@@ -972,6 +1474,32 @@ class TelegramCalendarSync:
             web.post('/api/login-request', self.handle_login_request),
             web.post('/api/login-verify', self.handle_login_verify)
         ])
+    @property
+    def client(self):
+        """The primary account's Telegram client, created (and Telethon imported) on first use."""
+        return self.accounts.primary.client
+
+    @client.setter
+    def client(self, client):
+        self.accounts.primary.client = client
+
+    def start_google_calendar(self) -> asyncio.Task:
+        """
+        Build the Google Calendar client in a worker thread, once.
+
+        Called when the web server is listening and awaited before anything is
+        scanned or imported, so no event misses the calendar push.
+        """
+        if self.gcal_task is None:
+            self.gcal_task = asyncio.create_task(self._connect_google_calendar())
+        return self.gcal_task
+
+    async def _connect_google_calendar(self):
+        if GOOGLE_CALENDAR_ID and os.path.exists(GOOGLE_CALENDAR_CREDENTIALS):
+            self.gcal = await asyncio.to_thread(GoogleCalendarClient, GOOGLE_CALENDAR_CREDENTIALS, GOOGLE_CALENDAR_ID)
+        else:
+            logger.info('Google Calendar integration not enabled (missing credentials or calendar ID)')
+
     async def handle_subscribe_reminders(self, request: web.Request) -> web.Response:
         """Handle user subscription to Telegram reminders."""
         try:
@@ -1026,17 +1554,162 @@ class TelegramCalendarSync:
             self.processed_messages = set()
     
     def save_processed_messages(self):
-        """Save processed message IDs, only if there are any."""
+        """Save processed message IDs, only if there are any, and their content hashes."""
         try:
             logger.debug(f"Saving processed messages to file: {os.path.abspath(self.processed_messages_file)}")
             logger.debug(f"Saving {len(self.processed_messages)} processed message IDs.")
             with open(self.processed_messages_file, 'w') as f:
                 json.dump(list(self.processed_messages), f)
+            with open(self.message_hashes_file, 'w') as f:
+                json.dump(self.message_hashes, f)
+            with open(self.processed_pruned_file, 'w') as f:
+                json.dump(self.processed_pruned, f)
         except Exception as e:
             logger.error(f"Error saving processed messages: {e}")
+
+    def load_processed_pruned(self):
+        try:
+            if os.path.exists(self.processed_pruned_file):
+                with open(self.processed_pruned_file, 'r') as f:
+                    self.processed_pruned = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading pruned processed message ranges: {e}")
+            self.processed_pruned = {}
+
+    def is_processed(self, group_name: str, message_id: int) -> bool:
+        """Whether a message was extracted before: its ID is kept, or within the group's pruned range."""
+        if f"{group_name}_{message_id}" in self.processed_messages:
+            return True
+        pruned = self.processed_pruned.get(group_name)
+        return pruned is not None and pruned[0] <= message_id <= pruned[1]
+
+    def load_message_hashes(self):
+        try:
+            if os.path.exists(self.message_hashes_file):
+                with open(self.message_hashes_file, 'r') as f:
+                    self.message_hashes = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading message hashes: {e}")
+            self.message_hashes = {}
+
+    @staticmethod
+    def message_digest(parts: List[Any]) -> str:
+        """Hash of the text and attached media of a message (or of every part of an album)."""
+        digest = hashlib.sha1()
+        for part in parts:
+            media = getattr(part, 'media', None)
+            item = getattr(media, 'photo', None) or getattr(media, 'document', None)
+            digest.update(f"{part.text or ''}\0{getattr(item, 'id', '')}\0".encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def load_llm_retry_queue(self):
+        """Load messages that are waiting for LLM re-extraction."""
+        try:
+            if os.path.exists(self.llm_retry_file):
+                with open(self.llm_retry_file, 'r') as f:
+                    self.llm_retry_queue = {entry['key']: entry for entry in json.load(f)}
+                if self.llm_retry_queue:
+                    logger.info(f"Loaded {len(self.llm_retry_queue)} messages waiting for LLM re-extraction.")
+        except Exception as e:
+            logger.error(f"Error loading LLM retry queue: {e}")
+            self.llm_retry_queue = {}
+
+    def save_llm_retry_queue(self):
+        try:
+            with open(self.llm_retry_file, 'w') as f:
+                json.dump(list(self.llm_retry_queue.values()), f)
+        except Exception as e:
+            logger.error(f"Error saving LLM retry queue: {e}")
+
+    def queue_llm_retry(self, message_key: str, group_name: str, message_id: int, message_date: datetime,
+                        message_link: str, texts: List[str], types: List[str], edited: bool = False):
+        """
+        Keep the extracted text of a message that hit an LLM outage so it can be re-extracted later.
+
+        For an edited message the re-extracted events replace the ones stored for it.
+        """
+        now = time.time()
+        self.llm_retry_queue[message_key] = {
+            'key': message_key,
+            'group': group_name,
+            'message_id': message_id,
+            'date': message_date.isoformat(),
+            'link': message_link,
+            'texts': texts,
+            'types': types,
+            'edited': edited,
+            'attempts': 0,
+            'queued_at': now,
+            'next_attempt_at': now + LLM_RETRY_INTERVAL,
+        }
+        self.save_llm_retry_queue()
+        LLM_RETRIES.inc(outcome='queued')
+        logger.warning(f"LLM extraction unavailable, queued {message_key} for re-extraction")
+
+    async def retry_queued_extractions(self) -> int:
+        """
+        Re-extract queued messages whose retry time has come, oldest first.
+
+        Messages older than LLM_RETRY_MAX_AGE_HOURS fall back to the rule-based
+        events if the LLM still fails. The pass stops at the first other failure,
+        since the providers are evidently still down. Returns the number resolved.
+        """
+        now = time.time()
+        resolved = 0
+        due = sorted((entry for entry in self.llm_retry_queue.values() if entry['next_attempt_at'] <= now),
+                     key=lambda entry: entry['queued_at'])
+        for entry in due:
+            expired = now - entry['queued_at'] >= LLM_RETRY_MAX_AGE_HOURS * 3600
+            try:
+                events = await self.extract_message_events(
+                    entry['group'], entry['message_id'], datetime.fromisoformat(entry['date']), entry['link'],
+                    entry['texts'], entry['types'], entry['key'], use_fallback=expired)
+            except ExtractionUnavailable:
+                entry['attempts'] += 1
+                entry['next_attempt_at'] = now + min(LLM_RETRY_INTERVAL * 2 ** entry['attempts'], 3600)
+                break
+            except Exception as e:
+                logger.error(f"Error re-extracting message {entry['key']}: {e}", exc_info=True)
+                continue
+            del self.llm_retry_queue[entry['key']]
+            self.processed_messages.add(entry['key'])
+            if entry.get('edited'):
+                self.replace_message_events(entry['group'], entry['message_id'], events, entry['link'])
+            elif events:
+                self.save_events(events)
+            LLM_RETRIES.inc(outcome='resolved')
+            resolved += 1
+        if due:
+            self.save_llm_retry_queue()
+            self.save_processed_messages()
+        if resolved:
+            logger.info(f"Re-extracted {resolved} queued messages, {len(self.llm_retry_queue)} still waiting")
+        return resolved
+
+    async def llm_retry_task(self):
+        """Background task re-extracting messages that hit an LLM outage."""
+        while True:
+            await asyncio.sleep(min(LLM_RETRY_INTERVAL, 60))
+            if self.llm_retry_queue:
+                try:
+                    await self.retry_queued_extractions()
+                except Exception as e:
+                    logger.error(f"Error in LLM retry task: {e}", exc_info=True)
+
+    async def start_llm_retry_background(self, app):
+        asyncio.create_task(self.llm_retry_task())
     
     def load_existing_events(self) -> List[CalendarEvent]:
         """Load existing events from file, robust to file errors and empty files."""
+        # The binary copy is much faster to decode; events.json wins only if it was changed by hand since
+        try:
+            if os.path.exists(self.events_binary_file) and (
+                    not os.path.exists(self.events_file) or
+                    os.path.getmtime(self.events_binary_file) >= os.path.getmtime(self.events_file)):
+                with open(self.events_binary_file, 'rb') as f:
+                    return list(EventColumns.from_bytes(f.read()))
+        except Exception as e:
+            logger.error(f"Error loading {self.events_binary_file}, falling back to events.json: {e}")
         try:
             logger.debug(f"Loading events from file: {os.path.abspath(self.events_file)}")
             if os.path.exists(self.events_file):
@@ -1058,55 +1731,412 @@ class TelegramCalendarSync:
     
     def save_events(self, events: List[CalendarEvent], force_flush: bool = False):
         """Save events to file and Google Calendar, avoiding duplicates."""
+        with tracer.span('save_events', count=len(events)), SAVE_EVENTS_SECONDS.time():
+            with self.store_lock:
+                added = self._save_events(events)
+            # Network calls; other processes need not wait for them to save or dismiss
+            self.push_to_google_calendar(added)
+
+    def push_to_google_calendar(self, events: List[CalendarEvent], replaced: List[CalendarEvent] = ()):
+        """Insert or update `events` in Google Calendar and delete the `replaced` ones that are gone."""
+        if self.gcal:
+            kept = {google_event_id(event) for event in events}
+            for event in replaced:
+                if google_event_id(event) not in kept:
+                    self.gcal.delete_event(event)
+            for event in events:
+                self.gcal.create_event(event)
+
+    def _save_events(self, events: List[CalendarEvent]) -> List[CalendarEvent]:
+        """
+        Merge events into the store under store_lock; returns the ones to push to
+        Google Calendar: those added as new events and merged ones with new details.
+        """
+        added = []
         try:
             logger.debug(f"Saving events to file: {os.path.abspath(self.events_file)}")
-            existing_events = self.load_existing_events()
-            logger.debug(f"Before saving, {len(existing_events)} events loaded from file.")
-            existing_signatures = {
-                (e.title, e.start_date.date(), e.source_group, e.source_message_id)
-                for e in existing_events
-            }
+            stamp = self.store_stamp()
+            if self.store_cache is not None and self.store_cache[0] == stamp:
+                _, existing_events, existing_signatures, dedupe_index = self.store_cache
+            else:
+                existing_events = self.load_existing_events()
+                logger.debug(f"Before saving, {len(existing_events)} events loaded from file.")
+                existing_signatures = {
+                    (e.title, e.start_date.date(), e.source_group, e.source_message_id): e
+                    for e in existing_events
+                }
+                dedupe_index = EventDedupeIndex(
+                    date_tolerance_days=EVENT_DEDUPE_DATE_TOLERANCE_DAYS,
+                    time_tolerance_hours=EVENT_DEDUPE_TIME_TOLERANCE_HOURS,
+                    title_threshold=EVENT_DEDUPE_TITLE_THRESHOLD)
+                for e in existing_events:
+                    dedupe_index.add(e)
+            # Modified in place below; only valid again once written
+            self.store_cache = None
             new_events_added = 0
+            # Stored events added or changed here, by identity, for the search index
+            changed = {}
             for event in events:
                 signature = (event.title, event.start_date.date(), event.source_group, event.source_message_id)
                 if signature not in existing_signatures:
+                    canonical = dedupe_index.find_match(event)
+                    if canonical is not None:
+                        # Same real-world event announced elsewhere: keep one event with every source link
+                        EVENT_FUZZY_MERGES.inc()
+                        if self.merge_duplicate_event(canonical, event) and id(canonical) not in map(id, added):
+                            added.append(canonical)
+                        changed[id(canonical)] = canonical
+                        existing_signatures[signature] = canonical
+                        logger.debug(f"Merged {event.title} from {event.source_group} into existing event {canonical.title} from {canonical.source_group}")
+                        continue
                     existing_events.append(event)
-                    existing_signatures.add(signature)
+                    changed[id(event)] = event
+                    dedupe_index.add(event)
+                    existing_signatures[signature] = event
                     new_events_added += 1
+                    added.append(event)
                     logger.debug(f"Adding new event: {event.title} on {event.start_date}")
-                    # Push to Google Calendar if enabled
-                    if self.gcal:
-                        self.gcal.create_event(event)
+                else:
+                    EVENT_DEDUPE_HITS.inc()
+                    stored = existing_signatures[signature]
+                    if self.merge_source_links(stored, event):
+                        changed[id(stored)] = stored
             try:
-                with open(self.events_file, 'w') as f:
-                    json_data = [event.to_dict() for event in existing_events]
-                    json.dump(json_data, f, indent=2, default=str)
-                    f.flush()
-                    os.fsync(f.fileno())
+                self.write_events_file(existing_events)
                 logger.info(f"Saved events file with {len(existing_events)} total events (added {new_events_added} new events)")
             except Exception as e:
                 logger.error(f"Error writing events to file: {e}")
+                return []
+            self.update_search_index(stamp, events=[
+                (index, event) for index, event in enumerate(existing_events) if id(event) in changed] if changed else [])
+            self.store_cache = (self.store_stamp(), existing_events, existing_signatures, dedupe_index)
         except Exception as e:
             logger.error(f"Error in save_events: {e}")
+            return []
+        return added
+
+    def write_events_file(self, events: List[CalendarEvent]):
+        # JSON only for what reads the file from outside: the web UI, iCal export and users
+        json_data = [event.to_dict() for event in events]
+        with open(self.events_file, 'w') as f:
+            json.dump(json_data, f, indent=2, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        # Written after events.json, so load_existing_events can tell whether events.json was edited since
+        tmp_path = f"{self.events_binary_file}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(EventColumns.from_events(events).to_bytes())
+        os.replace(tmp_path, self.events_binary_file)
+        # Only the months whose events changed are rewritten
+        with tracer.span('write_partitions'):
+            self.snapshots.write(json_data)
+
+    def replace_message_events(self, group_name: str, message_id: int, events: List[CalendarEvent],
+                               message_link: str = ''):
+        """
+        Swap the stored events of an edited message for its re-extracted ones.
+
+        Replacements take over the positions of the old events, so their index
+        (the event id in the UI) and any dismissal carry over. Old events left
+        without a replacement are deleted and the dismissed indices renumbered;
+        additional new events are saved like any other. Events of other messages
+        that this one was merged into lose its `message_link`; the new events
+        are matched against them again when saved.
+        """
+        with tracer.span('replace_message_events', count=len(events)), SAVE_EVENTS_SECONDS.time(), \
+                self.store_lock:
+            stamp = self.store_stamp()
+            existing_events = self.load_existing_events()
+            slots = [i for i, e in enumerate(existing_events)
+                     if e.source_group == group_name and e.source_message_id == message_id]
+            replaced = [existing_events[slot] for slot in slots]
+            unlinked = []
+            if message_link:
+                for index, event in enumerate(existing_events):
+                    if message_link in event.source_links and index not in slots:
+                        event.source_links.remove(message_link)
+                        unlinked.append((index, event))
+            for slot, event in zip(slots, events):
+                # Keep the links of announcements that were merged into the old event
+                self.merge_source_links(event, existing_events[slot])
+                existing_events[slot] = event
+            removed = set(slots[len(events):])
+            if removed:
+                index_map = {}
+                kept = []
+                for index, event in enumerate(existing_events):
+                    if index not in removed:
+                        index_map[index] = len(kept)
+                        kept.append(event)
+                existing_events = kept
+            try:
+                self.write_events_file(existing_events)
+                logger.info(f"Replaced {len(slots)} events of edited message {group_name}_{message_id} with {len(events)}"
+                            f" ({len(unlinked)} merged events unlinked)")
+            except Exception as e:
+                logger.error(f"Error writing events to file: {e}")
+                return
+            if removed:
+                self.remap_dismissed_events(index_map)
+            self.update_search_index(stamp, events=list(zip(slots, events)) + unlinked,
+                                     index_map=index_map if removed else None)
+        self.push_to_google_calendar(events[:len(slots)], replaced=replaced)
+        if len(events) > len(slots):
+            self.save_events(events[len(slots):])
+
+    def remap_dismissed_events(self, index_map: Dict[int, int]) -> int:
+        """
+        Renumber dismissed event indices after events were deleted; dismissals of deleted events are dropped.
+        Returns how many were dropped.
+        """
+        dismissed_file = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'dismissed_events.json')
+        if not os.path.exists(dismissed_file):
+            return 0
+        try:
+            with open(dismissed_file, 'r') as f:
+                dismissed_events = json.load(f)
+            remapped = [index_map[event_id] for event_id in dismissed_events if event_id in index_map]
+            with open(dismissed_file, 'w') as f:
+                json.dump(remapped, f)
+            return len(dismissed_events) - len(remapped)
+        except Exception as e:
+            logger.error(f"Error remapping dismissed events: {e}")
+            return 0
+
+    def store_stamp(self) -> str:
+        """Modification time and size of events.json, events.bin and dismissed_events.json, to tell whether they changed."""
+        dismissed_file = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'dismissed_events.json')
+        parts = []
+        for path in (self.events_file, self.events_binary_file, dismissed_file):
+            try:
+                stat = os.stat(path)
+                parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+            except FileNotFoundError:
+                parts.append('-')
+        return ' '.join(parts)
+
+    def update_search_index(self, stamp: str, events: List[Tuple[int, CalendarEvent]] = (),
+                            index_map: Optional[Dict[int, int]] = None, dismissed: List[int] = (),
+                            clear_dismissed: bool = False):
+        """
+        Apply a change just written under store_lock to the search index.
+
+        `stamp` is store_stamp() from before the change: the index is marked
+        current again only if it was current then. events are (index, event)
+        pairs to (re)index, index_map a renumbering as in remap_dismissed_events.
+        """
+        try:
+            self.search_index.upsert(events)
+            if index_map is not None:
+                self.search_index.renumber(index_map)
+            if clear_dismissed:
+                self.search_index.clear_dismissed()
+            self.search_index.set_dismissed(dismissed)
+            self.search_index.advance(stamp, self.store_stamp())
+        except Exception as e:
+            logger.error(f"Error updating the event search index: {e}")
+
+    def refresh_search_index(self) -> bool:
+        """Rebuild the search index if the event files changed without it (or it was never built)."""
+        try:
+            with self.store_lock:
+                stamp = self.store_stamp()
+                if self.search_index.stamp() == stamp:
+                    return False
+                dismissed_file = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'dismissed_events.json')
+                dismissed = []
+                if os.path.exists(dismissed_file):
+                    with open(dismissed_file, 'r') as f:
+                        dismissed = [event_id for event_id in json.load(f) if isinstance(event_id, int)]
+                self.search_index.rebuild(self.load_existing_events(), dismissed, stamp)
+                return True
+        except Exception as e:
+            logger.error(f"Error rebuilding the event search index: {e}", exc_info=True)
+            return False
+
+    def compact(self, events: bool = True, processed: bool = True) -> Dict[str, int]:
+        """
+        Move past events to the archive and prune the bookkeeping that only concerns them.
+
+        Events that ended more than EVENT_RETENTION_DAYS ago go to the monthly
+        archive and the remaining events are renumbered, dismissals included
+        (dismissals of archived events are dropped). Reminders sent for events
+        that have started are forgotten, and only the newest
+        PROCESSED_RETENTION_PER_GROUP processed message IDs of each group are
+        kept, never fewer than SCAN_LIMIT, so a startup scan re-extracts nothing;
+        older ones stay known through a per-group range of pruned IDs.
+        The search index is rebuilt if it fell behind the event files.
+        events=False or processed=False skips the first or last part, for
+        processes that do not own those files. Returns the entries removed per kind.
+        """
+        with tracer.span('compact'):
+            now = time.time()
+            pruned = {'events': 0, 'dismissals': 0, 'reminders': 0, 'processed': 0}
+            if events and EVENT_RETENTION_DAYS > 0:
+                cutoff = now - EVENT_RETENTION_DAYS * 86400
+                with self.store_lock:
+                    stamp = self.store_stamp()
+                    index_map = {}
+                    kept = []
+                    expired = []
+                    for index, event in enumerate(self.load_existing_events()):
+                        if (event.end_ts if event.end_ts is not None else event.start_ts) < cutoff:
+                            expired.append(event)
+                        else:
+                            index_map[index] = len(kept)
+                            kept.append(event)
+                    if expired:
+                        # Archive first: if writing events.json fails, the events are still in one place or the other
+                        self.archive.add(expired)
+                        self.write_events_file(kept)
+                        pruned['events'] = len(expired)
+                        pruned['dismissals'] = self.remap_dismissed_events(index_map)
+                        self.update_search_index(stamp, index_map=index_map)
+                pruned['reminders'] = self.prune_sent_reminders(now)
+            if events:
+                self.refresh_search_index()
+            if processed:
+                pruned['processed'] = self.prune_processed_messages()
+            for kind, count in pruned.items():
+                COMPACTION_PRUNED.inc(count, kind=kind)
+            logger.info(f"Compaction archived {pruned['events']} events, dropped {pruned['dismissals']} dismissals, "
+                        f"{pruned['reminders']} sent reminders and {pruned['processed']} processed message IDs")
+            return pruned
+
+    def prune_sent_reminders(self, now: float) -> int:
+        """Forget sent reminders of events that have already started; they can never be sent again."""
+        if not os.path.exists(SENT_REMINDERS_FILE):
+            return 0
+        try:
+            with open(SENT_REMINDERS_FILE, 'r') as f:
+                sent_ids = json.load(f)
+            kept = []
+            for event_id in sent_ids:
+                try:
+                    start = datetime.fromisoformat(event_id.rsplit('_', 1)[1])
+                    if start.tzinfo is None:
+                        start = start.replace(tzinfo=timezone.utc)
+                    if start.timestamp() < now:
+                        continue
+                except (IndexError, ValueError):
+                    pass  # Not written by reminder_task; leave it alone
+                kept.append(event_id)
+            if len(kept) < len(sent_ids):
+                with open(SENT_REMINDERS_FILE, 'w') as f:
+                    json.dump(kept, f)
+            return len(sent_ids) - len(kept)
+        except Exception as e:
+            logger.error(f"Error pruning sent reminders: {e}")
+            return 0
+
+    def prune_processed_messages(self) -> int:
+        """
+        Keep the newest processed message IDs (and their content hashes) of each group.
+        The dropped IDs widen the group's pruned range, so is_processed still knows them; the
+        range has no holes because processed history is contiguous from its oldest message
+        (a backfill stops at the first processed one).
+        """
+        if PROCESSED_RETENTION_PER_GROUP <= 0:
+            return 0
+        keep = max(PROCESSED_RETENTION_PER_GROUP, SCAN_LIMIT)
+        by_group: Dict[str, List[int]] = {}
+        for key in self.processed_messages:
+            group_name, _, message_id = key.rpartition('_')
+            if message_id.isdigit():
+                by_group.setdefault(group_name, []).append(int(message_id))
+        dropped = set()
+        for group_name, message_ids in by_group.items():
+            if len(message_ids) > keep:
+                message_ids.sort()
+                dropped.update(f"{group_name}_{message_id}" for message_id in message_ids[:-keep])
+                low, high = self.processed_pruned.get(group_name, (message_ids[0], message_ids[-keep - 1]))
+                self.processed_pruned[group_name] = [min(low, message_ids[0]), max(high, message_ids[-keep - 1])]
+        if dropped:
+            self.processed_messages -= dropped
+            for key in dropped:
+                self.message_hashes.pop(key, None)
+            self.save_processed_messages()
+        return len(dropped)
+
+    async def compaction_task(self, events: bool = True, processed: bool = True):
+        """Background task running compaction at startup and every COMPACTION_INTERVAL_HOURS."""
+        while True:
+            try:
+                self.compact(events=events, processed=processed)
+            except Exception as e:
+                logger.error(f"Error in compaction task: {e}", exc_info=True)
+            await asyncio.sleep(COMPACTION_INTERVAL_HOURS * 3600)
+
+    async def start_compaction_background(self, app):
+        asyncio.create_task(self.compaction_task())
+
+    @staticmethod
+    def merge_source_links(existing: CalendarEvent, duplicate: CalendarEvent) -> bool:
+        """Record the duplicate's message links on the stored event. Returns True if any were new."""
+        known = {existing.telegram_link, *existing.source_links}
+        new_links = [link for link in [duplicate.telegram_link, *duplicate.source_links] if link and link not in known]
+        existing.source_links.extend(new_links)
+        return bool(new_links)
+
+    def merge_duplicate_event(self, canonical: CalendarEvent, duplicate: CalendarEvent) -> bool:
+        """
+        Fold a duplicate into the canonical event: keep its links and fill in missing details.
+        Returns True if a detail pushed to Google Calendar (location, end) changed.
+        """
+        self.merge_source_links(canonical, duplicate)
+        details_changed = False
+        if not canonical.location and duplicate.location:
+            canonical.location = duplicate.location
+            details_changed = True
+        if canonical.end_date is None and duplicate.end_date is not None:
+            canonical.end_date = duplicate.end_date
+            details_changed = True
+        canonical.confidence_score = max(canonical.confidence_score, duplicate.confidence_score)
+        return details_changed
 
     async def extract_text_from_media(self, file_path: str) -> tuple[Optional[str], Optional[str]]:
-        """Extracts text from a given file path (PDF or image)."""
+        """Extracts text from a given file path (PDF or image), sharing the work between identical files."""
+        file_ext = os.path.splitext(file_path)[1].lower()
+        try:
+            digest = await asyncio.to_thread(self.file_digest, file_path)
+        except OSError as e:
+            logger.error(f"Could not read media file {file_path}: {e}")
+            return None, None
+        return await self.media_in_flight.do(
+            (digest, file_ext), lambda: asyncio.to_thread(self._extract_text_from_file, file_path))
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _extract_text_from_file(self, file_path: str) -> tuple[Optional[str], Optional[str]]:
+        """Blocking PDF parsing / OCR, run in a worker thread."""
         source_type = None
         text = None
         file_ext = os.path.splitext(file_path)[1].lower()
 
         if file_ext == '.pdf':
             try:
-                doc = fitz.open(file_path)
-                text = "\n".join(page.get_text() for page in doc)
+                import fitz  # PyMuPDF
+                with MEDIA_EXTRACT_SECONDS.time(type='pdf'):
+                    doc = fitz.open(file_path)
+                    # Form feeds keep page boundaries for the document chunker
+                    text = "\f".join(page.get_text() for page in doc)
                 source_type = "pdf"
                 logger.info(f"Extracted text from PDF ({len(text)} chars)")
             except Exception as e:
                 logger.error(f"PDF extraction failed: {e}")
         elif file_ext in ['.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.webp']:
             try:
-                img = Image.open(file_path)
-                text = pytesseract.image_to_string(img)
+                import pytesseract
+                from PIL import Image
+                with MEDIA_EXTRACT_SECONDS.time(type='image'):
+                    img = Image.open(file_path)
+                    text = pytesseract.image_to_string(img)
                 source_type = "image"
                 logger.info(f"Extracted text from image ({len(text)} chars)")
             except Exception as e:
@@ -1140,7 +2170,12 @@ class TelegramCalendarSync:
                 return web.json_response({'error': 'Could not extract text from file or unsupported file type.'}, status=400)
 
             reference_date = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-            extracted_events = await self.llm_extractor.extract_events(text, reference_date)
+            try:
+                extracted_events = await self.llm_extractor.extract_events(text, reference_date, source_type)
+            except ExtractionUnavailable as e:
+                # Nobody will retry an upload; answer with what the rules found
+                logger.warning(f"LLM unavailable for uploaded file {filename}, using rule-based events")
+                extracted_events = e.fallback_events
             
             events = []
             for event in extracted_events:
@@ -1154,7 +2189,8 @@ class TelegramCalendarSync:
                     logger.info(f"Extracted event from upload: {event.title}")
 
             if events:
-                self.save_events(events, force_flush=True)
+                # store_lock may be held by a worker's save; wait for it off the event loop
+                await asyncio.to_thread(self.save_events, events, True)
                 logger.info(f"Saved {len(events)} events from uploaded file {filename}")
 
             os.unlink(tmp_path)
@@ -1172,279 +2208,732 @@ class TelegramCalendarSync:
             if event_id is None:
                 return web.json_response({'error': 'eventId is required'}, status=400)
             
+            # Workers may hold store_lock for a whole save; wait for it off the event loop
+            await asyncio.to_thread(self.dismiss_event, event_id)
+
+            return web.json_response({'status': 'success'})
+        except Exception as e:
+            logger.error(f"Error dismissing event: {e}", exc_info=True)
+            return web.json_response({'error': str(e)}, status=500)
+
+    def dismiss_event(self, event_id):
+        # Workers may be renumbering dismissals at the same time
+        with self.store_lock:
+            stamp = self.store_stamp()
             # Load existing dismissed events
             dismissed_file = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'dismissed_events.json')
             dismissed_events = []
-            
+
             if os.path.exists(dismissed_file):
                 try:
                     with open(dismissed_file, 'r') as f:
                         dismissed_events = json.load(f)
                 except:
                     dismissed_events = []
-            
+
             # Add new dismissed event if not already there
             if event_id not in dismissed_events:
                 dismissed_events.append(event_id)
-                
+
                 # Save updated dismissed events
                 with open(dismissed_file, 'w') as f:
                     json.dump(dismissed_events, f)
-                
+                if isinstance(event_id, int):
+                    self.update_search_index(stamp, dismissed=[event_id])
+
                 logger.info(f"Event {event_id} dismissed")
-            
-            return web.json_response({'status': 'success'})
-        except Exception as e:
-            logger.error(f"Error dismissing event: {e}", exc_info=True)
-            return web.json_response({'error': str(e)}, status=500)
+
+    def clear_dismissed_events(self):
+        dismissed_file = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'dismissed_events.json')
+        with self.store_lock:
+            if os.path.exists(dismissed_file):
+                stamp = self.store_stamp()
+                os.remove(dismissed_file)
+                self.update_search_index(stamp, clear_dismissed=True)
+                logger.info("All dismissed events cleared")
 
     async def handle_clear_dismissed(self, request: web.Request) -> web.Response:
         """Handle clearing all dismissed events."""
         try:
-            dismissed_file = os.path.join(os.path.dirname(CALENDAR_OUTPUT_PATH), 'dismissed_events.json')
-            
             # Remove the dismissed events file
-            if os.path.exists(dismissed_file):
-                os.remove(dismissed_file)
-                logger.info("All dismissed events cleared")
-            
+            await asyncio.to_thread(self.clear_dismissed_events)
             return web.json_response({'status': 'success'})
         except Exception as e:
             logger.error(f"Error clearing dismissed events: {e}", exc_info=True)
             return web.json_response({'error': str(e)}, status=500)
 
-    async def process_message(self, message, group_name: str) -> List[CalendarEvent]:
-        """Process a single message and extract calendar events using LLM"""
-        events = []
-        
-        # Skip if already processed
-        message_key = f"{group_name}_{message.id}"
-        if message_key in self.processed_messages:
-            logger.debug(f"Skipping already processed message {message_key}")
-            return events
-        
-
+    def build_telegram_link(self, message) -> str:
+        """Link to a message: https://t.me/{username}/{id} for public groups, https://t.me/c/{chat_id}/{id} for private supergroups"""
+        try:
+            if hasattr(message, 'chat') and hasattr(message.chat, 'username') and message.chat.username:
+                return f"https://t.me/{message.chat.username}/{message.id}"
+            elif hasattr(message, 'chat') and hasattr(message.chat, 'id'):
+                chat_id = str(message.chat.id)
+                if chat_id.startswith("-100"):
+                    return f"https://t.me/c/{chat_id[4:]}/{message.id}"
+        except Exception as e:
+            logger.error(f"Failed to build telegram link: {e}")
+        return ""
+
+    async def process_message(self, message, group_name: str, album: Optional[List[Any]] = None) -> List[CalendarEvent]:
+        """Process a single message (or all parts of an album) and extract calendar events using LLM"""
+        with tracer.span('process_message', group=group_name, message_id=message.id), \
+                MESSAGES_IN_FLIGHT.track_inprogress():
+            return await self._process_message(message, group_name, album)
+
+    async def collect_message_texts(self, parts: List[Any]) -> tuple[List[str], List[str]]:
+        """Message text plus the text of any PDF or image, for each part of a message."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            return await self.texts_from_parts(await self.download_message_parts(parts, tmpdir))
+
+    async def download_message_parts(self, parts: List[Any], directory: str) -> List[Tuple[str, Optional[str]]]:
+        """Text and downloaded attachment (None if there is none) of each part of a message."""
+        contents = []
+        for message in parts:
+            file_path = None
+            try:
+                if getattr(message, 'media', None):
+                    part_directory = os.path.join(directory, str(message.id))
+                    os.makedirs(part_directory, exist_ok=True)
+                    throttle = self.accounts.owner_of_peer(getattr(message, 'chat_id', None)).throttle
+                    with tracer.span('download_media'), MEDIA_DOWNLOAD_SECONDS.time():
+                        file_path = await throttle.call('download_media', message.download_media, file=part_directory)
+                    if file_path:
+                        logger.info(f"Downloaded media to {file_path}")
+            except Exception as e:
+                logger.error(f"Media download error: {e}")
+            contents.append((message.text or "", file_path))
+        return contents
 
-        text = message.text or ""
+    async def texts_from_parts(self, contents: List[Tuple[str, Optional[str]]]) -> tuple[List[str], List[str]]:
+        """Texts to extract from, with their source types, given the text and attachment of each part."""
         extracted_texts = []
         extracted_types = []
-        if text.strip():
-            extracted_texts.append(text)
-            extracted_types.append("text")
+        for text, file_path in contents:
+            if text.strip():
+                extracted_texts.append(text)
+                extracted_types.append("text")
 
-        # --- Media extraction: PDF and images ---
-        try:
-            if getattr(message, 'media', None):
-                with tempfile.TemporaryDirectory() as tmpdir:
-                    file_path = await message.download_media(file=tmpdir)
-                    if file_path:
-                        logger.info(f"Downloaded media to {file_path}")
+            # --- Media extraction: PDF and images ---
+            if file_path:
+                try:
+                    with tracer.span('extract_text', file=os.path.basename(file_path)):
                         media_text, media_type = await self.extract_text_from_media(file_path)
-                        if media_text and media_type:
-                            extracted_texts.append(media_text)
-                            extracted_types.append(media_type)
-        except Exception as e:
-            logger.error(f"Media extraction error: {e}")
+                    if media_text and media_type:
+                        extracted_texts.append(media_text)
+                        extracted_types.append(media_type)
+                except Exception as e:
+                    logger.error(f"Media extraction error: {e}")
+
+        if len(contents) > 1 and len(extracted_texts) > 1:
+            # One extraction for the whole album: the caption and every attachment read together
+            ALBUM_PARTS.observe(len(contents))
+            media_types = [t for t in extracted_types if t != "text"]
+            extracted_texts = ["\n\n".join(extracted_texts)]
+            extracted_types = [media_types[0] if media_types else "text"]
+        return extracted_texts, extracted_types
+
+    async def queue_message_job(self, parts: List[Any], group_name: str, message_key: str, edited: bool = False):
+        """
+        Ingest role: download a message's attachments and queue it for an extraction worker.
+
+        The job carries everything a worker needs without a Telegram connection.
+        Jobs of the same message run in order, so an edit is never applied
+        before the original message was extracted.
+        """
+        message = parts[0]
+        job_key = f"{message_key}@{self.message_hashes[message_key]}" if edited else message_key
+        directory = os.path.join(WORK_MEDIA_PATH, hashlib.sha1(job_key.encode('utf-8')).hexdigest()[:16])
+        contents = await self.download_message_parts(parts, directory)
+        if not any(text.strip() or file_path for text, file_path in contents) and not edited:
+            shutil.rmtree(directory, ignore_errors=True)
+            logger.debug(f"No text or media in message from {group_name}")
+            return
+        queued = self.work_queue.put(job_key, {
+            'key': message_key,
+            'group': group_name,
+            'message_id': message.id,
+            'date': message.date.replace(tzinfo=timezone.utc).isoformat(),
+            'link': self.build_telegram_link(message),
+            'parts': contents,
+            'media_dir': directory,
+            'edited': edited,
+        }, ordering_key=message_key)
+        if queued:
+            logger.debug(f"Queued {job_key} for extraction")
+
+    async def _process_message(self, message, group_name: str, album: Optional[List[Any]] = None) -> List[CalendarEvent]:
+        events = []
+        # An album is keyed and linked by its first part
+        parts = sorted(album, key=lambda m: m.id) if album else [message]
+        message = parts[0]
+
+        # Skip if already processed
+        message_key = f"{group_name}_{message.id}"
+        if self.is_processed(group_name, message.id):
+            logger.debug(f"Skipping already processed message {message_key}")
+            return events
+        if message_key in self.llm_retry_queue:
+            logger.debug(f"Skipping message {message_key}, it is waiting for LLM re-extraction")
+            return events
+        part_keys = [f"{group_name}_{part.id}" for part in parts]
+        self.message_hashes[message_key] = self.message_digest(parts)
+        if self.work_queue is not None:
+            # Marked processed once queued: the job itself is durable
+            await self.queue_message_job(parts, group_name, message_key)
+            self.processed_messages.update(part_keys)
+            return events
 
+        extracted_texts, extracted_types = await self.collect_message_texts(parts)
         if not any(t.strip() for t in extracted_texts):
             logger.debug(f"No text or extractable media in message from {group_name}")
-            self.processed_messages.add(message_key)
+            self.processed_messages.update(part_keys)
             return events
 
         try:
             # Use message date as reference point for relative dates
             message_date = message.date.replace(tzinfo=timezone.utc)
-            reference_date = message_date.strftime('%Y-%m-%d')
-            for idx, text_variant in enumerate(extracted_texts):
-                logger.debug(f"Sending to LLM for extraction: {text_variant[:500]}...")
-                extracted_events = await self.llm_extractor.extract_events(text_variant, reference_date)
-                logger.debug(f"LLM returned {len(extracted_events)} potential events")
-                for event in extracted_events:
-                    event.source_group = group_name
-                    event.source_message_id = message.id
-                    event.source_type = extracted_types[idx] if idx < len(extracted_types) else "text"
-                    # Telegram link: https://t.me/c/{chat_id}/{message_id} (for private/supergroups)
-                    # or https://t.me/{username}/{message_id} (for public groups)
-                    try:
-                        if hasattr(message, 'chat') and hasattr(message.chat, 'username') and message.chat.username:
-                            event.telegram_link = f"https://t.me/{message.chat.username}/{message.id}"
-                        elif hasattr(message, 'chat') and hasattr(message.chat, 'id'):
-                            chat_id = str(message.chat.id)
-                            if chat_id.startswith("-100"):
-                                event.telegram_link = f"https://t.me/c/{chat_id[4:]}/{message.id}"
-                    except Exception as e:
-                        logger.error(f"Failed to build telegram link: {e}")
-                    if not event.description:
-                        event.description = text_variant[:500]
-                    if (event.confidence_score >= 0.5 and 
-                        event.start_date.replace(tzinfo=timezone.utc) >= message_date - timedelta(days=1)):
-                        events.append(event)
-                        logger.info(f"Extracted event: {event.title} on {event.start_date.strftime('%Y-%m-%d %H:%M')} (confidence: {event.confidence_score:.2f})")
-                    else:
-                        logger.debug(f"Rejected event: {event.title} (confidence: {event.confidence_score:.2f}, date: {event.start_date})")
+            message_link = self.build_telegram_link(message)
+            events = await self.extract_message_events(
+                group_name, message.id, message_date, message_link, extracted_texts, extracted_types, message_key)
+        except ExtractionUnavailable:
+            # Not marked processed: the retry task re-extracts it once a provider answers again
+            self.queue_llm_retry(message_key, group_name, message.id, message_date, message_link,
+                                 extracted_texts, extracted_types)
+            return []
         except Exception as e:
             logger.error(f"Error processing message: {e}", exc_info=True)
 
-        # Mark message as processed
-        self.processed_messages.add(message_key)
+        # Mark message (every part of an album) as processed
+        self.processed_messages.update(part_keys)
 
         if not events:
             logger.debug(f"No events found in message from {group_name}")
 
         return events
+
+    async def process_edited_message(self, message, group_name: str,
+                                     album: Optional[List[Any]] = None) -> Optional[List[CalendarEvent]]:
+        """
+        Re-extract an edited message (or album) and replace the events it produced.
+
+        Edits also arrive for reactions, pins and link previews, so nothing is
+        re-extracted unless the hash of the text and attachments changed.
+        Returns the new events, or None if the content is unchanged.
+        """
+        parts = sorted(album, key=lambda m: m.id) if album else [message]
+        message = parts[0]
+        message_key = f"{group_name}_{message.id}"
+        digest = self.message_digest(parts)
+        if self.message_hashes.get(message_key) == digest:
+            MESSAGE_EDITS.inc(outcome='unchanged')
+            logger.debug(f"Edit of {message_key} did not change its content")
+            return None
+        self.message_hashes[message_key] = digest
+        logger.info(f"Message {message_key} was edited, re-extracting its events")
+
+        # The edited text must not be matched against its own earlier version
+        self.near_duplicates.discard_variants(message_key)
+        if self.llm_retry_queue.pop(message_key, None) is not None:
+            self.save_llm_retry_queue()
+        if self.work_queue is not None:
+            await self.queue_message_job(parts, group_name, message_key, edited=True)
+            self.processed_messages.update(f"{group_name}_{part.id}" for part in parts)
+            MESSAGE_EDITS.inc(outcome='queued')
+            return []
+        extracted_texts, extracted_types = await self.collect_message_texts(parts)
+        message_date = message.date.replace(tzinfo=timezone.utc)
+        message_link = self.build_telegram_link(message)
+        events = []
+        if any(t.strip() for t in extracted_texts):
+            try:
+                events = await self.extract_message_events(
+                    group_name, message.id, message_date, message_link, extracted_texts, extracted_types, message_key)
+            except ExtractionUnavailable:
+                # Keep the old events until the retry task can replace them
+                self.queue_llm_retry(message_key, group_name, message.id, message_date, message_link,
+                                     extracted_texts, extracted_types, edited=True)
+                MESSAGE_EDITS.inc(outcome='queued')
+                return []
+        self.processed_messages.update(f"{group_name}_{part.id}" for part in parts)
+        self.replace_message_events(group_name, message.id, events, message_link)
+        MESSAGE_EDITS.inc(outcome='reextracted')
+        return events
+
+    async def extract_message_events(self, group_name: str, message_id: int, message_date: datetime, message_link: str,
+                                     extracted_texts: List[str], extracted_types: List[str], message_key: str,
+                                     use_fallback: bool = False) -> List[CalendarEvent]:
+        """
+        Extract, attribute and filter the events in each text of a message (body, PDF, OCR).
+
+        Raises ExtractionUnavailable if the LLM is down, unless use_fallback is
+        set, in which case the rule-based events are used instead.
+        """
+        token = extraction_group.set(group_name)
+        try:
+            return await self._extract_message_events(group_name, message_id, message_date, message_link,
+                                                      extracted_texts, extracted_types, message_key, use_fallback)
+        finally:
+            extraction_group.reset(token)
+            self.group_stats.flush_if_due()
+
+    async def _extract_message_events(self, group_name: str, message_id: int, message_date: datetime,
+                                      message_link: str, extracted_texts: List[str], extracted_types: List[str],
+                                      message_key: str, use_fallback: bool) -> List[CalendarEvent]:
+        events = []
+        reference_date = message_date.strftime('%Y-%m-%d')
+        self.group_stats.record(group_name, messages=1)
+        for idx, text_variant in enumerate(extracted_texts):
+            # A text with relative dates only matches reposts from the same day
+            scope = date_scope(text_variant, reference_date)
+            duplicate = self.near_duplicates.find(text_variant, scope=scope)
+            if duplicate is not None:
+                # Repost with small edits: link this message to the earlier events instead of re-extracting
+                NEAR_DUPLICATE_HITS.inc()
+                logger.info(f"Message {message_key} is a near-duplicate of {duplicate.key}, reusing its {len(duplicate.payload)} events")
+                for original in duplicate.payload:
+                    linked = original.copy(source_links=list(original.source_links))
+                    if message_link and message_link != original.telegram_link:
+                        linked.source_links.append(message_link)
+                    events.append(linked)
+                continue
+
+            logger.debug("Sending to LLM for extraction: %.500s...", text_variant)
+            with tracer.span('llm_extract', source_type=extracted_types[idx]) as span:
+                try:
+                    extracted_events = await self.llm_extractor.extract_events(
+                        text_variant, reference_date, extracted_types[idx])
+                except ExtractionUnavailable as e:
+                    if not use_fallback:
+                        raise
+                    RULE_EXTRACTIONS.inc(outcome='fallback')
+                    logger.warning(f"LLM still unavailable for {message_key}, using {len(e.fallback_events)} rule-based events")
+                    extracted_events = e.fallback_events
+                span.set_attribute('events', len(extracted_events))
+            logger.debug(f"LLM returned {len(extracted_events)} potential events")
+            variant_events = []
+            for event in extracted_events:
+                event.source_group = group_name
+                event.source_message_id = message_id
+                event.source_type = extracted_types[idx] if idx < len(extracted_types) else "text"
+                event.telegram_link = message_link
+                if not event.description:
+                    event.description = text_variant[:500]
+                if (event.confidence_score >= 0.5 and 
+                    event.start_date.replace(tzinfo=timezone.utc) >= message_date - timedelta(days=1)):
+                    variant_events.append(event)
+                    EVENTS_EXTRACTED.inc(source_type=event.source_type)
+                    logger.info(f"Extracted event: {event.title} on {event.start_date.strftime('%Y-%m-%d %H:%M')} (confidence: {event.confidence_score:.2f})")
+                else:
+                    logger.debug(f"Rejected event: {event.title} (confidence: {event.confidence_score:.2f}, date: {event.start_date})")
+            events.extend(variant_events)
+            self.group_stats.record(group_name, events=len(variant_events),
+                                    confidence=sum(event.confidence_score for event in variant_events))
+            # No events may only mean this group's pre-filter kept the text from the LLM; a repost in
+            # another group must still get its own extraction
+            if variant_events or self.scheduler.prefilter(group_name) == PREFILTER_OFF:
+                self.near_duplicates.add(f"{message_key}_{idx}", text_variant, variant_events, scope=scope)
+        return events
     
-    async def scan_group_messages(self, group_identifier: str, limit: int = SCAN_LIMIT):
-        """Scan recent messages from a specific group"""
+    async def run_message_job(self, job: Job) -> List[CalendarEvent]:
+        """
+        Worker role: extract and store the events of a message queued by the ingest role.
+
+        Raises ExtractionUnavailable during an LLM outage, so the job is retried
+        later; like the LLM retry queue, a job older than LLM_RETRY_MAX_AGE_HOURS
+        settles for the rule-based events instead.
+        """
+        payload = job.payload
+        message_key = payload['key']
+        if payload['edited']:
+            # The edited text must not be matched against its own earlier version
+            self.near_duplicates.discard_variants(message_key)
+        extracted_texts, extracted_types = await self.texts_from_parts([tuple(part) for part in payload['parts']])
+        events = []
+        if any(t.strip() for t in extracted_texts):
+            expired = time.time() - job.created_at >= LLM_RETRY_MAX_AGE_HOURS * 3600
+            events = await self.extract_message_events(
+                payload['group'], payload['message_id'], datetime.fromisoformat(payload['date']), payload['link'],
+                extracted_texts, extracted_types, message_key, use_fallback=expired)
+        if payload['edited']:
+            self.replace_message_events(payload['group'], payload['message_id'], events, payload['link'])
+            MESSAGE_EDITS.inc(outcome='reextracted')
+        elif events:
+            self.save_events(events)
+        return events
+
+    async def run_worker(self, work_queue: WorkQueue, concurrency: int = WORKER_CONCURRENCY):
+        """Worker role: run jobs from the work queue, `concurrency` at a time, until cancelled."""
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        logger.info(f"Extraction worker {worker_id} started with {concurrency} slots")
+
+        async def keep_leased(job: Job, run: asyncio.Task):
+            while True:
+                await asyncio.sleep(work_queue.lease_seconds / 3)
+                if not work_queue.extend(job):
+                    # Another worker leased the job after ours ran out; it runs it from here
+                    run.cancel()
+                    return
+
+        async def slot():
+            while True:
+                job = work_queue.lease(worker_id)
+                if job is None:
+                    await asyncio.sleep(WORKER_POLL_INTERVAL)
+                    continue
+                run = asyncio.create_task(self.run_message_job(job))
+                heartbeat = asyncio.create_task(keep_leased(job, run))
+                try:
+                    with tracer.span('work_job', job=job.key), MESSAGES_IN_FLIGHT.track_inprogress():
+                        events = await run
+                    logger.info(f"Job {job.key} done with {len(events)} events")
+                except asyncio.CancelledError:
+                    if asyncio.current_task().cancelling() or not run.cancelled():
+                        raise
+                    logger.warning(f"Stopped job {job.key}: its lease was lost")
+                    continue
+                except ExtractionUnavailable:
+                    # Retried for as long as the outage lasts
+                    LLM_RETRIES.inc(outcome='queued')
+                    work_queue.retry(job, min(LLM_RETRY_INTERVAL * 2 ** job.outages, 3600), 'LLM unavailable',
+                                     outage=True)
+                    continue
+                except Exception as e:
+                    failures = job.failures + 1
+                    logger.error(f"Error running job {job.key} (failure {failures} of {WORK_MAX_ATTEMPTS}): {e}",
+                                 exc_info=True)
+                    if failures < WORK_MAX_ATTEMPTS:
+                        work_queue.retry(job, min(30 * 2 ** job.failures, 3600), str(e))
+                        continue
+                    if not work_queue.fail(job, str(e)):
+                        continue
+                else:
+                    if not work_queue.complete(job):
+                        # The worker that leased it again still needs the media
+                        continue
+                finally:
+                    heartbeat.cancel()
+                shutil.rmtree(job.payload['media_dir'], ignore_errors=True)
+
+        await asyncio.gather(*(slot() for _ in range(concurrency)))
+
+    def remember_group(self, group_identifier: str, entry: Dict[str, Any]):
+        peer_id = EntityCache.peer_id(entry)
+        self.group_titles[peer_id] = entry['title']
+        self.accounts.groups_by_peer[peer_id] = group_identifier
+
+    def group_title(self, group_identifier: str) -> str:
+        """The cached title of a configured group (the name its stats are kept under), else the identifier."""
+        entry = self.accounts.owner(group_identifier).entity_cache.get(group_identifier)
+        return entry['title'] if entry else group_identifier
+
+    async def refresh_group(self, group_identifier: str, account: Optional[TelegramAccount] = None) -> Dict[str, Any]:
+        """Resolve a configured group with get_entity and update the account's entity cache and group titles."""
+        account = account or self.accounts.owner(group_identifier)
+
+        async def resolve():
+            with tracer.span('get_entity', group=str(group_identifier)), \
+                    TELEGRAM_FETCH_SECONDS.time(operation='get_entity'):
+                chat = await account.throttle.call('get_entity', account.client.get_entity, group_identifier)
+            entry = account.entity_cache.store(group_identifier, chat)
+            account.entity_cache.save()
+            self.remember_group(group_identifier, entry)
+            return entry
+
+        # Scanning and monitoring may ask for the same group at once
+        return await account.entity_refreshes.do(group_identifier, resolve)
+
+    async def refresh_group_background(self, group_identifier: str, account: TelegramAccount):
         try:
-            logger.info(f"Scanning {limit} recent messages from {group_identifier}")
-            # Get the chat entity
-            chat = await self.client.get_entity(group_identifier)
-            group_name = getattr(chat, 'title', str(group_identifier))
+            await self.refresh_group(group_identifier, account)
+        except Exception as e:
+            logger.warning(f"Could not refresh cached entity for {group_identifier}: {e}")
+
+    async def resolve_group(self, group_identifier: str, account: Optional[TelegramAccount] = None) -> Dict[str, Any]:
+        """
+        Cached peer for a configured group, as seen by the account (its owner by default).
+
+        Only a group that was never resolved costs a get_entity round-trip;
+        entries older than ENTITY_CACHE_TTL_HOURS are returned as they are and
+        refreshed in the background.
+        """
+        account = account or self.accounts.owner(group_identifier)
+        entry = account.entity_cache.get(group_identifier)
+        if entry is None:
+            ENTITY_LOOKUPS.inc(outcome='miss')
+            return await self.refresh_group(group_identifier, account)
+        if account.entity_cache.is_stale(entry):
+            ENTITY_LOOKUPS.inc(outcome='stale')
+            asyncio.create_task(self.refresh_group_background(group_identifier, account))
+        else:
+            ENTITY_LOOKUPS.inc(outcome='hit')
+        self.remember_group(group_identifier, entry)
+        return entry
+
+    async def scan_group_messages(self, group_identifier: str, limit: int = SCAN_LIMIT,
+                                  account: Optional[TelegramAccount] = None):
+        """Scan recent messages from a specific group, newer than the account's checkpoint for it"""
+        from telethon.errors import ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError
+        account = account or self.accounts.owner(group_identifier)
+        try:
+            min_id = account.checkpoints.get(group_identifier)
+            logger.info(f"Scanning {limit} recent messages from {group_identifier}"
+                        + (f" newer than message {min_id}" if min_id else "")
+                        + (f" with account {account.name}" if len(self.accounts) > 1 else ""))
+            # Get the chat peer, from the entity cache when possible
+            entry = await self.resolve_group(group_identifier, account)
+            chat = EntityCache.input_peer(entry)
+            group_name = entry['title']
             all_events = []
             message_count = 0
+            newest_id = min_id
+
+            async def handle(parts):
+                message = parts[0]
+                with tracer.span('scan_message', group=group_name, message_id=message.id):
+                    events = await self.process_message(message, group_name, album=parts if len(parts) > 1 else None)
+                    if events:  # Only process if we found events
+                        all_events.extend(events)
+                        # Save events immediately when found
+                        self.save_events(events)
+                        observe_event_lag(message)
+                    # Always save processed messages after each message
+                    with tracer.span('save_processed_messages'):
+                        self.save_processed_messages()
+
+            # Album parts come back to back; they are held until the album is complete
+            album = []
             # Get recent messages
-            async for message in self.client.iter_messages(chat, limit=limit):
+            fetch_started = time.perf_counter()
+            async for message in account.throttle.iter_messages(account.client, chat, limit=limit, min_id=min_id):
+                TELEGRAM_FETCH_SECONDS.observe(time.perf_counter() - fetch_started, operation='iter_messages')
+                MESSAGES_FETCHED.inc(source='scan')
                 message_count += 1
-                events = await self.process_message(message, group_name)
-                if events:  # Only process if we found events
-                    all_events.extend(events)
-                    # Save events immediately when found
-                    self.save_events(events)
-                # Always save processed messages after each message
-                self.save_processed_messages()
+                newest_id = max(newest_id, message.id)
+                if album and message.grouped_id != album[0].grouped_id:
+                    await handle(album)
+                    album = []
+                if message.grouped_id:
+                    album.append(message)
+                else:
+                    await handle([message])
                 # Progress indicator
                 if message_count % 10 == 0:
                     logger.info(f"Processed {message_count}/{limit} messages from {group_name}, found {len(all_events)} events so far")
-                    await asyncio.sleep(0.5)  # Small delay to avoid rate limiting
+                fetch_started = time.perf_counter()
+            if album:
+                await handle(album)
+            # Only a scan that got through moves the checkpoint
+            account.checkpoints.advance(group_identifier, newest_id)
+            account.checkpoints.save()
             if all_events:
                 logger.info(f"Found total of {len(all_events)} calendar events in {group_name}")
             else:
                 logger.info(f"No calendar events found in {group_name}")
             return all_events
+        except (ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError) as e:
+            # The cached peer no longer works; resolve the group again next time
+            logger.error(f"Error scanning group {group_identifier}: {e}")
+            account.entity_cache.drop(group_identifier)
+            account.entity_cache.save()
+            return []
         except Exception as e:
             logger.error(f"Error scanning group {group_identifier}: {e}")
             return []
 
-    async def scan_all_groups(self):
-        """Scan all configured groups"""
+    async def scan_all_groups(self, limit: int = SCAN_LIMIT):
+        """
+        Scan all configured groups, SCAN_CONCURRENCY at a time on each account.
+
+        Groups that yield the most events are scanned first and deeper: the
+        scheduler scales `limit` per group.
+        """
         total_events = []
-        total_groups = len([g for g in TELEGRAM_GROUPS if g.strip()])
-        current_group = 0
-        
-        for group in TELEGRAM_GROUPS:
-            group = group.strip()
-            if group:
-                current_group += 1
-                logger.info(f"Processing group {current_group}/{total_groups}: {group}")
-                
-                events = await self.scan_group_messages(group)
-                if events:
-                    total_events.extend(events)
-                    # Save accumulated events from this group
-                    self.save_events(events, force_flush=True)
-                
-                self.save_processed_messages()
-                
-                # Show progress
-                logger.info(f"Progress: {current_group}/{total_groups} groups processed, {len(total_events)} total events found")
-                
-                # Delay between groups
-                if current_group < total_groups:
-                    await asyncio.sleep(1)
+        groups = [g.strip() for g in TELEGRAM_GROUPS if g.strip()]
+        total_groups = len(groups)
+        completed = 0
+        self.accounts.rebalance(groups)
+        # Pick up what the extraction workers counted since the last scan
+        self.group_stats.load()
+        groups.sort(key=lambda g: -self.scheduler.priority(self.group_title(g)))
+        # Each account has its own FloodWait budget, so each gets its own scan slots
+        semaphores = {account.name: asyncio.Semaphore(max(SCAN_CONCURRENCY, 1)) for account in self.accounts}
+
+        async def scan(index: int, group: str):
+            nonlocal completed
+            account = self.accounts.owner(group)
+            for _ in range(len(self.accounts)):
+                async with semaphores[account.name]:
+                    logger.info(f"Processing group {index}/{total_groups}: {group}")
+                    group_limit = self.scheduler.scan_limit(self.group_title(group), limit)
+                    events = await self.scan_group_messages(group, limit=group_limit, account=account)
+                    if events:
+                        total_events.extend(events)
+                        # Save accumulated events from this group
+                        self.save_events(events, force_flush=True)
+
+                    self.save_processed_messages()
+                # The account was flood-limited or dropped mid-scan: finish the group on its new owner
+                moved = dict(self.accounts.rebalance([group]))
+                if group not in moved:
+                    break
+                account = moved[group]
+            completed += 1
+
+            # Show progress
+            logger.info(f"Progress: {completed}/{total_groups} groups processed, {len(total_events)} total events found")
+
+        # No fixed pauses between requests or groups: each account's throttle slows down only on FloodWait
+        await asyncio.gather(*(scan(index, group) for index, group in enumerate(groups, 1)))
         
         # Final save to ensure all events are persisted
         if total_events:
             self.save_events(total_events, force_flush=True)
+        self.group_stats.flush()
             
         logger.info(f"Completed scanning all groups. Total events found: {len(total_events)}")
         return total_events
     
+    async def process_live_message(self, parts: List[Any], chat_title: str):
+        """Extract and save a new message, or a whole album once the AlbumCollector has gathered it."""
+        message = parts[0]
+        with tracer.span('live_message', group=chat_title, message_id=message.id):
+            events = await self.process_message(message, chat_title, album=parts if len(parts) > 1 else None)
+            if events:
+                self.save_events(events)
+                observe_event_lag(message)
+            # Always save processed messages after each new message
+            with tracer.span('save_processed_messages'):
+                self.save_processed_messages()
+        if events:
+            logger.info(f"Processed new message with {len(events)} events")
+
+    async def fetch_album(self, chat, message, account: Optional[TelegramAccount] = None) -> List[Any]:
+        """Every part of the album a message belongs to (an album holds at most 10 messages)."""
+        account = account or self.accounts.primary
+        nearby = await account.throttle.call('get_messages', account.client.get_messages, chat,
+                                             ids=list(range(message.id - 9, message.id + 10)))
+        return [m for m in nearby if m is not None and m.grouped_id == message.grouped_id] or [message]
+
+    async def catch_up_group(self, group_identifier: str, account: TelegramAccount):
+        """Scan a group on its new owner, for the messages missed while it moved over."""
+        events = await self.scan_group_messages(group_identifier, account=account)
+        if events:
+            self.save_events(events, force_flush=True)
+        self.save_processed_messages()
+
+    async def shard_supervisor_task(self, groups: List[str]):
+        """Reconnect dropped accounts and move groups off accounts that are disconnected or flood-limited."""
+        while True:
+            await asyncio.sleep(SHARD_CHECK_INTERVAL)
+            try:
+                for account in self.accounts:
+                    if account.authorized and not account.client.is_connected():
+                        logger.warning(f"Telegram account {account.name} is disconnected, reconnecting")
+                        try:
+                            await account.client.connect()
+                        except Exception as e:
+                            logger.error(f"Could not reconnect Telegram account {account.name}: {e}")
+                for group, account in self.accounts.rebalance(groups):
+                    asyncio.create_task(self.catch_up_group(group, account))
+            except Exception as e:
+                logger.error(f"Error checking Telegram accounts: {e}")
+
+    def add_message_handlers(self, account: TelegramAccount, chats: List[int]):
+        """Register the new-message and edit handlers on an account's client."""
+        from telethon import events
+
+        @account.client.on(events.NewMessage(chats=chats))
+        async def handler(event):
+            # Every account in a group receives its messages; only the group's owner handles them
+            if self.accounts.owner_of_peer(event.chat_id) is not account:
+                return
+            try:
+                chat_title = self.group_titles.get(event.chat_id) or getattr(event.chat, 'title', 'Unknown')
+                logger.info(f"New message received from {chat_title}")
+                MESSAGES_FETCHED.inc(source='live')
+                if event.message.grouped_id:
+                    # Part of an album: extracted together with the other parts once they have arrived
+                    self.albums.add(event.message, chat_title)
+                else:
+                    await self.process_live_message([event.message], chat_title)
+            except Exception as e:
+                logger.error(f"Error handling new message: {e}")
+
+        @account.client.on(events.MessageEdited(chats=chats))
+        async def edit_handler(event):
+            if self.accounts.owner_of_peer(event.chat_id) is not account:
+                return
+            try:
+                chat_title = self.group_titles.get(event.chat_id) or getattr(event.chat, 'title', 'Unknown')
+                album = await self.fetch_album(event.chat_id, event.message, account) if event.message.grouped_id else None
+                with tracer.span('edited_message', group=chat_title, message_id=event.message.id):
+                    events = await self.process_edited_message(event.message, chat_title, album)
+                    if events is not None:
+                        with tracer.span('save_processed_messages'):
+                            self.save_processed_messages()
+                if events is not None:
+                    logger.info(f"Re-extracted edited message with {len(events)} events")
+            except Exception as e:
+                logger.error(f"Error handling edited message: {e}")
+
     async def start_monitoring(self):
-        """Start real-time monitoring of all groups"""
+        """Start real-time monitoring of all groups, on every connected account"""
         try:
             logger.info("Starting real-time monitoring...")
-            
-            # Get all chat entities
-            chats = []
-            for group in TELEGRAM_GROUPS:
-                group = group.strip()
-                if group:
+            groups = [g.strip() for g in TELEGRAM_GROUPS if g.strip()]
+
+            async def watch(account: TelegramAccount) -> bool:
+                # Marked peer IDs from the entity cache; Telethon needs no round-trip to filter on them
+                chats = []
+                for group in groups:
                     try:
-                        chat = await self.client.get_entity(group)
-                        chats.append(chat)
-                        logger.info(f"Monitoring group: {getattr(chat, 'title', str(group))}")
+                        entry = await self.resolve_group(group, account)
+                        chats.append(EntityCache.peer_id(entry))
+                        account.unreachable.discard(group)
+                        logger.info(f"Monitoring group: {entry['title']}"
+                                    + (f" on account {account.name}" if len(self.accounts) > 1 else ""))
                     except Exception as e:
+                        # Not a member (or banned): the group goes to another account
+                        account.unreachable.add(group)
                         logger.error(f"Could not add group {group} to monitoring: {e}")
-            
-            if not chats:
+                if chats:
+                    self.add_message_handlers(account, chats)
+                return bool(chats)
+
+            connected = [account for account in self.accounts if account.client.is_connected()]
+            watching = await asyncio.gather(*(watch(account) for account in connected))
+            monitoring = [account for account, ok in zip(connected, watching) if ok]
+
+            if not monitoring:
                 logger.error("No valid groups to monitor")
                 return
-            
-            @self.client.on(events.NewMessage(chats=chats))
-            async def handler(event):
-                try:
-                    chat_title = getattr(event.chat, 'title', 'Unknown')
-                    logger.info(f"New message received from {chat_title}")
-                    events = await self.process_message(event.message, chat_title)
-                    if events:
-                        self.save_events(events)
-                    # Always save processed messages after each new message
-                    self.save_processed_messages()
-                    if events:
-                        logger.info(f"Processed new message with {len(events)} events")
-                except Exception as e:
-                    logger.error(f"Error handling new message: {e}")
-            
+
+            # Groups an account turned out not to reach move now, and their new owner catches up on them
+            for group, account in self.accounts.rebalance(groups):
+                asyncio.create_task(self.catch_up_group(group, account))
+            waits = [account.client.run_until_disconnected() for account in monitoring]
+            if len(self.accounts) > 1:
+                waits.append(self.shard_supervisor_task(groups))
+
             logger.info("Real-time monitoring started. Press Ctrl+C to stop.")
-            await self.client.run_until_disconnected()
-            
+            await asyncio.gather(*waits)
+
         except Exception as e:
             logger.error(f"Error in monitoring: {e}")
-    
+
     async def run_web_server(self):
         """Run the aiohttp web server."""
-        # Add middleware for request logging and CORS
-        @web.middleware
-        async def logging_middleware(request, handler):
-            logger.info(f"API Request: {request.method} {request.path} (Raw URL: {request.raw_path})")
-            logger.info(f"Headers: {dict(request.headers)}")
-            logger.info(f"Remote: {request.remote} - Forwarded: {request.headers.get('X-Forwarded-For', 'None')}")
-            try:
-                response = await handler(request)
-                logger.info(f"API Response: {request.path} - Status: {response.status}")
-                return response
-            except Exception as e:
-                logger.error(f"API Error: {request.path} - Error: {e}")
-                raise
-        
-        @web.middleware
-        async def cors_middleware(request, handler):
-            # Handle CORS preflight OPTIONS request
-            if request.method == "OPTIONS":
-                headers = {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                    'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Requested-With',
-                    'Access-Control-Max-Age': '86400'
-                }
-                return web.Response(headers=headers)
-                
-            # Process regular request
-            response = await handler(request)
-            # Add CORS headers to every response
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With'
-            return response
-        
-        # Create application with middleware
-        self.web_app.middlewares.extend([logging_middleware, cors_middleware])
-        
-        runner = web.AppRunner(self.web_app)
+        # access_log_middleware logs requests; aiohttp's own access log would add a line to every one
+        runner = web.AppRunner(self.web_app, access_log=None)
         await runner.setup()
         site = web.TCPSite(runner, '0.0.0.0', 8080)
         await site.start()
         logger.info("Started web server on port 8080")
+        # Only now, so the Google API client import and authentication do not delay the listener
+        self.start_google_calendar()
+        # Catch the search index up with events written while no API process was running
+        asyncio.create_task(asyncio.to_thread(self.refresh_search_index))
         
         # Log available routes
         routes = [route for route in self.web_app.router.routes()]
@@ -1457,48 +2946,65 @@ class TelegramCalendarSync:
         # Start the reminder task in the background
         asyncio.create_task(self.reminder_task())
 
-    async def run(self, scan_recent: bool = True, monitor: bool = True):
+    async def connect_account(self, account: TelegramAccount):
+        """Connect an account with silent authentication, signing in with its code the first time."""
+        from telethon.errors import SessionPasswordNeededError
+        await account.client.connect()
+
+        if not await account.client.is_user_authorized():
+            if not account.code:
+                raise ValueError(f"A login code is required for first-time auth of account {account.name} "
+                                 f"(TELEGRAM_CODE, or \"code\" in TELEGRAM_ACCOUNTS)")
+
+            try:
+                # First request the code, which will be sent to the user's phone
+                sent_code = await account.client.send_code_request(account.phone)
+                # Then sign in with the code and the returned phone_code_hash
+                await account.client.sign_in(
+                    phone=account.phone,
+                    code=account.code,
+                    phone_code_hash=sent_code.phone_code_hash
+                )
+            except SessionPasswordNeededError:
+                if not account.password:
+                    raise ValueError(f"2FA is enabled but no password was provided for account {account.name}")
+                await account.client.sign_in(password=account.password)
+        account.authorized = True
+
+    async def run(self, scan_recent: bool = True, monitor: bool = True, scan_limit: int = SCAN_LIMIT):
         """Main run method"""
         try:
             logger.info("Starting Telegram Calendar Sync...")
             
             # Validate configuration
-            if not API_ID or not API_HASH or not PHONE_NUMBER:
-                raise ValueError("Missing required Telegram credentials")
+            for account in self.accounts:
+                if not account.api_id or not account.api_hash or not account.phone:
+                    raise ValueError(f"Missing required Telegram credentials for account {account.name}")
             
             if not TELEGRAM_GROUPS or not any(g.strip() for g in TELEGRAM_GROUPS):
                 raise ValueError("No Telegram groups configured")
             
             if not OPENAI_API_KEY and not ANTHROPIC_API_KEY and not GROQ_API_KEY:
-                raise ValueError("No LLM API key provided (OpenAI, Anthropic, or Groq required)")
+                logger.warning("No LLM API key provided (OpenAI, Anthropic, or Groq); using rule-based extraction only")
             
-            # Connect to Telegram with silent authentication
+            # Connect every account; the groups of one that cannot log in go to the others
             try:
-                await self.client.connect()
-                
-                if not await self.client.is_user_authorized():
-                    if not TELEGRAM_CODE:
-                        raise ValueError("TELEGRAM_CODE environment variable required for first-time auth")
-                        
+                for account in self.accounts:
                     try:
-                        # First request the code, which will be sent to the user's phone
-                        sent_code = await self.client.send_code_request(PHONE_NUMBER)
-                        # Then sign in with the code and the returned phone_code_hash
-                        await self.client.sign_in(
-                            phone=PHONE_NUMBER,
-                            code=TELEGRAM_CODE,
-                            phone_code_hash=sent_code.phone_code_hash
-                        )
-                    except SessionPasswordNeededError:
-                        if not TELEGRAM_2FA_PASSWORD:
-                            raise ValueError("2FA is enabled but TELEGRAM_2FA_PASSWORD not provided")
-                        await self.client.sign_in(password=TELEGRAM_2FA_PASSWORD)
-                
-                logger.info("Connected to Telegram successfully")
+                        await self.connect_account(account)
+                        logger.info(f"Connected to Telegram successfully as account {account.name}")
+                    except Exception as e:
+                        if len(self.accounts) == 1:
+                            raise
+                        logger.error(f"Telegram authentication error for account {account.name}: {e}")
+                        await account.client.disconnect()
+                if not any(account.authorized for account in self.accounts):
+                    raise ValueError("No Telegram account could log in")
+                await self.start_google_calendar()
                 
                 if scan_recent:
                     logger.info("Scanning recent messages...")
-                    await self.scan_all_groups()
+                    await self.scan_all_groups(limit=scan_limit)
                 
                 if monitor:
                     logger.info("Starting real-time monitoring...")
@@ -1512,23 +3018,108 @@ class TelegramCalendarSync:
             logger.error(f"Error in main run: {e}")
             raise
 
-async def main():
-    """Main entry point"""
+async def main(role: str = 'all'):
+    """
+    Main entry point.
+
+    'all' runs everything in this process. The other roles split it into
+    processes sharing the data directory: 'ingest' (the Telegram client,
+    queuing messages), 'worker' (extraction; run as many as wanted), 'api'
+    (the web server) and 'scheduler' (reminders and archiving old events).
+    """
     sync = TelegramCalendarSync()
-    
-    # Register reminder task to start on web app startup
-    sync.web_app.on_startup.append(sync.start_reminder_background)
-    
-    # Create tasks to run concurrently
-    tasks = [
-        sync.run(scan_recent=True, monitor=True),
-        sync.run_web_server()
-    ]
-    
-    # Run all tasks concurrently
-    await asyncio.gather(*tasks)
+    logger.info(f"Running as role: {role}")
+
+    if role == 'api':
+        work_queue = WorkQueue(WORK_QUEUE_PATH, lease_seconds=WORK_LEASE_SECONDS)
+        WORK_QUEUE_SIZE.set_function(lambda: len(work_queue))
+        await sync.run_web_server()
+    elif role == 'ingest':
+        sync.work_queue = WorkQueue(WORK_QUEUE_PATH, lease_seconds=WORK_LEASE_SECONDS)
+        # This process owns processed_messages.json and the LLM retry queue left by an 'all' process
+        asyncio.create_task(sync.llm_retry_task())
+        asyncio.create_task(sync.compaction_task(events=False))
+        await sync.run(scan_recent=True, monitor=True)
+    elif role == 'worker':
+        await sync.start_google_calendar()
+        await sync.run_worker(WorkQueue(WORK_QUEUE_PATH, lease_seconds=WORK_LEASE_SECONDS))
+    elif role == 'scheduler':
+        await sync.start_google_calendar()
+        await asyncio.gather(sync.reminder_task(), sync.compaction_task(processed=False))
+    else:
+        # Register reminder task to start on web app startup
+        sync.web_app.on_startup.append(sync.start_reminder_background)
+        sync.web_app.on_startup.append(sync.start_llm_retry_background)
+        sync.web_app.on_startup.append(sync.start_compaction_background)
+
+        # Create tasks to run concurrently
+        tasks = [
+            sync.run(scan_recent=True, monitor=True),
+            sync.run_web_server()
+        ]
+
+        # Run all tasks concurrently
+        await asyncio.gather(*tasks)
+
+async def profile_scan(limit: int, output_path: str):
+    """Scan up to `limit` messages per group under the sampling profiler, without monitoring"""
+    sync = TelegramCalendarSync()
+    with SamplingProfiler(interval=PROFILE_SAMPLE_INTERVAL).profile(output_path):
+        await sync.run(scan_recent=True, monitor=False, scan_limit=limit)
+    for account in sync.accounts:
+        await account.client.disconnect()
+
+async def import_export(export_path: str):
+    """Extract events from a Telegram Desktop export (result.json) without connecting to Telegram"""
+    if not OPENAI_API_KEY and not ANTHROPIC_API_KEY and not GROQ_API_KEY:
+        logger.warning("No LLM API key provided (OpenAI, Anthropic, or Groq); using rule-based extraction only")
+    sync = TelegramCalendarSync()
+    await sync.start_google_calendar()
+    await import_telegram_export(sync, export_path, os.path.dirname(CALENDAR_OUTPUT_PATH), IMPORT_BATCH_SIZE)
+
+async def backfill(since: Optional[str] = None):
+    """
+    Extract the configured groups' history back to `since` (YYYY-MM-DD) through takeout sessions.
+
+    Without `since`, each group goes back BACKFILL_DAYS scaled by its yield (see AdaptiveScheduler.depth).
+    """
+    if since:
+        floor = datetime.fromisoformat(since).replace(tzinfo=timezone.utc)
+    else:
+        floor = (datetime.now(timezone.utc) - timedelta(days=BACKFILL_DAYS)).replace(hour=0, minute=0, second=0, microsecond=0)
+    sync = TelegramCalendarSync()
+    await sync.run(scan_recent=False, monitor=False)
+    try:
+        groups = [g.strip() for g in TELEGRAM_GROUPS if g.strip()]
+        await backfill_history(sync, groups, floor, os.path.dirname(CALENDAR_OUTPUT_PATH),
+                               BACKFILL_BATCH_SIZE, BACKFILL_CONCURRENCY, adaptive=since is None)
+    finally:
+        for account in sync.accounts:
+            await account.client.disconnect()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Telegram Calendar Sync with LLM Event Extraction")
+    parser.add_argument('--profile', action='store_true',
+                        help='Run a bounded scan under a statistical profiler and exit')
+    parser.add_argument('--profile-limit', type=int, default=20,
+                        help='Messages to scan per group in --profile mode (default: 20)')
+    parser.add_argument('--profile-output', default=PROFILE_OUTPUT_PATH,
+                        help='Where to write the folded-stack profile (flamegraph.pl / speedscope input)')
+    parser.add_argument('--import-export', metavar='PATH',
+                        help='Import a Telegram Desktop chat export (result.json or its folder) and exit')
+    parser.add_argument('--role', choices=['all', 'ingest', 'api', 'worker', 'scheduler'],
+                        default=os.getenv('ROLE', 'all'),
+                        help='Part of the service to run in this process (default: all, or $ROLE)')
+    parser.add_argument('--backfill', action='store_true',
+                        help='Extract the groups\' history through Telegram takeout sessions and exit')
+    parser.add_argument('--backfill-since', metavar='YYYY-MM-DD',
+                        help=f'How far back --backfill goes (default: {BACKFILL_DAYS} days, or $BACKFILL_DAYS)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Archive past events, prune bookkeeping files and exit')
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     logger.info("Telegram Calendar Sync with LLM Event Extraction")
     logger.info("Configuration:")
     logger.info(f"  Groups: {len([g for g in TELEGRAM_GROUPS if g.strip()])}")
@@ -1546,7 +3137,16 @@ if __name__ == "__main__":
     logger.info(f"  Output: {CALENDAR_OUTPUT_PATH}")
     
     try:
-        asyncio.run(main())
+        if args.import_export:
+            asyncio.run(import_export(args.import_export))
+        elif args.backfill:
+            asyncio.run(backfill(args.backfill_since))
+        elif args.compact:
+            TelegramCalendarSync().compact()
+        elif args.profile:
+            asyncio.run(profile_scan(args.profile_limit, args.profile_output))
+        else:
+            asyncio.run(main(args.role))
     except KeyboardInterrupt:
         logger.info("Shutting down...")
     except Exception as e:
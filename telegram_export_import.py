@@ -0,0 +1,217 @@
+import os
+import re
+import json
+import codecs
+import shutil
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # Bytes read from the export per step
+MESSAGES_ARRAY_RE = re.compile(r'"messages"\s*:\s*\[')
+CHANNEL_TYPES = {'private_supergroup', 'public_supergroup', 'private_channel', 'public_channel'}
+
+
+class ExportFormatError(ValueError):
+    """Raised when a file does not look like a Telegram Desktop chat export."""
+
+
+def iter_export_messages(path: str, start_offset: int = 0) -> Tuple[Dict[str, Any], Iterator[Tuple[int, Dict[str, Any]]]]:
+    """
+    Stream a Telegram Desktop result.json without loading it into memory.
+
+    Args:
+        path: Path to result.json (single chat export)
+        start_offset: Byte offset of a message element to resume from (0 = start)
+
+    Returns:
+        Tuple of (chat header dict with name/type/id, iterator of (byte offset after message, message dict))
+    """
+    decoder = json.JSONDecoder()
+    header_text, array_offset = _read_header(path)
+    header = {}
+    for key in ('name', 'type', 'id'):
+        match = re.search(rf'"{key}"\s*:\s*', header_text)
+        if match:
+            header[key] = decoder.raw_decode(header_text, match.end())[0]
+
+    def messages() -> Iterator[Tuple[int, Dict[str, Any]]]:
+        with open(path, 'rb') as f:
+            f.seek(start_offset or array_offset)
+            utf8 = codecs.getincrementaldecoder('utf-8')()
+            buffer = ''
+            pos = 0
+            byte_offset = f.tell()  # Byte offset of buffer[pos] in the file
+            eof = False
+            while True:
+                # Skip separators between array elements (all single-byte characters)
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                    pos += 1
+                    byte_offset += 1
+                if pos < len(buffer):
+                    if buffer[pos] == ']':
+                        return
+                    try:
+                        message, end = decoder.raw_decode(buffer, pos)
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise ExportFormatError(f"Truncated or invalid message at byte {byte_offset} in {path}")
+                    else:
+                        byte_offset += len(buffer[pos:end].encode('utf-8'))
+                        pos = end
+                        yield byte_offset, message
+                        continue
+                elif eof:
+                    return
+                # Need more data: drop the consumed prefix and append the next chunk
+                chunk = f.read(CHUNK_SIZE)
+                eof = not chunk
+                buffer = buffer[pos:] + utf8.decode(chunk, final=eof)
+                pos = 0
+
+    return header, messages()
+
+
+def _read_header(path: str) -> Tuple[str, int]:
+    """Return the text before the messages array and the byte offset of its first element."""
+    header_bytes = b''
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(64 * 1024)
+            if not chunk:
+                raise ExportFormatError(f"No \"messages\" array found in {path}")
+            header_bytes += chunk
+            text = header_bytes.decode('utf-8', errors='ignore')
+            match = MESSAGES_ARRAY_RE.search(text)
+            if match:
+                return text[:match.start()], len(text[:match.end()].encode('utf-8'))
+            if len(header_bytes) > 16 * 1024 * 1024:
+                raise ExportFormatError(f"{path} looks like a full account export; export a single chat instead")
+
+
+def flatten_text(text: Any) -> str:
+    """Telegram exports rich text as a list of plain strings and {"type", "text"} entities."""
+    if isinstance(text, str):
+        return text
+    if isinstance(text, list):
+        return ''.join(part if isinstance(part, str) else part.get('text', '') for part in text)
+    return ''
+
+
+class ExportChat:
+    """Chat metadata shaped like the Telethon entity attributes process_message reads"""
+
+    def __init__(self, header: Dict[str, Any]):
+        self.title = header.get('name') or 'Imported chat'
+        raw_id = int(header.get('id', 0) or 0)
+        self.id = int(f"-100{raw_id}") if header.get('type') in CHANNEL_TYPES and raw_id > 0 else raw_id
+        self.username = None
+
+
+class ExportedMessage:
+    """Adapter exposing an exported message through the Telethon Message surface used by process_message"""
+
+    def __init__(self, data: Dict[str, Any], chat: ExportChat, export_dir: str):
+        self.id = data['id']
+        self.chat = chat
+        self.chat_id = chat.id
+        self.text = flatten_text(data.get('text'))
+        self.message = self.text
+        self.grouped_id = None
+        if data.get('date_unixtime'):
+            self.date = datetime.fromtimestamp(int(data['date_unixtime']), tz=timezone.utc)
+        else:
+            self.date = datetime.fromisoformat(data['date']).replace(tzinfo=timezone.utc)
+        self.media_path = None
+        for key in ('file', 'photo'):
+            relative = data.get(key)
+            # Skipped media is recorded as "(File not included. Change data exporting settings to download.)"
+            if relative and not relative.startswith('('):
+                candidate = os.path.join(export_dir, relative)
+                if os.path.exists(candidate):
+                    self.media_path = candidate
+                    break
+        self.media = self.media_path
+
+    async def download_media(self, file: Optional[str] = None) -> Optional[str]:
+        if not self.media_path:
+            return None
+        target = os.path.join(file, os.path.basename(self.media_path)) if file and os.path.isdir(file) else file
+        return shutil.copy(self.media_path, target or os.path.basename(self.media_path))
+
+
+class ImportCheckpoint:
+    """Byte offset and last message ID of an import, persisted after each committed batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.last_message_id = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                self.offset = data.get('offset', 0)
+                self.last_message_id = data.get('last_message_id', 0)
+            except Exception as e:
+                logger.error(f"Error loading import checkpoint {path}: {e}")
+
+    def save(self, offset: int, last_message_id: int):
+        self.offset = offset
+        self.last_message_id = last_message_id
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'offset': offset, 'last_message_id': last_message_id,
+                       'updated_at': datetime.now(timezone.utc).isoformat()}, f)
+        os.replace(tmp_path, self.path)
+
+
+async def import_telegram_export(sync, export_path: str, checkpoint_dir: str, batch_size: int = 200) -> int:
+    """
+    Feed a Telegram Desktop export through TelegramCalendarSync.process_message.
+
+    Events, processed message IDs and the checkpoint are written together every
+    `batch_size` messages, so an interrupted import resumes after the last batch.
+
+    Returns:
+        Number of events extracted
+    """
+    if os.path.isdir(export_path):
+        export_path = os.path.join(export_path, 'result.json')
+    export_dir = os.path.dirname(os.path.abspath(export_path))
+
+    header, _ = iter_export_messages(export_path)
+    chat = ExportChat(header)
+    checkpoint = ImportCheckpoint(os.path.join(checkpoint_dir, f"import_checkpoint_{abs(chat.id) or chat.title}.json"))
+    if checkpoint.offset:
+        logger.info(f"Resuming import of {chat.title} after message {checkpoint.last_message_id}")
+    _, messages = iter_export_messages(export_path, checkpoint.offset)
+
+    total_events = 0
+    pending_events = []
+    scanned = 0
+    offset, last_id = checkpoint.offset, checkpoint.last_message_id
+
+    def commit():
+        sync.save_events(pending_events)
+        sync.save_processed_messages()
+        checkpoint.save(offset, last_id)
+        pending_events.clear()
+
+    for offset, data in messages:
+        if data.get('type') != 'message' or data['id'] <= checkpoint.last_message_id:
+            continue
+        message = ExportedMessage(data, chat, export_dir)
+        events = await sync.process_message(message, chat.title)
+        pending_events.extend(events)
+        total_events += len(events)
+        scanned += 1
+        last_id = message.id
+        if scanned % batch_size == 0:
+            commit()
+            logger.info(f"Imported {scanned} messages from {chat.title}, found {total_events} events so far")
+    commit()
+    logger.info(f"Finished importing {scanned} messages from {chat.title}: {total_events} events")
+    return total_events
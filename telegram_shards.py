@@ -0,0 +1,207 @@
+import json
+import bisect
+import hashlib
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from metrics import REGISTRY
+from entity_cache import EntityCache
+from single_flight import SingleFlight
+from telegram_throttle import FloodThrottle, throttled_client_class
+
+logger = logging.getLogger(__name__)
+
+GROUP_REASSIGNMENTS = REGISTRY.counter(
+    'telegram_group_reassignments_total', 'Groups moved to another Telegram account, by new owner', ['account'])
+
+
+class HashRing:
+    """
+    Consistent hashing of keys onto named nodes.
+
+    Each node sits at `replicas` points on the ring and a key belongs to the
+    first node clockwise from its hash. Taking a node out moves only the keys
+    it owned, spread over the others, and putting it back returns exactly
+    those keys.
+    """
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 64):
+        self._points: List[Tuple[int, str]] = sorted(
+            (self._hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self._hashes = [point for point, _ in self._points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+    def nodes_for(self, key: str) -> Iterator[str]:
+        """Every node, in the order the key falls back to them."""
+        start = bisect.bisect(self._hashes, self._hash(key))
+        seen: Set[str] = set()
+        for i in range(len(self._points)):
+            node = self._points[(start + i) % len(self._points)][1]
+            if node not in seen:
+                seen.add(node)
+                yield node
+
+
+class ScanCheckpoints:
+    """
+    Newest message ID scanned in each group, persisted per account.
+
+    A later scan only asks Telegram for messages above it. Kept per account
+    because message IDs in basic groups are numbered per member.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, int] = {}
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except Exception as e:
+            logger.error(f"Error loading scan checkpoints: {e}")
+            self.entries = {}
+
+    def save(self):
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(self.entries, f)
+        except Exception as e:
+            logger.error(f"Error saving scan checkpoints: {e}")
+
+    def get(self, group: str) -> int:
+        return self.entries.get(group, 0)
+
+    def advance(self, group: str, message_id: int):
+        if message_id > self.entries.get(group, 0):
+            self.entries[group] = message_id
+
+
+class TelegramAccount:
+    """
+    One Telegram login and the state tied to it: the client, its FloodWait
+    budget, the peers it resolved (access hashes differ between accounts) and
+    how far it has scanned each group.
+
+    Telethon is imported when the client is first used.
+    """
+
+    def __init__(self, name: str, session_path: str, api_id: int, api_hash: str, phone: str,
+                 entity_cache_path: str, checkpoints_path: str, code: str = '', password: str = '',
+                 throttle_max_delay: float = 10.0, max_flood_wait: float = float('inf'),
+                 flood_sleep_threshold: int = 0, entity_ttl_seconds: float = 24 * 3600):
+        self.name = name
+        self.session_path = session_path
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.phone = phone
+        self.code = code
+        self.password = password
+        self.throttle = FloodThrottle(max_delay=throttle_max_delay, account=name, max_wait=max_flood_wait,
+                                      sleep_threshold=flood_sleep_threshold)
+        self.entity_cache = EntityCache(entity_cache_path, ttl_seconds=entity_ttl_seconds)
+        self.entity_cache.load()
+        self.entity_refreshes = SingleFlight('get_entity')
+        self.checkpoints = ScanCheckpoints(checkpoints_path)
+        self.checkpoints.load()
+        # Set once the account has logged in
+        self.authorized = False
+        # Configured groups this account could not resolve (not a member, or banned)
+        self.unreachable: Set[str] = set()
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Telethon's own flood_sleep_threshold for requests outside the throttle (login, reconnects)
+            self._client = throttled_client_class()(self.session_path, self.api_id, self.api_hash)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def is_available(self, max_flood_wait: float) -> bool:
+        """Logged in, connected and not held by a FloodWait longer than max_flood_wait."""
+        return (self.authorized and self._client is not None and self._client.is_connected()
+                and self.throttle.blocked_for() <= max_flood_wait)
+
+
+class AccountPool:
+    """
+    Configured groups spread over Telegram accounts by consistent hashing.
+
+    A group belongs to the first account on its ring path that is available
+    and can see the group. rebalance() recomputes the assignment: groups of an
+    account that is disconnected or flood-limited for longer than
+    max_flood_wait move to the next account, and move back once it recovers.
+    """
+
+    def __init__(self, accounts: List[TelegramAccount], max_flood_wait: float):
+        if not accounts:
+            raise ValueError("No Telegram accounts configured")
+        self.accounts = accounts
+        self.by_name = {account.name: account for account in accounts}
+        self.max_flood_wait = max_flood_wait
+        self.ring = HashRing(self.by_name)
+        # Configured group -> name of the account scanning and monitoring it
+        self.assignments: Dict[str, str] = {}
+        # Marked peer ID -> configured group, filled in as groups are resolved
+        self.groups_by_peer: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def __iter__(self) -> Iterator[TelegramAccount]:
+        return iter(self.accounts)
+
+    @property
+    def primary(self) -> TelegramAccount:
+        return self.accounts[0]
+
+    def available(self) -> List[TelegramAccount]:
+        return [account for account in self.accounts if account.is_available(self.max_flood_wait)]
+
+    def preferred(self, group: str) -> TelegramAccount:
+        """The account that should own the group right now."""
+        fallback = None
+        for name in self.ring.nodes_for(group):
+            account = self.by_name[name]
+            if group in account.unreachable:
+                continue
+            if account.is_available(self.max_flood_wait):
+                return account
+            fallback = fallback or account
+        # Nobody usable: stay with the first candidate and wait its FloodWait out
+        return fallback or self.primary
+
+    def owner(self, group: str) -> TelegramAccount:
+        """The account the group is currently assigned to."""
+        name = self.assignments.get(group)
+        return self.by_name[name] if name else self.assign(group)
+
+    def owner_of_peer(self, peer_id: Optional[int]) -> TelegramAccount:
+        group = self.groups_by_peer.get(peer_id)
+        return self.owner(group) if group else self.primary
+
+    def assign(self, group: str) -> TelegramAccount:
+        account = self.preferred(group)
+        self.assignments[group] = account.name
+        return account
+
+    def rebalance(self, groups: Iterable[str]) -> List[Tuple[str, TelegramAccount]]:
+        """Reassign groups whose preferred account changed; returns (group, new owner) for each move."""
+        moved = []
+        for group in groups:
+            previous = self.assignments.get(group)
+            account = self.assign(group)
+            if previous is not None and previous != account.name:
+                GROUP_REASSIGNMENTS.inc(account=account.name)
+                logger.warning(f"Group {group} moved from account {previous} to {account.name}")
+                moved.append((group, account))
+        return moved
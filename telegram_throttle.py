@@ -0,0 +1,155 @@
+import time
+import asyncio
+import logging
+import functools
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+FLOOD_WAITS = REGISTRY.counter(
+    'telegram_flood_waits_total', 'FloodWait errors returned by Telegram', ['account', 'operation'])
+FLOOD_WAIT_SECONDS = REGISTRY.counter(
+    'telegram_flood_wait_seconds_total', 'Seconds Telegram asked us to wait', ['account', 'operation'])
+THROTTLE_DELAY = REGISTRY.gauge(
+    'telegram_throttle_delay_seconds', 'Current spacing between Telegram requests', ['account'])
+
+# flood_sleep_threshold of the requests made inside FloodThrottle.call / iter_messages (None outside them)
+_sleep_threshold: ContextVar[Optional[int]] = ContextVar('flood_sleep_threshold', default=None)
+
+
+@functools.lru_cache(maxsize=None)
+def throttled_client_class():
+    """
+    TelegramClient whose requests made through a FloodThrottle use the
+    throttle's sleep_threshold, so their FloodWaits reach the throttle.
+    Everything else (connecting, logging in, catching up after a reconnect)
+    keeps the client's own flood_sleep_threshold and sleeps short waits out.
+    """
+    from telethon import TelegramClient
+
+    class ThrottledTelegramClient(TelegramClient):
+        async def _call(self, sender, request, ordered=False, flood_sleep_threshold=None):
+            if flood_sleep_threshold is None:
+                flood_sleep_threshold = _sleep_threshold.get()
+            return await super()._call(sender, request, ordered=ordered, flood_sleep_threshold=flood_sleep_threshold)
+
+    return ThrottledTelegramClient
+
+
+class FloodThrottle:
+    """
+    Request pacing for one Telegram account, shared by every scanner and handler.
+
+    Requests go out at full speed until Telegram answers with a FloodWait.
+    Then every caller pauses for exactly the requested time, and requests are
+    spaced `delay` seconds apart. The spacing doubles on each further FloodWait
+    (up to max_delay) and decays again with every successful request.
+
+    A FloodWait longer than max_wait is raised instead of waited out, so a
+    caller with another account to turn to does not sit on this one. Requests
+    made through the throttle on a throttled_client_class() client let
+    Telethon sleep through FloodWaits only up to sleep_threshold seconds.
+    """
+
+    def __init__(self, max_delay: float = 10.0, max_retries: int = 5, decay: float = 0.8,
+                 account: str = 'default', max_wait: float = float('inf'), sleep_threshold: int = 0):
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.decay = decay
+        self.account = account
+        self.max_wait = max_wait
+        self.sleep_threshold = sleep_threshold
+        self.delay = 0.0
+        self.blocked_until = 0.0
+        self._next_slot = 0.0
+        THROTTLE_DELAY.set(0, account=account)
+
+    def blocked_for(self) -> float:
+        """Seconds until the last FloodWait is over (0 if it already is)."""
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    async def acquire(self):
+        """Wait for this caller's turn: after any FloodWait and `delay` after the previous request."""
+        now = time.monotonic()
+        if self.blocked_until - now > self.max_wait:
+            # Still inside a FloodWait too long to wait out: fail like the request itself would
+            from telethon.errors import FloodWaitError
+            raise FloodWaitError(request=None, capture=int(self.blocked_until - now))
+        start = max(now, self.blocked_until, self._next_slot)
+        self._next_slot = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def on_flood_wait(self, seconds: float, operation: str):
+        FLOOD_WAITS.inc(account=self.account, operation=operation)
+        FLOOD_WAIT_SECONDS.inc(seconds, account=self.account, operation=operation)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.delay = min(max(self.delay * 2, 0.5), self.max_delay)
+        THROTTLE_DELAY.set(self.delay, account=self.account)
+        logger.warning(f"Telegram FloodWait of {seconds}s on {operation} for account {self.account}; "
+                       f"spacing requests {self.delay:.2f}s apart")
+
+    def on_success(self):
+        if self.delay:
+            self.delay = self.delay * self.decay if self.delay > 0.05 else 0.0
+            THROTTLE_DELAY.set(self.delay, account=self.account)
+
+    async def call(self, operation: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs), waiting out and retrying FloodWait errors."""
+        from telethon.errors import FloodWaitError  # Imported with the first request, not at startup
+        for attempt in range(self.max_retries + 1):
+            await self.acquire()
+            token = _sleep_threshold.set(self.sleep_threshold)
+            try:
+                result = await fn(*args, **kwargs)
+            except FloodWaitError as e:
+                self.on_flood_wait(e.seconds, operation)
+                if attempt == self.max_retries or e.seconds > self.max_wait:
+                    raise
+                continue
+            finally:
+                _sleep_threshold.reset(token)
+            self.on_success()
+            return result
+
+    async def iter_messages(self, client, entity, limit: Optional[int] = None, offset_id: int = 0,
+                            **kwargs) -> AsyncIterator[Any]:
+        """
+        client.iter_messages that survives FloodWait errors.
+
+        After a FloodWait the history is re-requested from just below the last
+        message already yielded, so nothing is skipped or delivered twice.
+        """
+        from telethon.errors import FloodWaitError
+        remaining = limit
+        failures = 0
+        while remaining is None or remaining > 0:
+            await self.acquire()
+            try:
+                # wait_time spaces Telethon's own GetHistory batches while we are being throttled
+                messages = client.iter_messages(
+                    entity, limit=remaining, offset_id=offset_id, wait_time=self.delay, **kwargs)
+                while True:
+                    # Only around the fetch: the caller's code between messages runs in this context too
+                    token = _sleep_threshold.set(self.sleep_threshold)
+                    try:
+                        message = await messages.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        _sleep_threshold.reset(token)
+                    offset_id = message.id
+                    if remaining is not None:
+                        remaining -= 1
+                    failures = 0
+                    yield message
+                self.on_success()
+                return
+            except FloodWaitError as e:
+                failures += 1
+                self.on_flood_wait(e.seconds, 'iter_messages')
+                if failures > self.max_retries or e.seconds > self.max_wait:
+                    raise
@@ -0,0 +1,100 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from calendar_event import CalendarEvent
+from event_search import EventSearchIndex
+
+JUNE = datetime(2025, 6, 12, 18, 0, tzinfo=timezone.utc)
+
+
+def event(title, start=JUNE, hours=2, description='', location='', group='Devs'):
+    return CalendarEvent(title=title, start_date=start, end_date=start + timedelta(hours=hours) if hours else None,
+                         description=description, location=location, source_group=group)
+
+
+def ts(value: datetime) -> int:
+    return int(value.timestamp())
+
+
+@pytest.fixture
+def index(tmp_path):
+    return EventSearchIndex(str(tmp_path / 'events_search.sqlite3'))
+
+
+def titles(page):
+    results, _ = page
+    return [result['title'] for result in results]
+
+
+def test_last_word_matches_as_prefix(index):
+    index.rebuild([event('Python workshop'), event('Python meetup'), event('Work party')], [], 's')
+    assert titles(index.search('python work')) == ['Python workshop']
+    assert sorted(titles(index.search('wor'))) == ['Python workshop', 'Work party']
+    # Earlier words must match whole
+    assert titles(index.search('pyth workshop')) == []
+
+
+def test_best_match_ranks_first_however_many_newer_matches(index):
+    # The title match is the oldest of more matches than any page or candidate window
+    events = [event('Python night'), *(event(f'Talk {i}', description='python') for i in range(600))]
+    index.rebuild(events, [], 's')
+    results, more = index.search('python', limit=5)
+    assert results[0]['title'] == 'Python night' and more
+    everything, more = index.search('python', limit=1000)
+    assert len(everything) == 601 and not more
+    assert [r['id'] for r in index.search('python', limit=10, offset=10)[0]] == [r['id'] for r in everything[10:20]]
+
+
+def test_date_and_group_filters(index):
+    index.rebuild([
+        event('Python June', group='Devs'),
+        event('Python July', start=JUNE + timedelta(days=30), group='Devs'),
+        event('Python other group', group='Designers'),
+    ], [], 's')
+    june = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    in_june = titles(index.search('python', start_ts=ts(june), end_ts=ts(june + timedelta(days=29))))
+    assert sorted(in_june) == ['Python June', 'Python other group']
+    assert titles(index.search('python', groups=['Designers'])) == ['Python other group']
+    assert titles(index.search('python', start_ts=ts(june), end_ts=ts(june + timedelta(days=29)),
+                               groups=['Devs'])) == ['Python June']
+    # The range keeps events overlapping it, not only those starting in it
+    evening = ts(JUNE + timedelta(hours=1))
+    assert len(titles(index.search('python', start_ts=evening, end_ts=evening + 60))) == 2
+
+
+def test_dismissed_events_leave_results_and_conflicts(index):
+    index.rebuild([event('Python talk'), event('Python drinks', hours=1)], [], 's')
+    index.set_dismissed([0])
+    assert titles(index.search('python')) == ['Python drinks']
+    assert sorted(titles(index.search('python', include_dismissed=True))) == ['Python drinks', 'Python talk']
+    results, _ = index.overlapping(ts(JUNE), ts(JUNE))
+    assert [(r['id'], r['conflicts']) for r in results] == [(1, 0)]
+    index.set_dismissed([0], False)
+    results, _ = index.overlapping(ts(JUNE), ts(JUNE))
+    assert [(r['id'], r['conflicts']) for r in results] == [(0, 1), (1, 1)]
+
+
+def test_overlapping_and_conflict_counts_follow_updates(index):
+    index.rebuild([
+        event('Talk', hours=2),
+        event('Drinks', start=JUNE + timedelta(hours=1), hours=2),
+        event('Breakfast', start=JUNE + timedelta(hours=15), hours=None),
+    ], [], 's')
+    results, more = index.overlapping(ts(JUNE), ts(JUNE + timedelta(days=1)))
+    assert [(r['title'], r['conflicts']) for r in results] == [('Talk', 1), ('Drinks', 1), ('Breakfast', 0)]
+    assert not more
+    # An event without an end only overlaps ranges containing its start
+    assert titles(index.overlapping(ts(JUNE + timedelta(hours=3)), ts(JUNE + timedelta(hours=14)))) == []
+    # Moving the talk onto breakfast moves the conflict with it
+    index.upsert([(0, event('Talk', start=JUNE + timedelta(hours=15)))])
+    results, _ = index.overlapping(ts(JUNE), ts(JUNE + timedelta(days=1)))
+    assert [(r['title'], r['conflicts']) for r in results] == [('Drinks', 0), ('Talk', 1), ('Breakfast', 1)]
+    # Dropping an event on renumbering releases its conflicts
+    index.renumber({1: 0, 2: 1})
+    results, _ = index.overlapping(ts(JUNE), ts(JUNE + timedelta(days=1)))
+    assert [(r['id'], r['title'], r['conflicts']) for r in results] == [(0, 'Drinks', 0), (1, 'Breakfast', 0)]
@@ -0,0 +1,64 @@
+import os
+import sys
+import asyncio
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+
+import telegram_calendar_sync as tcs
+from mock_servers import MockAPIServer
+
+TEXT = 'Open day 2030-06-12 at 10:00'
+DOCUMENT = 'Programme 2030-06-12 10:00\n' + 'Talks and workshops all day. ' * 200
+
+
+def extract(monkeypatch, provider: str, text: str, source_type: str = 'text', stream: bool = True,
+            unsure_models=(), **models):
+    """Run one extraction against the mock server; returns the events and the server's request counts."""
+    monkeypatch.setattr(tcs, 'LLM_STREAM_RESPONSES', stream)
+    # Keep the rule-based fast path out of the way
+    monkeypatch.setattr(tcs, 'RULE_FAST_PATH_CONFIDENCE', 2.0)
+
+    async def run():
+        mock = MockAPIServer(latency=0, jitter=0, unsure_models=unsure_models)
+        base = await mock.start()
+        try:
+            monkeypatch.setattr(tcs, 'OPENAI_API_BASE', f'{base}/openai/v1')
+            monkeypatch.setattr(tcs, 'GROQ_API_BASE', f'{base}/groq/openai/v1')
+            extractor = tcs.LLMEventExtractor()
+            extractor.openai_key = extractor.groq_key = extractor.anthropic_key = ''
+            setattr(extractor, f'{provider}_key', 'key')
+            extractor.models[provider].update(models)
+            events = await extractor.extract_events(text, '2030-06-01', source_type)
+            return events, mock
+        finally:
+            await mock.stop()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('stream', [True, False])
+def test_long_document_goes_to_the_default_strong_model(monkeypatch, stream):
+    events, mock = extract(monkeypatch, 'openai', DOCUMENT, 'pdf', stream=stream)
+    assert [event.start_date.isoformat() for event in events] == ['2030-06-12T10:00:00+00:00']
+    assert mock.requests['openai'] == 1 and not mock.errors
+
+
+def test_legacy_strong_model_is_not_sent_json_mode(monkeypatch):
+    events, mock = extract(monkeypatch, 'openai', DOCUMENT, 'pdf', strong='gpt-4')
+    assert len(events) == 1 and not mock.errors
+
+
+def test_unsure_fast_answer_escalates(monkeypatch):
+    events, mock = extract(monkeypatch, 'openai', TEXT, unsure_models={tcs.OPENAI_FAST_MODEL})
+    assert mock.requests['openai'] == 2
+    assert [event.confidence_score for event in events] == [0.9]
+
+
+@pytest.mark.parametrize('stream', [True, False])
+def test_groq_escalation(monkeypatch, stream):
+    events, mock = extract(monkeypatch, 'groq', TEXT, stream=stream, unsure_models={'gemma2-9b-it'}, fast='gemma2-9b-it')
+    assert mock.requests['groq'] == 2 and not mock.errors
+    assert [event.confidence_score for event in events] == [0.9]
@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rule_extractor import RuleBasedExtractor
+
+REFERENCE = '2025-06-20'
+
+
+def extract_one(text: str, dayfirst: bool = True):
+    events = RuleBasedExtractor(dayfirst=dayfirst).extract(text, REFERENCE)
+    assert len(events) == 1, events
+    return events[0]
+
+
+@pytest.mark.parametrize('text, date, time', [
+    ('Workshop 05.07 18:00', '2025-07-05', '18:00'),
+    ('Workshop 30.11 at 10:00', '2025-11-30', '10:00'),
+    ('Meeting on 31.12 at 9', '2025-12-31', '09:00'),
+    ('Talk 5.7.26 at 18:00', '2026-07-05', '18:00'),
+    ('Talk 05.07.2025 18:00', '2025-07-05', '18:00'),
+])
+def test_dotted_dates(text, date, time):
+    event = extract_one(text)
+    assert (event['start_date'], event.get('start_time')) == (date, time)
+
+
+@pytest.mark.parametrize('text, date', [
+    ('Workshop 05/07 18:00', '2025-07-05'),
+    ('Workshop 30/11 18:00', '2025-11-30'),
+    ('Workshop 05/07/26 18:00', '2026-07-05'),
+])
+def test_slash_dates(text, date):
+    assert extract_one(text)['start_date'] == date
+
+
+def test_month_first():
+    assert extract_one('Workshop 07.05 18:00', dayfirst=False)['start_date'] == '2025-07-05'
+    assert extract_one('Workshop 07/05 18:00', dayfirst=False)['start_date'] == '2025-07-05'
+
+
+@pytest.mark.parametrize('text', ['Meetup 2025-07-05 18:00', 'Meetup on 2025-7-5 at 18:00'])
+def test_iso_dates(text):
+    event = extract_one(text)
+    assert event['start_date'] == '2025-07-05'
+    assert event['confidence_score'] >= 0.9
+
+
+def test_invalid_dates_are_skipped():
+    assert RuleBasedExtractor().extract('Talk 31.02 at 18:00', REFERENCE) == []
+    assert RuleBasedExtractor().extract('Meetup 18.30', REFERENCE) == []
+
+
+def test_bare_afternoon_hour():
+    assert extract_one('Call me at 5 tomorrow')['start_time'] == '17:00'
+    assert extract_one('Meetup tomorrow at 18')['start_time'] == '18:00'
+
+
+def test_reports_of_the_past_score_low():
+    assert extract_one('We scored 3-2 today, meeting was great')['confidence_score'] < 0.5
+    assert extract_one('Party tomorrow!')['confidence_score'] >= 0.5
+
+
+@pytest.mark.parametrize('text', [
+    'Meeting cancelled: 05.07 at 18:00',
+    'Workshop on 12 May 2025 is CANCELED',
+    'Meetup postponed to 12.07 at 18:00',
+    "Tomorrow's talk won't take place",
+])
+def test_cancellations_yield_no_events(text):
+    assert RuleBasedExtractor().extract(text, REFERENCE) == []
+
+
+@pytest.mark.parametrize('text, title, date, time', [
+    ('Meeting on 12 May 2026 at 9am', 'Meeting', '2026-05-12', '09:00'),
+    ('Python meetup (June 12, 2026, 6-8pm) at the hub', 'Python meetup at the hub', '2026-06-12', '18:00'),
+    ('Workshop 05.07 18:00', 'Workshop', '2025-07-05', '18:00'),
+    ('Tomorrow at 18:00\nBoard games night', 'Board games night', '2025-06-21', '18:00'),
+])
+def test_dates_and_times_are_cut_from_titles(text, title, date, time):
+    event = extract_one(text)
+    assert (event['title'], event['start_date'], event['start_time']) == (title, date, time)
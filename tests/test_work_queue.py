@@ -0,0 +1,126 @@
+import os
+import sys
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import work_queue
+from work_queue import WorkQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(work_queue, 'time', SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return WorkQueue(str(tmp_path / 'queue.sqlite3'), lease_seconds=60)
+
+
+def test_put_is_idempotent_per_key(queue):
+    assert queue.put('a', {'n': 1})
+    assert not queue.put('a', {'n': 2})
+    assert len(queue) == 1
+    assert queue.lease('w1').payload == {'n': 1}
+
+
+def test_leased_job_is_not_handed_out_twice(queue):
+    queue.put('a', {})
+    assert queue.lease('w1').key == 'a'
+    assert queue.lease('w2') is None
+
+
+def test_expired_lease_is_taken_over_and_counts_as_failure(queue, clock):
+    queue.put('a', {})
+    first = queue.lease('w1')
+    clock.now += 61
+    second = queue.lease('w2')
+    assert (second.key, second.attempts, second.failures) == ('a', 2, 1)
+    # The first worker lost the job: none of its operations apply any more
+    assert not queue.extend(first)
+    assert not queue.complete(first)
+    assert not queue.retry(first, 0)
+    assert not queue.fail(first, 'boom')
+    assert len(queue) == 1
+    assert queue.complete(second)
+    assert len(queue) == 0
+
+
+def test_extend_keeps_the_lease(queue, clock):
+    queue.put('a', {})
+    job = queue.lease('w1')
+    clock.now += 50
+    assert queue.extend(job)
+    clock.now += 50
+    assert queue.lease('w2') is None
+
+
+def test_retry_delays_and_counts(queue, clock):
+    queue.put('a', {})
+    assert queue.retry(queue.lease('w1'), 30, 'LLM unavailable', outage=True)
+    assert queue.lease('w1') is None
+    clock.now += 31
+    job = queue.lease('w1')
+    assert (job.attempts, job.failures, job.outages) == (2, 0, 1)
+    assert queue.retry(job, 0, 'boom')
+    job = queue.lease('w1')
+    assert (job.attempts, job.failures, job.outages) == (3, 1, 1)
+
+
+def test_failed_job_is_parked(queue):
+    queue.put('a', {})
+    assert queue.fail(queue.lease('w1'), 'boom')
+    assert len(queue) == 0
+    assert queue.lease('w1') is None
+    assert queue.db.execute('SELECT failed, error FROM jobs').fetchone() == (1, 'boom')
+
+
+def test_ordering_key_runs_jobs_one_at_a_time_in_order(queue, clock):
+    queue.put('m1', {}, ordering_key='g_1')
+    queue.put('m1_edit', {}, ordering_key='g_1')
+    queue.put('m2', {}, ordering_key='g_2')
+    first = queue.lease('w1')
+    assert first.key == 'm1'
+    # The edit waits for the original; other messages do not
+    assert queue.lease('w2').key == 'm2'
+    assert queue.lease('w3') is None
+    assert queue.retry(first, 10)
+    clock.now += 11
+    assert queue.lease('w3').key == 'm1'
+    assert queue.lease('w4') is None
+
+
+def test_parked_job_does_not_block_its_ordering_key(queue):
+    queue.put('m1', {}, ordering_key='g_1')
+    queue.put('m1_edit', {}, ordering_key='g_1')
+    assert queue.fail(queue.lease('w1'), 'boom')
+    assert queue.lease('w1').key == 'm1_edit'
+
+
+def test_queue_files_without_the_counter_columns_are_upgraded(tmp_path, clock):
+    path = str(tmp_path / 'old.sqlite3')
+    db = sqlite3.connect(path)
+    db.executescript("""CREATE TABLE jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL UNIQUE, ordering_key TEXT NOT NULL,
+        payload TEXT NOT NULL, created_at REAL NOT NULL, available_at REAL NOT NULL, leased_by TEXT,
+        leased_until REAL, attempts INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, error TEXT)""")
+    db.execute("INSERT INTO jobs (key, ordering_key, payload, created_at, available_at, attempts) "
+               "VALUES ('a', 'a', '{}', 0, 0, 3)")
+    db.commit()
+    db.close()
+    job = WorkQueue(path).lease('w1')
+    assert (job.attempts, job.failures, job.outages) == (4, 0, 0)
@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import random
+import logging
+import threading
+import contextvars
+from time import perf_counter, sleep, time_ns
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed step of a trace, exported in an OpenTelemetry-like JSON shape."""
+
+    __slots__ = ('trace', 'name', 'span_id', 'parent_span_id', 'attributes', 'start_ns', 'end_ns', 'status')
+
+    def __init__(self, trace: Optional['_Trace'], name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = time_ns()
+        self.end_ns = 0
+        self.status = 'OK'
+
+    @property
+    def sampled(self) -> bool:
+        return self.trace is not None
+
+    def set_attribute(self, key: str, value: Any):
+        if self.trace is not None:
+            self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_span_id,
+            'name': self.name,
+            'start_time_unix_nano': self.start_ns,
+            'end_time_unix_nano': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class _Trace:
+    """Spans collected under one sampled root, written out together when the root ends."""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+
+
+class Tracer:
+    """Lightweight span recorder writing sampled traces to a JSONL file.
+
+    The sampling decision is made once per root span; children of an
+    unsampled root are near-free no-ops.
+    """
+
+    def __init__(self, output_path: str, sample_rate: float):
+        self.output_path = output_path
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        """The innermost active span, if any."""
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the with-block as a span, starting a new trace if none is active."""
+        parent = _current_span.get()
+        if parent is None:
+            trace = _Trace() if self.enabled and random.random() < self.sample_rate else None
+        else:
+            trace = parent.trace
+        span = Span(trace, name, parent, attributes if trace is not None else {})
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = f'ERROR: {type(e).__name__}'
+            raise
+        finally:
+            _current_span.reset(token)
+            if trace is not None:
+                span.end_ns = time_ns()
+                trace.spans.append(span)
+                if parent is None:
+                    self._export(trace)
+
+    def _export(self, trace: _Trace):
+        lines = ''.join(json.dumps(span.to_dict(), default=str) + '\n' for span in trace.spans)
+        try:
+            with self._lock, open(self.output_path, 'a') as f:
+                f.write(lines)
+        except Exception as e:
+            logger.error(f"Error writing trace to {self.output_path}: {e}")
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling one thread's stack into flamegraph "folded" format.
+
+    The output can be rendered with flamegraph.pl, speedscope or inferno.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+            sleep(self.interval)
+
+    def write_folded(self, output_path: str) -> int:
+        """Write collapsed stacks, one "frame;frame;frame count" line each. Returns sample count."""
+        with open(output_path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return sum(self.samples.values())
+
+    @contextmanager
+    def profile(self, output_path: str):
+        started = perf_counter()
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+            total = self.write_folded(output_path)
+            logger.info(f"Profile written to {output_path}: {total} samples over {perf_counter() - started:.1f}s")
@@ -0,0 +1,160 @@
+import json
+import time
+import sqlite3
+import logging
+from typing import Any, Dict, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+WORK_QUEUE_JOBS = REGISTRY.counter('work_queue_jobs_total', 'Work queue jobs by outcome', ['outcome'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    ordering_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    leased_by TEXT,
+    leased_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    outages INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_available ON jobs (failed, available_at);
+CREATE INDEX IF NOT EXISTS jobs_ordering ON jobs (ordering_key, id);
+"""
+# Columns added since the first schema, for queue files created before them
+ADDED_COLUMNS = {
+    'failures': 'INTEGER NOT NULL DEFAULT 0',
+    'outages': 'INTEGER NOT NULL DEFAULT 0',
+}
+
+
+class Job:
+    """
+    A leased job. attempts counts every lease including this one, failures the
+    runs that failed or whose worker died, outages the retries for an LLM outage.
+    """
+    __slots__ = ('id', 'key', 'ordering_key', 'payload', 'created_at', 'attempts', 'failures', 'outages', 'worker')
+
+    def __init__(self, id: int, key: str, ordering_key: str, payload: Dict[str, Any], created_at: float, attempts: int,
+                 worker: str, failures: int = 0, outages: int = 0):
+        self.id = id
+        self.key = key
+        self.ordering_key = ordering_key
+        self.payload = payload
+        self.created_at = created_at
+        self.attempts = attempts
+        self.failures = failures
+        self.outages = outages
+        self.worker = worker
+
+
+class WorkQueue:
+    """
+    Job queue in a SQLite file, shared by any number of processes.
+
+    A worker leases the oldest available job for lease_seconds; a job whose
+    lease runs out (its worker died or hung) becomes available to the others
+    again, so long jobs must extend() their lease. extend(), complete(),
+    retry() and fail() only act while the caller still holds the lease and
+    return False once another worker has leased the job again; the caller
+    should then drop the job. Jobs with the same
+    ordering_key run one at a time, oldest first. Finished jobs are deleted;
+    jobs that keep failing are kept with failed=1 for inspection. Failures
+    (including expired leases) and outage retries are counted separately, so
+    waiting out an outage does not use up a job's failures.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 120):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(jobs)')}
+        for column, definition in ADDED_COLUMNS.items():
+            if column not in columns:
+                self.db.execute(f'ALTER TABLE jobs ADD COLUMN {column} {definition}')
+
+    def __len__(self) -> int:
+        """Jobs waiting or running (failed ones excluded)."""
+        return self.db.execute('SELECT COUNT(*) FROM jobs WHERE failed = 0').fetchone()[0]
+
+    def put(self, key: str, payload: Dict[str, Any], ordering_key: Optional[str] = None, delay: float = 0) -> bool:
+        """Enqueue a job; returns False if a job with this key is already queued."""
+        now = time.time()
+        cursor = self.db.execute(
+            'INSERT OR IGNORE INTO jobs (key, ordering_key, payload, created_at, available_at) VALUES (?, ?, ?, ?, ?)',
+            (key, ordering_key or key, json.dumps(payload), now, now + delay))
+        if cursor.rowcount:
+            WORK_QUEUE_JOBS.inc(outcome='queued')
+        return bool(cursor.rowcount)
+
+    def lease(self, worker: str) -> Optional[Job]:
+        """Take the oldest available job, or None if there is nothing to do."""
+        now = time.time()
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.db.execute(
+                """SELECT id, key, ordering_key, payload, created_at, attempts, failures, outages, leased_until
+                   FROM jobs AS j
+                   WHERE failed = 0 AND available_at <= ? AND (leased_until IS NULL OR leased_until < ?)
+                   AND NOT EXISTS (SELECT 1 FROM jobs WHERE ordering_key = j.ordering_key AND id < j.id AND failed = 0)
+                   ORDER BY id LIMIT 1""", (now, now)).fetchone()
+            if row is None:
+                self.db.execute('COMMIT')
+                return None
+            job_id, key, ordering_key, payload, created_at, attempts, failures, outages, leased_until = row
+            # An expired lease means the previous worker died or hung on this job
+            if leased_until is not None:
+                failures += 1
+            self.db.execute('UPDATE jobs SET leased_by = ?, leased_until = ?, attempts = attempts + 1, failures = ? '
+                            'WHERE id = ?', (worker, now + self.lease_seconds, failures, job_id))
+            self.db.execute('COMMIT')
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        if leased_until is not None:
+            WORK_QUEUE_JOBS.inc(outcome='lease_expired')
+            logger.warning(f"Lease on job {key} expired, running it again")
+        return Job(job_id, key, ordering_key, json.loads(payload), created_at, attempts + 1, worker, failures, outages)
+
+    def _settle(self, job: Job, outcome: str, sql: str, params: tuple) -> bool:
+        # The lease may have run out and the job been leased by another worker, which now owns it
+        cursor = self.db.execute(f"{sql} WHERE id = ? AND leased_by = ?", (*params, job.id, job.worker))
+        if not cursor.rowcount:
+            WORK_QUEUE_JOBS.inc(outcome='lease_lost')
+            logger.warning(f"Lost the lease on job {job.key} to another worker")
+            return False
+        if outcome:
+            WORK_QUEUE_JOBS.inc(outcome=outcome)
+        return True
+
+    def extend(self, job: Job) -> bool:
+        return self._settle(job, '', 'UPDATE jobs SET leased_until = ?', (time.time() + self.lease_seconds,))
+
+    def complete(self, job: Job) -> bool:
+        return self._settle(job, 'completed', 'DELETE FROM jobs', ())
+
+    def retry(self, job: Job, delay: float, error: str = '', outage: bool = False) -> bool:
+        """
+        Give the job back, to be leased again after delay seconds. Counts as a
+        failure, or with outage=True as an outage retry.
+        """
+        counter = 'outages' if outage else 'failures'
+        return self._settle(job, 'retried',
+                            f'UPDATE jobs SET leased_by = NULL, leased_until = NULL, available_at = ?, error = ?, '
+                            f'{counter} = {counter} + 1', (time.time() + delay, error))
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Park a job that cannot succeed; it stays in the table but is never leased again."""
+        return self._settle(job, 'failed',
+                            'UPDATE jobs SET leased_by = NULL, leased_until = NULL, failed = 1, error = ?', (error,))